@@ -0,0 +1,127 @@
+"""
+Concurrency stress test for gmu.json writes.
+
+Starts several writer processes on one gmu.json in a temporary folder. Each
+writer repeatedly
+  * bumps `letter_version` in a GmuConfig.transaction() (a shared counter), and
+  * sets its own key through GmuConfig.update() and flushes it the way a
+    command does at exit (coalesced write with merge).
+A reader process parses the file in a loop meanwhile. At the end the counter
+must equal writers * iterations, every writer key must hold its last value
+and the reader must never have seen a partial file. Exits with code 1 otherwise.
+
+`--baseline` runs the same load with plain open("w") + json.dump and no lock,
+as GmuConfig.save() did before, for comparison.
+
+    python benchmarks/gmu_json_stress.py [--writers 8] [--iterations 50] [--baseline]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def _baseline_write(path: str, writer: int, iteration: int):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["letter_version"] = int(data.get("letter_version") or 0) + 1
+    data[f"writer_{writer}"] = iteration
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def _writer(path: str, writer: int, iterations: int, baseline: bool) -> int:
+    from gmu.utils.GmuConfig import GmuConfig, flush_project_states
+
+    failures = 0
+    for iteration in range(1, iterations + 1):
+        try:
+            if baseline:
+                _baseline_write(path, writer, iteration)
+                continue
+            cfg = GmuConfig(path)
+            with cfg.transaction() as data:
+                data["letter_version"] = int(data.get("letter_version") or 0) + 1
+            GmuConfig(path).update({f"writer_{writer}": iteration})
+            flush_project_states(reset=True)
+        except (OSError, ValueError):
+            failures += 1
+    return failures
+
+
+def _reader(path: str, stop, result):
+    reads = errors = 0
+    while not stop.is_set():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json.load(f)
+        except (OSError, ValueError):
+            errors += 1
+        reads += 1
+    result.put((reads, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--baseline", action="store_true",
+                        help="Plain rewrite without lock and atomic replace")
+    args = parser.parse_args()
+
+    from gmu.utils.GmuConfig import default_gmu_config
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gmu.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(default_gmu_config(), f, ensure_ascii=False, indent=4)
+
+        stop = multiprocessing.Event()
+        reader_result = multiprocessing.Queue()
+        reader = multiprocessing.Process(target=_reader, args=(path, stop, reader_result))
+        reader.start()
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.writers) as pool:
+            failures = sum(pool.starmap(
+                _writer,
+                [(path, writer, args.iterations, args.baseline) for writer in range(args.writers)],
+            ))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        reads, read_errors = reader_result.get()
+        reader.join()
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    expected_version = args.writers * args.iterations
+    lost_keys = [
+        writer for writer in range(args.writers)
+        if data.get(f"writer_{writer}") != args.iterations
+    ]
+    mode = "baseline (open('w'), no lock)" if args.baseline else "GmuConfig (lock + os.replace)"
+    print(f"mode:            {mode}")
+    print(f"writers:         {args.writers} x {args.iterations} iterations, {elapsed:.2f} s")
+    print(f"letter_version:  {data.get('letter_version')} (expected {expected_version})")
+    print(f"writer keys:     {args.writers - len(lost_keys)}/{args.writers} hold the last value")
+    print(f"writer errors:   {failures}")
+    print(f"reader:          {reads} reads, {read_errors} partial/invalid")
+
+    ok = (data.get("letter_version") == expected_version and not lost_keys
+          and not failures and not read_errors)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
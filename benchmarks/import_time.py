@@ -0,0 +1,92 @@
+"""
+Startup benchmark for the gmu console entry point.
+
+Runs `gmu --version` (and a root-level completion request, for reference)
+in fresh interpreters under `python -X importtime` and reports wall time and
+the heaviest imports. Exits with code 1 if the median `--version` time is
+above the target.
+
+    python benchmarks/import_time.py [--runs 10] [--target-ms 100]
+"""
+
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "gmu --version": (
+        "import sys; sys.argv = ['gmu', '--version']; from gmu.cli import run; run()",
+        {},
+    ),
+    "completion: gmu <TAB>": (
+        "import sys; sys.argv = ['gmu']; from gmu.cli import run; run()",
+        {"_GMU_COMPLETE": "complete_bash", "COMP_WORDS": "gmu ", "COMP_CWORD": "1"},
+    ),
+}
+
+
+def _run(code: str, extra_env: dict) -> tuple:
+    env = {**os.environ, **extra_env, "PYTHONPATH": str(ROOT)}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return elapsed_ms, result.stderr
+
+
+def _heaviest_imports(importtime_log: str, limit: int) -> list:
+    """Top-level импорты (без вложенных) с наибольшим cumulative временем."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.replace("import time:", "").split("|")
+        # Вложенные импорты выводятся с отступом после первого пробела.
+        if name.startswith("  "):
+            continue
+        rows.append((int(cumulative_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    baseline = statistics.median(_run("pass", {})[0] for _ in range(args.runs))
+    print(f"{'python -c pass':<24} median {baseline:7.1f} ms")
+
+    version_median = None
+    for scenario, (code, extra_env) in SCENARIOS.items():
+        timings, log = [], ""
+        for _ in range(args.runs):
+            elapsed_ms, log = _run(code, extra_env)
+            timings.append(elapsed_ms)
+        median = statistics.median(timings)
+        if scenario == "gmu --version":
+            version_median = median
+        print(f"{scenario:<24} median {median:7.1f} ms  min {min(timings):7.1f} ms")
+        for cumulative_ms, name in _heaviest_imports(log, args.top):
+            print(f"    {cumulative_ms:7.1f} ms  {name}")
+
+    if version_median > args.target_ms:
+        print(f"FAIL: gmu --version {version_median:.1f} ms > {args.target_ms:.0f} ms")
+        sys.exit(1)
+    print(f"OK: gmu --version {version_median:.1f} ms <= {args.target_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
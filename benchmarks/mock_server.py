@@ -0,0 +1,647 @@
+"""
+Offline stand-in for the Unisender API and WebLetter.
+
+Implements the Unisender methods gmu calls (POST /api/<method>, form data,
+optionally gzip/bzip2 request bodies and response_compression=gzip) and the
+WebLetter routes (POST <prefix>upload, PUT <prefix><id>, DELETE <prefix><id>
+with an Authorization header). Messages, campaigns and webletters are kept
+in memory.
+
+Knobs for load tests:
+  --latency-ms / --jitter-ms   delay before every response;
+  --error-rate                 share of Unisender calls answered with an API error;
+  --http-error-rate            share of calls answered with HTTP 503;
+  --rate-limit                 Unisender calls per second per API key; above it
+                               the server answers api_call_limit_exceeded_for_api_key;
+  --gzip                       gzip responses for clients that send Accept-Encoding: gzip;
+  --campaign-seconds           campaigns go scheduled -> in_progress -> completed
+                               over this many seconds (0: status stays as created);
+  --task-seconds               exportContacts tasks go new -> processing -> completed
+                               over this many seconds;
+  --export-rows                synthetic contacts appended to every export file.
+Export files are served at GET /files/<task_uuid>.csv with Range support;
+with --http-error-rate the transfer is cut off midway at that rate.
+GET /__stats returns request counters and latencies, POST /__reset clears them.
+
+    python benchmarks/mock_server.py [--port 8766] [--latency-ms 50] [--rate-limit 20]
+
+then point gmu at it:
+
+    UNISENDER_API_URL=http://127.0.0.1:8766/api/ UNISENDER_API_KEY=test
+    WL_ENDPOINT=http://127.0.0.1:8766/wl/ WL_AUTH_TOKEN=test WL_URL=http://127.0.0.1:8766/view/
+"""
+
+import argparse
+import bz2
+import gzip
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+import urllib.parse
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+UNISENDER_PREFIX = "/api/"
+TEST_EMAIL_MAX_RECIPIENTS = 10
+IMPORT_CONTACTS_MAX_ROWS = 500
+WEBLETTER_PREFIX = "/wl/"
+FILES_PREFIX = "/files/"
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    http_error_rate: float = 0.0
+    rate_limit: Optional[float] = None
+    gzip_responses: bool = False
+    seed: Optional[int] = None
+    campaign_seconds: float = 0.0
+    task_seconds: float = 0.0
+    export_rows: int = 0
+
+
+class UnisenderError(Exception):
+    def __init__(self, message: str, code: str = "unspecified"):
+        super().__init__(message)
+        self.code = code
+
+
+class MockState:
+    """Данные и счетчики сервера; все методы вызываются под self.lock."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.ids = itertools.count(1000)
+        self.messages = {}
+        self.campaigns = {}
+        self.webletters = {}
+        self.lists = {}
+        self.contacts = {}
+        self.tasks = {}
+        self.rate_windows = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.started = time.time()
+        self.stats = {}
+
+    def record(self, route: str, status: str, elapsed: float):
+        entry = self.stats.setdefault(route, {"count": 0, "errors": 0, "rate_limited": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += elapsed
+        if status == "rate_limited":
+            entry["rate_limited"] += 1
+        elif status != "ok":
+            entry["errors"] += 1
+
+    def summary(self) -> dict:
+        elapsed = time.time() - self.started
+        total = sum(entry["count"] for entry in self.stats.values())
+        return {
+            "elapsed": elapsed,
+            "requests": total,
+            "requests_per_second": total / elapsed if elapsed else 0.0,
+            "routes": self.stats,
+        }
+
+    def rate_limited(self, api_key: str) -> bool:
+        limit = self.config.rate_limit
+        if not limit:
+            return False
+        now = time.monotonic()
+        window = [stamp for stamp in self.rate_windows.get(api_key, []) if now - stamp < 1.0]
+        limited = len(window) >= limit
+        if not limited:
+            window.append(now)
+        self.rate_windows[api_key] = window
+        return limited
+
+
+def _message(state: MockState, params: dict) -> dict:
+    message_id = int(params.get("id") or params.get("message_id") or 0)
+    if message_id not in state.messages:
+        raise UnisenderError(f"Message {message_id} not found", "object_not_found")
+    return state.messages[message_id]
+
+
+def create_email_message(state: MockState, params: dict):
+    for field in ("sender_name", "sender_email", "subject", "body", "list_id"):
+        if not params.get(field):
+            raise UnisenderError(f"Parameter {field} is required", "invalid_arg")
+    message_id = next(state.ids)
+    state.messages[message_id] = {
+        "id": message_id,
+        "sender_name": params["sender_name"],
+        "sender_email": params["sender_email"],
+        "subject": params["subject"],
+        "body": params["body"],
+        "list_id": params["list_id"],
+        "lang_code": params.get("lang") or "ru",
+        "attachments": sorted(key[12:-1] for key in params if key.startswith("attachments[")),
+        "version_id": message_id,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "last_update": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return {"message_id": message_id}
+
+
+def update_email_message(state: MockState, params: dict):
+    message = _message(state, params)
+    for field in ("sender_name", "sender_email", "subject", "body", "list_id"):
+        if params.get(field):
+            message[field] = params[field]
+    message["version_id"] = next(state.ids)
+    message["last_update"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return {"message_id": message["id"]}
+
+
+def delete_message(state: MockState, params: dict):
+    _message(state, params)
+    del state.messages[int(params["message_id"])]
+    return {}
+
+
+def get_message(state: MockState, params: dict):
+    message = _message(state, params)
+    return [{key: value for key, value in message.items() if key != "version_id"}]
+
+
+def get_actual_message_version(state: MockState, params: dict):
+    message = _message(state, params)
+    return {"message_id": message["id"], "actual_version_id": message["version_id"]}
+
+
+def send_test_email(state: MockState, params: dict):
+    _message(state, params)
+    emails = [email.strip() for email in str(params.get("email", "")).split(",") if email.strip()]
+    if not emails:
+        raise UnisenderError("Parameter email is required", "invalid_arg")
+    if len(emails) > TEST_EMAIL_MAX_RECIPIENTS:
+        raise UnisenderError(f"Too many recipients: {len(emails)} > {TEST_EMAIL_MAX_RECIPIENTS}", "invalid_arg")
+    invalid = [email for email in emails if "@" not in email]
+    if invalid:
+        # Как и Unisender, один неверный адрес отменяет весь вызов.
+        raise UnisenderError(f"Invalid email: {invalid[0]}", "invalid_arg")
+    return {email: {"success": True} for email in emails}
+
+
+def create_campaign(state: MockState, params: dict):
+    _message(state, params)
+    campaign_id = next(state.ids)
+    state.campaigns[campaign_id] = {
+        "status": "scheduled" if params.get("start_time") else "waits_schedule",
+        "creation_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "start_time": params.get("start_time") or time.strftime("%Y-%m-%d %H:%M:%S"),
+        "message_id": int(params["message_id"]),
+        "created": time.monotonic(),
+    }
+    return {"campaign_id": campaign_id, "status": state.campaigns[campaign_id]["status"], "count": 1}
+
+
+def _campaign(state: MockState, params: dict) -> dict:
+    campaign_id = int(params.get("campaign_id") or 0)
+    if campaign_id not in state.campaigns:
+        raise UnisenderError(f"Campaign {campaign_id} not found", "object_not_found")
+    return state.campaigns[campaign_id]
+
+
+def get_campaign_status(state: MockState, params: dict):
+    campaign = _campaign(state, params)
+    duration = state.config.campaign_seconds
+    if duration > 0:
+        elapsed = time.monotonic() - campaign["created"]
+        campaign["status"] = ("scheduled" if elapsed < duration / 2
+                              else "in_progress" if elapsed < duration else "completed")
+    return {key: campaign[key] for key in ("status", "creation_time", "start_time")}
+
+
+def get_campaign_common_stats(state: MockState, params: dict):
+    campaign = _campaign(state, params)
+    stats = {"total": 1000, "sent": 1000, "delivered": 980, "read_unique": 400, "read_all": 520,
+             "clicked_unique": 60, "clicked_all": 75, "unsubscribed": 3, "spam": 1}
+    duration = state.config.campaign_seconds
+    if duration > 0:
+        # Открытия и клики копятся еще столько же после завершения рассылки.
+        share = min(1.0, (time.monotonic() - campaign["created"]) / (2 * duration))
+        for key in ("read_unique", "read_all", "clicked_unique", "clicked_all", "unsubscribed", "spam"):
+            stats[key] = int(stats[key] * share)
+    return stats
+
+
+def get_web_version(state: MockState, params: dict):
+    campaign_id = int(params.get("campaign_id") or 0)
+    _campaign(state, params)
+    return {"letter_id": campaign_id, "web_letter_link": f"https://mock.unisender.local/web/{campaign_id}"}
+
+
+def create_list(state: MockState, params: dict):
+    if not params.get("title"):
+        raise UnisenderError("Parameter title is required", "invalid_arg")
+    list_id = next(state.ids)
+    state.lists[list_id] = {"id": list_id, "title": params["title"]}
+    return {"id": list_id}
+
+
+def _indexed(params: dict, prefix: str) -> dict:
+    """Параметры вида prefix[i] или prefix[i][j] -> {i: значение} или {i: {j: значение}}."""
+    result = {}
+    for key, value in params.items():
+        if not key.startswith(prefix + "["):
+            continue
+        indexes = [int(part) for part in key[len(prefix) + 1:-1].split("][")]
+        target = result
+        for index in indexes[:-1]:
+            target = target.setdefault(index, {})
+        target[indexes[-1]] = value
+    return result
+
+
+def import_contacts(state: MockState, params: dict):
+    field_names = _indexed(params, "field_names")
+    names = [field_names[index] for index in sorted(field_names)]
+    if "email" not in names:
+        raise UnisenderError("Field email is required", "invalid_arg")
+    data = _indexed(params, "data")
+    if len(data) > IMPORT_CONTACTS_MAX_ROWS:
+        raise UnisenderError(f"Too many contacts: {len(data)} > {IMPORT_CONTACTS_MAX_ROWS}", "invalid_arg")
+
+    counters = {"total": len(data), "inserted": 0, "updated": 0, "deleted": 0, "new_emails": 0, "invalid": 0}
+    log = []
+    for index in sorted(data):
+        row = {names[column]: value for column, value in data[index].items() if column < len(names)}
+        email = row.get("email", "").strip().lower()
+        if "@" not in email:
+            counters["invalid"] += 1
+            log.append({"index": index, "code": "invalid_email", "message": f"Invalid email: {email!r}"})
+            continue
+        lists = {item for item in row.get("email_list_ids", "").split(",") if item}
+        contact = state.contacts.get(email)
+        if contact is None:
+            state.contacts[email] = {"fields": row, "lists": lists}
+            counters["inserted"] += 1
+            counters["new_emails"] += 1
+        else:
+            contact["fields"].update(row)
+            contact["lists"] = lists if params.get("overwrite_lists") == "1" else contact["lists"] | lists
+            counters["updated"] += 1
+    return {**counters, "log": log}
+
+
+def export_contacts(state: MockState, params: dict):
+    field_names = _indexed(params, "field_names")
+    names = [field_names[index] for index in sorted(field_names)] or ["email", "email_list_ids"]
+    list_id = params.get("list_id")
+    # Снимок контактов на момент создания задачи, как у Unisender.
+    contacts = [
+        (email, {**contact["fields"], "email": email, "email_list_ids": ",".join(sorted(contact["lists"]))})
+        for email, contact in sorted(state.contacts.items())
+        if not list_id or list_id in contact["lists"]
+    ]
+    task_uuid = str(uuid.UUID(int=state.random.getrandbits(128)))
+    state.tasks[task_uuid] = {"created": time.monotonic(), "field_names": names, "list_id": list_id,
+                              "contacts": [row for _, row in contacts]}
+    return {"task_uuid": task_uuid, "status": "new"}
+
+
+def get_task_result(state: MockState, params: dict):
+    task_uuid = params.get("task_uuid") or ""
+    task = state.tasks.get(task_uuid)
+    if task is None:
+        raise UnisenderError(f"Task {task_uuid} not found", "object_not_found")
+    duration = state.config.task_seconds
+    elapsed = time.monotonic() - task["created"]
+    if duration > 0 and elapsed < duration:
+        return {"task_uuid": task_uuid, "status": "new" if elapsed < duration / 3 else "processing"}
+    # Ссылка собирается обработчиком: ему известен адрес, по которому пришел запрос.
+    return {"task_uuid": task_uuid, "status": "completed", "file_to_download": f"{FILES_PREFIX}{task_uuid}.csv"}
+
+
+def export_lines(task: dict, export_rows: int) -> Iterator[bytes]:
+    """Строки CSV файла выгрузки; синтетические контакты генерируются на лету."""
+    names = task["field_names"]
+
+    def line(values) -> bytes:
+        return (",".join('"' + str(value).replace('"', '""') + '"' for value in values) + "\r\n").encode("utf-8")
+
+    yield line(names)
+    for contact in task["contacts"]:
+        yield line(contact.get(name, "") for name in names)
+    for index in range(export_rows):
+        synthetic = {"email": f"contact{index}@example.com", "email_list_ids": task["list_id"] or "",
+                     "Name": f"Contact {index}", "email_status": "active"}
+        yield line(synthetic.get(name, "") for name in names)
+
+
+UNISENDER_METHODS = {
+    "createEmailMessage": create_email_message,
+    "updateEmailMessage": update_email_message,
+    "deleteMessage": delete_message,
+    "getMessage": get_message,
+    "getActualMessageVersion": get_actual_message_version,
+    "sendTestEmail": send_test_email,
+    "createCampaign": create_campaign,
+    "getCampaignStatus": get_campaign_status,
+    "getCampaignCommonStats": get_campaign_common_stats,
+    "getWebVersion": get_web_version,
+    "createList": create_list,
+    "importContacts": import_contacts,
+    "exportContacts": export_contacts,
+    "getTaskResult": get_task_result,
+}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "gmu-mock/1.0"
+    # Заголовки и тело уходят отдельными send(); без TCP_NODELAY ответ ждет delayed ACK клиента.
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        encoding = (self.headers.get("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "bzip2":
+            return bz2.decompress(body)
+        return body
+
+    def _send(self, status: int, payload, compress: bool = False):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        accepts_gzip = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        compress = compress or (self.state.config.gzip_responses and accepts_gzip)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if compress:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        config = self.state.config
+        delay = config.latency_ms + (self.state.random.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+    def _handle(self):
+        started = time.perf_counter()
+        path = urllib.parse.urlparse(self.path).path
+        if path.startswith(FILES_PREFIX) and self.command == "GET":
+            return self._file(path[len(FILES_PREFIX):])
+        body = self._read_body()
+        self._delay()
+        route, status = path, "ok"
+        try:
+            if path == "/__stats":
+                with self.state.lock:
+                    return self._send(200, self.state.summary())
+            if path == "/__reset":
+                with self.state.lock:
+                    self.state.reset_stats()
+                return self._send(200, {"ok": True})
+            if path.startswith(UNISENDER_PREFIX) and self.command == "POST":
+                route = path[len(UNISENDER_PREFIX):].strip("/")
+                status, http_status, payload, compress = self._unisender(route, body)
+            elif path.startswith(WEBLETTER_PREFIX):
+                route = f"{self.command} {WEBLETTER_PREFIX}"
+                status, http_status, payload = self._webletter(path[len(WEBLETTER_PREFIX):], body)
+                compress = False
+            else:
+                status, http_status, payload, compress = (
+                    "not_found", 404, {"error": f"Unknown route {self.command} {path}"}, False)
+            self._send(http_status, payload, compress)
+        finally:
+            if not path.startswith("/__"):
+                with self.state.lock:
+                    self.state.record(route, status, time.perf_counter() - started)
+
+    def _unisender(self, method: str, body: bytes) -> tuple:
+        """(статус для счетчиков, HTTP-код, ответ, сжимать ли ответ)."""
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        form = urllib.parse.parse_qs(body.decode("utf-8", errors="replace"), keep_blank_values=True)
+        params = {key: values[-1] for key, values in {**query, **form}.items()}
+        compress = params.get("response_compression") == "gzip"
+
+        with self.state.lock:
+            if not params.get("api_key"):
+                return "error", 200, {"error": "Invalid API key", "code": "invalid_api_key"}, compress
+            if self.state.rate_limited(params["api_key"]):
+                return "rate_limited", 200, {
+                    "error": "API call limit exceeded", "code": "api_call_limit_exceeded_for_api_key"}, compress
+            roll = self.state.random.random()
+            if roll < self.state.config.http_error_rate:
+                return "error", 503, {"error": "Service temporarily unavailable"}, False
+            if roll < self.state.config.http_error_rate + self.state.config.error_rate:
+                return "error", 200, {"error": "Injected error", "code": "unspecified"}, compress
+            handler = UNISENDER_METHODS.get(method)
+            if handler is None:
+                return "error", 200, {"error": f"Unknown method {method}", "code": "invalid_method"}, compress
+            try:
+                result = handler(self.state, params)
+            except UnisenderError as exc:
+                return "error", 200, {"error": str(exc), "code": exc.code}, compress
+        if method == "getTaskResult" and "file_to_download" in result:
+            result = {**result, "file_to_download": f"http://{self.headers.get('Host')}{result['file_to_download']}"}
+        return "ok", 200, {"result": result}, compress
+
+    def _file(self, name: str):
+        """Файл выгрузки: потоково, chunked, с поддержкой Range: bytes=N-."""
+        started = time.perf_counter()
+        status = "ok"
+        with self.state.lock:
+            task = self.state.tasks.get(name.removesuffix(".csv"))
+            cut_off = self.state.random.random() < self.state.config.http_error_rate
+            export_rows = self.state.config.export_rows
+        try:
+            if task is None:
+                status = "not_found"
+                return self._send(404, {"error": f"File {name} not found"})
+            offset = 0
+            range_header = self.headers.get("Range") or ""
+            if range_header.startswith("bytes=") and range_header.endswith("-"):
+                offset = int(range_header[len("bytes="):-1] or 0)
+            self.send_response(206 if offset else 200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            chunk, chunks = bytearray(), 0
+            for data in export_lines(task, export_rows):
+                if offset:
+                    skipped = min(offset, len(data))
+                    data, offset = data[skipped:], offset - skipped
+                chunk += data
+                if len(chunk) >= FILE_CHUNK_SIZE:
+                    chunks += 1
+                    if cut_off and chunks == 3:
+                        # Обрыв соединения посреди передачи: клиент должен докачать файл с Range.
+                        status = "error"
+                        self.close_connection = True
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), bytes(chunk)))
+                    chunk = bytearray()
+            if chunk:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), bytes(chunk)))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            status = "error"
+        finally:
+            with self.state.lock:
+                self.state.record(f"GET {FILES_PREFIX}", status, time.perf_counter() - started)
+
+    def _webletter(self, rest: str, body: bytes) -> tuple:
+        """(статус для счетчиков, HTTP-код, ответ)."""
+        if not self.headers.get("Authorization"):
+            return "error", 401, {"message": "Unauthorized"}
+        webletter_id = rest.strip("/")
+        with self.state.lock:
+            if self.state.random.random() < self.state.config.http_error_rate:
+                return "error", 503, {"message": "Service temporarily unavailable"}
+            if self.command == "POST" and rest == "upload":
+                webletter_id = f"wl{next(self.state.ids)}"
+            elif self.command not in ("PUT", "DELETE") or not webletter_id:
+                return "not_found", 404, {"message": f"Unknown route {self.command} {WEBLETTER_PREFIX}{rest}"}
+            elif webletter_id not in self.state.webletters:
+                return "error", 404, {"message": f"Webletter {webletter_id} not found"}
+
+            if self.command == "DELETE":
+                del self.state.webletters[webletter_id]
+                return "ok", 200, {"data": {"id": webletter_id, "deleted": True}}
+            if b"filename=" not in body:
+                return "error", 422, {"message": "File is required"}
+            self.state.webletters[webletter_id] = {"size": len(body), "updated": time.time()}
+        return "ok", 200, {"data": {"id": webletter_id, "size": len(body)}}
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class MockServer:
+    """
+    Сервер в фоновом потоке:
+
+        with MockServer(MockConfig(latency_ms=50)) as server:
+            os.environ["UNISENDER_API_URL"] = server.unisender_url
+    """
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockState(config or MockConfig())
+        self.thread = None
+
+    @property
+    def state(self) -> MockState:
+        return self.httpd.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def unisender_url(self) -> str:
+        return f"{self.base_url}{UNISENDER_PREFIX}"
+
+    @property
+    def webletter_url(self) -> str:
+        return f"{self.base_url}{WEBLETTER_PREFIX}"
+
+    def environment(self) -> dict:
+        """Переменные окружения, которые направляют gmu на этот сервер."""
+        return {
+            "UNISENDER_API_URL": self.unisender_url,
+            "UNISENDER_API_KEY": "mock-key",
+            "WL_ENDPOINT": self.webletter_url,
+            "WL_AUTH_TOKEN": "mock-token",
+            "WL_URL": f"{self.base_url}/view/",
+        }
+
+    def start(self) -> "MockServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Unisender calls per second per API key")
+    parser.add_argument("--gzip", action="store_true", help="gzip responses when the client accepts it")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--campaign-seconds", type=float, default=0.0,
+                        help="time for a campaign to go from scheduled to completed")
+    parser.add_argument("--task-seconds", type=float, default=0.0,
+                        help="time for an exportContacts task to complete")
+    parser.add_argument("--export-rows", type=int, default=0,
+                        help="synthetic contacts appended to every export file")
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        rate_limit=args.rate_limit,
+        gzip_responses=args.gzip,
+        seed=args.seed,
+        campaign_seconds=args.campaign_seconds,
+        task_seconds=args.task_seconds,
+        export_rows=args.export_rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(config_from_args(args), args.host, args.port)
+    print(f"Unisender: {server.unisender_url}")
+    print(f"WebLetter: {server.webletter_url}")
+    for name, value in server.environment().items():
+        print(f"  {name}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+End-to-end upload benchmark against the offline mock servers.
+
+Starts benchmarks/mock_server.py in a background thread (or uses --url of a
+server started separately) and measures:
+  * upsert  - `gmu m upsert --reupload` in fresh processes (HTML build,
+              createEmailMessage with attachments, deleteMessage of the old one);
+  * publish - `gmu publish --reupload` (Unisender and WebLetter in parallel);
+  * api     - getActualMessageVersion from --concurrency threads through
+              UnisenderClient, without the response cache or the local rate limiter.
+For every scenario it prints median/p95 latency and requests per second seen
+by the server. The letter is a copy of --letter or a generated one with two
+images; Juice must be installed as for a normal build.
+
+    python benchmarks/upload_throughput.py [--scenario upsert publish api] [--runs 5]
+        [--latency-ms 50] [--rate-limit 20] [--concurrency 8] [--duration 5]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from mock_server import MockServer, config_arguments, config_from_args  # noqa: E402
+
+SCENARIO_COMMANDS = {
+    "upsert": ["m", "upsert", "--reupload"],
+    "publish": ["publish", "--reupload"],
+}
+
+LETTER_HTML = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<meta name="sender-name" content="Benchmark">
+<meta name="sender-email" content="bench@example.com">
+<title>Benchmark letter</title>
+<style>.title { font-size: 24px; color: #222; } .text { font-size: 16px; }</style>
+</head>
+<body>
+<div style="display: none">Benchmark preheader</div>
+<table role="presentation" width="600">
+<tr><td class="title">Benchmark letter</td></tr>
+<tr><td><img src="images/hero.png" width="600" alt=""></td></tr>
+<tr><td class="text">{text}</td></tr>
+<tr><td><img src="images/footer.jpg" width="300" alt=""></td></tr>
+</table>
+</body>
+</html>
+"""
+
+
+def _generate_letter(folder: pathlib.Path):
+    from PIL import Image
+
+    (folder / "images").mkdir(parents=True)
+    Image.new("RGB", (1200, 600), (40, 120, 200)).save(folder / "images" / "hero.png")
+    Image.new("RGB", (600, 200), (200, 80, 40)).save(folder / "images" / "footer.jpg", quality=90)
+    text = " ".join(f"Paragraph {index} of the benchmark letter." for index in range(200))
+    (folder / "index.html").write_text(LETTER_HTML.replace("{text}", text), encoding="utf-8")
+
+
+def _prepare_letter(source, target: pathlib.Path):
+    if source:
+        shutil.copytree(source, target, ignore=shutil.ignore_patterns("gmu.json", "*.zip"))
+    else:
+        _generate_letter(target)
+
+
+def _server_stats(base_url: str, reset: bool = False) -> dict:
+    request = urllib.request.Request(
+        f"{base_url}/__reset" if reset else f"{base_url}/__stats", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+
+def _report(name: str, latencies: list, elapsed: float, stats: dict):
+    errors = sum(route["errors"] for route in stats["routes"].values())
+    rate_limited = sum(route["rate_limited"] for route in stats["routes"].values())
+    print(
+        f"{name:<8} runs {len(latencies):4d}  median {statistics.median(latencies) * 1000:8.1f} ms  "
+        f"p95 {_percentile(latencies, 0.95) * 1000:8.1f} ms  "
+        f"server {stats['requests']:5d} req  {stats['requests'] / elapsed:7.1f} req/s  "
+        f"errors {errors}  rate-limited {rate_limited}"
+    )
+    for route, entry in sorted(stats["routes"].items()):
+        print(f"    {route:<28} {entry['count']:5d}  avg {entry['seconds'] / entry['count'] * 1000:7.1f} ms")
+
+
+def _run_cli(scenario: str, letter: pathlib.Path, env: dict, runs: int, base_url: str):
+    latencies = []
+    _server_stats(base_url, reset=True)
+    started = time.perf_counter()
+    for run in range(runs):
+        run_started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-m", "gmu.cli", *SCENARIO_COMMANDS[scenario]],
+            cwd=letter, env=env, capture_output=True, text=True, check=False,
+        )
+        latencies.append(time.perf_counter() - run_started)
+        if result.returncode != 0:
+            print(f"{scenario}: run {run + 1} failed with code {result.returncode}")
+            print(result.stdout[-2000:] + result.stderr[-2000:])
+    _report(scenario, latencies, time.perf_counter() - started, _server_stats(base_url))
+
+
+def _run_api(env: dict, concurrency: int, duration: float, base_url: str):
+    os.environ.update(env)
+    from gmu.utils.rate_limiter import RateLimiter
+    from gmu.utils.Unisender import UnisenderClient
+
+    limiter = RateLimiter(global_rate=None)
+    seed_client = UnisenderClient(rate_limiter=limiter, use_cache=False)
+    message_id = seed_client.create_email_message(
+        sender_name="Benchmark", sender_email="bench@example.com", subject="Benchmark",
+        body="<p>Benchmark</p>", list_id=1).get("message_id")
+
+    latencies, lock = [], threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        import requests
+
+        client = UnisenderClient(session=requests.Session(), rate_limiter=limiter, use_cache=False)
+        while time.perf_counter() < deadline:
+            request_started = time.perf_counter()
+            try:
+                client.get_actual_message_version(message_id)
+            except Exception:
+                pass
+            with lock:
+                latencies.append(time.perf_counter() - request_started)
+
+    _server_stats(base_url, reset=True)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    _report("api", latencies, time.perf_counter() - started, _server_stats(base_url))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", nargs="+", choices=["upsert", "publish", "api"],
+                        default=["upsert", "publish", "api"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of the api scenario")
+    parser.add_argument("--letter", help="letter folder to copy (default: a generated letter)")
+    parser.add_argument("--url", help="base URL of a running mock_server.py instead of an embedded one")
+    config_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        mock_env = {
+            "UNISENDER_API_URL": f"{base_url}/api/", "UNISENDER_API_KEY": "mock-key",
+            "WL_ENDPOINT": f"{base_url}/wl/", "WL_AUTH_TOKEN": "mock-token", "WL_URL": f"{base_url}/view/",
+        }
+    else:
+        server = MockServer(config_from_args(args)).start()
+        base_url, mock_env = server.base_url, server.environment()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            **mock_env,
+            "PYTHONPATH": str(ROOT),
+            "GMU_NO_DAEMON": "1",
+            # Лимит проверяет сервер; локальный лимитер не должен его маскировать.
+            "GMU_RATE_LIMIT": "0",
+        }
+        try:
+            for scenario in args.scenario:
+                if scenario == "api":
+                    _run_api(mock_env, args.concurrency, args.duration, base_url)
+                    continue
+                letter = pathlib.Path(tmp) / scenario
+                _prepare_letter(args.letter, letter)
+                _run_cli(scenario, letter, env, args.runs, base_url)
+        finally:
+            if server is not None:
+                server.stop()
+
+
+if __name__ == "__main__":
+    main()
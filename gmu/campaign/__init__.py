@@ -1,8 +1,10 @@
 import typer
 
+from .campaign_stats import app as campaign_stats_app
 from .create_campaign import app as create_campaign_app
 from .get_campaign_status import app as get_campaign_status_app
 from .get_web_version import app as get_web_version_app
+from .watch_campaigns import app as watch_campaigns_app
 
 app = typer.Typer()
 
@@ -10,3 +12,5 @@ app = typer.Typer()
 app.add_typer(get_campaign_status_app)
 app.add_typer(get_web_version_app)
 app.add_typer(create_campaign_app)
+app.add_typer(watch_campaigns_app)
+app.add_typer(campaign_stats_app)
@@ -0,0 +1,107 @@
+import contextlib
+import os
+import sys
+from typing import List, Optional
+
+import typer
+
+from gmu.utils.campaign_watch import find_project_campaigns
+from gmu.utils.helpers import table_print
+from gmu.utils.stats_store import SETTLE_DAYS, StatsStore, fetch_campaign_stats
+
+app = typer.Typer()
+stats_app = typer.Typer(help="Статистика кампаний")
+app.add_typer(stats_app, name="stats")
+
+
+def _export_csv(store: StatsStore, csv_path: str, campaign_ids: Optional[List[int]]):
+    if csv_path == "-":
+        store.export_csv(sys.stdout, campaign_ids)
+        return
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        rows = store.export_csv(f, campaign_ids)
+    table_print("SUCCESS", f"CSV сохранен: {csv_path} (строк: {rows})")
+
+
+@stats_app.command(name="export")
+def export_stats(
+    campaign_ids: Optional[List[int]] = typer.Argument(
+        None, help="ID кампаний. Если не заданы, берутся из gmu.json в папках --path и из базы"),
+    path: List[str] = typer.Option(
+        ["."], "--path", "-p", help="Папки с проектами писем (просматриваются с подпапками)"),
+    db: Optional[str] = typer.Option(
+        None, help="Файл SQLite (по умолчанию GMU_STATS_DB или campaign_stats.sqlite в папке данных GMU)"),
+    csv_path: Optional[str] = typer.Option(
+        None, "--csv", help="Выгрузить историю в CSV-файл ('-' - в stdout)"),
+    fetch: bool = typer.Option(
+        True, "--fetch/--no-fetch", help="Запросить свежую статистику в Unisender"),
+    all_campaigns: bool = typer.Option(
+        False, "--all", help="Запрашивать и кампании, статистика которых уже не меняется"),
+    settle_days: float = typer.Option(
+        SETTLE_DAYS, help="Через сколько дней без изменений завершенная кампания больше не запрашивается"),
+    concurrency: Optional[int] = typer.Option(
+        None, help="Одновременных запросов (по умолчанию GMU_UNISENDER_CONCURRENCY или 5)"),
+):
+    """
+    Сохраняет статистику кампаний (getCampaignCommonStats) в локальную базу SQLite.
+    Новый снимок добавляется, только если счетчики изменились; по истории можно
+    построить кривые открытий и кликов, выгрузив ее в CSV.
+    """
+    # При выводе CSV в stdout сообщения о запросах уходят в stderr.
+    output = contextlib.redirect_stdout(sys.stderr) if csv_path == "-" else contextlib.nullcontext()
+    failed = 0
+    with StatsStore(db) as store:
+        if fetch:
+            with output:
+                failed = _fetch(store, campaign_ids, path, all_campaigns, settle_days, concurrency)
+        if csv_path:
+            _export_csv(store, csv_path, campaign_ids)
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _fetch(store: StatsStore, campaign_ids: Optional[List[int]], path: List[str], all_campaigns: bool,
+           settle_days: float, concurrency: Optional[int]) -> int:
+    tracked = store.tracked()
+    projects = find_project_campaigns(path)
+    if campaign_ids:
+        targets = list(dict.fromkeys(campaign_ids))
+    else:
+        candidates = list(dict.fromkeys([*projects, *tracked]))
+        targets = [campaign_id for campaign_id in candidates
+                   if all_campaigns or not store.is_settled(tracked.get(campaign_id), settle_days)]
+        skipped = len(candidates) - len(targets)
+        if skipped:
+            table_print("INFO", f"Пропущено кампаний, статистика которых не меняется: {skipped}")
+    if not targets:
+        table_print("INFO", "Нет кампаний для обновления статистики.")
+        return 0
+
+    table_print("INFO", f"Запрос статистики кампаний: {len(targets)}")
+    known_status = {campaign_id: tracked[campaign_id]["status"] if campaign_id in tracked else None
+                    for campaign_id in targets}
+    results = fetch_campaign_stats(known_status, concurrency)
+
+    added, failed = 0, 0
+    for result in results:
+        project = projects.get(result.campaign_id)
+        label = project.label if project else result.campaign_id
+        if result.error:
+            failed += 1
+            table_print("ERROR", f"Campaign ID: {label} | {result.error}")
+            continue
+        project_dir = os.path.dirname(os.path.abspath(project.config_path)) if project else None
+        changed = store.record(result, project_dir)
+        added += changed
+        table_print(
+            "SUCCESS" if changed else "INFO",
+            f"Campaign ID: {label} | {result.status} | отправлено: {result.stats.get('sent')} | "
+            f"открытий: {result.stats.get('read_unique')} | кликов: {result.stats.get('clicked_unique')}"
+            + ("" if changed else " | без изменений"),
+        )
+
+    table_print("ERROR" if failed else "SUCCESS",
+                f"Новых снимков: {added} | Без изменений: {len(results) - added - failed} | Ошибок: {failed}"
+                f" | База: {store.path}")
+    return failed
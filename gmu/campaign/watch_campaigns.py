@@ -0,0 +1,75 @@
+from typing import List, Optional
+
+import typer
+
+from gmu.utils.campaign_watch import (DEFAULT_INTERVAL, DEFAULT_MAX_INTERVAL, WatchedCampaign,
+                                      find_project_campaigns, watch_campaigns)
+from gmu.utils.helpers import table_print
+
+app = typer.Typer()
+
+STATS_FIELDS = (("sent", "отправлено"), ("delivered", "доставлено"),
+                ("read_unique", "открытий"), ("clicked_unique", "кликов"))
+
+
+def _print_change(campaign: WatchedCampaign):
+    status = "SUCCESS" if campaign.finished else "INFO"
+    table_print(status, f"Campaign ID: {campaign.label} | Status: {campaign.status}")
+    if campaign.finished and isinstance(campaign.stats, dict):
+        summary = " | ".join(
+            f"{title}: {campaign.stats[key]}" for key, title in STATS_FIELDS if key in campaign.stats)
+        if summary:
+            table_print("INFO", f"Campaign ID: {campaign.label} | {summary}")
+
+
+@app.command(name="watch")
+def watch(
+    campaign_ids: Optional[List[int]] = typer.Argument(
+        None, help="ID кампаний. Если не заданы, берутся из gmu.json в папках --path"),
+    path: List[str] = typer.Option(
+        ["."], "--path", "-p", help="Папки с проектами писем (просматриваются с подпапками)"),
+    interval: float = typer.Option(
+        DEFAULT_INTERVAL, help="Начальная пауза между запросами статуса, секунд"),
+    max_interval: float = typer.Option(
+        DEFAULT_MAX_INTERVAL, help="Максимальная пауза для кампаний вне рассылки, секунд"),
+    concurrency: Optional[int] = typer.Option(
+        None, help="Одновременных запросов (по умолчанию GMU_UNISENDER_CONCURRENCY или 5)"),
+    timeout: Optional[float] = typer.Option(
+        None, help="Завершить ожидание через указанное число секунд"),
+):
+    """
+    Следит за статусами кампаний, пока все не завершатся.
+    Статус каждой кампании сохраняется в gmu.json ее проекта при изменении,
+    после завершения туда же записывается статистика getCampaignCommonStats.
+    """
+    projects = find_project_campaigns(path)
+    if campaign_ids:
+        campaigns = [projects.get(campaign_id) or WatchedCampaign(campaign_id)
+                     for campaign_id in dict.fromkeys(campaign_ids)]
+    else:
+        campaigns = [campaign for campaign in projects.values() if not campaign.finished]
+        if not campaigns:
+            table_print("INFO", "Незавершенных кампаний в gmu.json не найдено.")
+            return
+
+    table_print("INFO", f"Отслеживание кампаний: {len(campaigns)}")
+    for campaign in campaigns:
+        if campaign.status:
+            table_print("INFO", f"Campaign ID: {campaign.label} | Status: {campaign.status}")
+
+    try:
+        completed = watch_campaigns(campaigns, interval, max_interval, concurrency, timeout, _print_change)
+    except KeyboardInterrupt:
+        table_print("WARNING", "Отслеживание прервано.")
+        raise typer.Exit(code=130)
+
+    failed = [campaign for campaign in campaigns if campaign.error]
+    for campaign in failed:
+        table_print("ERROR", f"Campaign ID: {campaign.label} | {campaign.error}")
+    pending = [campaign for campaign in campaigns if not campaign.finished and not campaign.error]
+    if not completed:
+        table_print("WARNING", "Время ожидания истекло. Не завершены: "
+                    + ", ".join(campaign.label for campaign in pending))
+    if failed or pending:
+        raise typer.Exit(code=1)
+    table_print("SUCCESS", f"Все кампании завершены: {len(campaigns)}")
@@ -0,0 +1,32 @@
+"""
+Точка входа консольной команды.
+
+`gmu --version` отвечает без импорта Typer и Rich. Остальные вызовы
+передаются запущенному демону `gmu serve`, а если его нет - Typer-приложению
+из gmu.main, команды которого загружаются лениво.
+"""
+
+import sys
+
+from gmu.version import VERSION_TEXT
+
+
+def run():
+    if sys.argv[1:] in (["--version"], ["-V"]):
+        print(VERSION_TEXT)
+        return
+
+    from gmu.utils.daemon import forward
+    try:
+        code = forward(sys.argv[1:])
+    except KeyboardInterrupt:
+        sys.exit(130)
+    if code is not None:
+        sys.exit(code)
+
+    from gmu.main import app
+    app()
+
+
+if __name__ == "__main__":
+    run()
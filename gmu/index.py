@@ -0,0 +1,101 @@
+import json
+import time
+from typing import Optional
+
+import typer
+
+from gmu.utils.helpers import table_print
+from gmu.utils.project_index import (SORT_ORDERS, Query, build_index, connect, find_index_root,
+                                     index_path, period_bounds, query_projects)
+
+app = typer.Typer(help="Индекс проектов писем")
+ls_app = typer.Typer()
+
+PERIODS = ("today", "week", "month")
+
+
+@app.command(name="build")
+def build(
+    root: str = typer.Argument(".", help="Папка с проектами писем"),
+    full: bool = typer.Option(False, "--full", help="Перечитать все gmu.json, а не только измененные"),
+):
+    """
+    Строит или обновляет индекс gmu.json в папке и ее подпапках.
+    Повторный запуск перечитывает только проекты, у которых изменились gmu.json, HTML или папка images.
+    """
+    started = time.perf_counter()
+    stats = build_index(root, full=full)
+    table_print(
+        "SUCCESS",
+        f"Проектов: {stats.scanned} | Обновлено: {stats.updated} | Удалено: {stats.removed} | "
+        f"{time.perf_counter() - started:.2f} с",
+    )
+    table_print("INFO", f"Индекс: {index_path(root)}")
+
+
+def _format_size(size) -> str:
+    return f"{size / 1024:.1f} КБ" if size else "-"
+
+
+def _print_row(row):
+    campaign = "-"
+    if row["campaign_id"]:
+        campaign = f"{row['campaign_id']} {row['campaign_status'] or ''} {row['campaign_start_time'] or ''}".strip()
+    stale = " | HTML изменен после загрузки" if row["stale"] else ""
+    table_print(
+        "WARNING" if row["stale"] else "INFO",
+        f"{row['path']} | письмо: {row['message_id'] or '-'} | кампания: {campaign} | "
+        f"WebLetter: {row['webletter_id'] or '-'} | {_format_size(row['zip_size'])}{stale}",
+    )
+
+
+@ls_app.command(name="ls")
+def ls(
+    message_id: Optional[int] = typer.Option(None, "--message-id", "-m", help="Проект с этим message_id"),
+    campaign_id: Optional[int] = typer.Option(None, "--campaign-id", "-c", help="Проект с этим campaign_id"),
+    webletter_id: Optional[str] = typer.Option(None, "--webletter-id", "-w", help="Проект с этим webletter_id"),
+    status: Optional[str] = typer.Option(None, help="Статус кампании, например scheduled"),
+    scheduled: Optional[str] = typer.Option(
+        None, help="Кампании со временем старта в периоде: today, week или month"),
+    stale: bool = typer.Option(False, "--stale", help="Письма, HTML или картинки которых изменились после загрузки"),
+    not_uploaded: bool = typer.Option(False, "--not-uploaded", help="Письма без message_id"),
+    sort: str = typer.Option(
+        "path", help="Сортировка: path, size (по убыванию zip_size), start (время старта), version"),
+    limit: Optional[int] = typer.Option(None, help="Показать не больше N проектов"),
+    as_json: bool = typer.Option(False, "--json", help="Вывести gmu.json найденных проектов в JSON"),
+    root: Optional[str] = typer.Option(
+        None, help="Папка индекса (по умолчанию ближайшая к текущей, для которой выполнен gmu index build)"),
+):
+    """Поиск по индексу проектов писем (см. gmu index build)."""
+    if sort not in SORT_ORDERS:
+        table_print("ERROR", f"Неизвестная сортировка: {sort}. Доступны: {', '.join(SORT_ORDERS)}")
+        raise typer.Exit(code=1)
+    if scheduled is not None and scheduled not in PERIODS:
+        table_print("ERROR", f"Неизвестный период: {scheduled}. Доступны: {', '.join(PERIODS)}")
+        raise typer.Exit(code=1)
+
+    root = root or find_index_root()
+    if root is None or not index_path(root).exists():
+        table_print("ERROR", "Индекс не найден. Выполните gmu index build в папке с проектами.")
+        raise typer.Exit(code=1)
+
+    query = Query(message_id=message_id, campaign_id=campaign_id, webletter_id=webletter_id, status=status,
+                  stale=stale, not_uploaded=not_uploaded, sort=sort, limit=limit)
+    if scheduled:
+        query.start_from, query.start_to = period_bounds(scheduled)
+
+    connection = connect(root)
+    try:
+        rows = query_projects(connection, query)
+    finally:
+        connection.close()
+
+    if as_json:
+        print(json.dumps([{"path": row["path"], **json.loads(row["data"])} for row in rows],
+                         ensure_ascii=False, indent=2))
+        return
+    if not rows:
+        table_print("INFO", "Проекты не найдены.")
+        return
+    for row in rows:
+        _print_row(row)
@@ -0,0 +1,12 @@
+import typer
+
+from .create_list import app as create_list_app
+from .export_contacts import app as export_contacts_app
+from .import_contacts import app as import_contacts_app
+
+app = typer.Typer()
+
+
+app.add_typer(create_list_app)
+app.add_typer(import_contacts_app)
+app.add_typer(export_contacts_app)
@@ -1,17 +1,20 @@
 import typer
 
-from gmu.utils.archive import archive_email
-from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.helpers import table_print
-from gmu.utils.HTMLProcessor import HTMLProcessor
 from gmu.utils.logger import gmu_logger
 from gmu.utils.Unisender import UnisenderClient
 
 app = typer.Typer()
-uClient = UnisenderClient()
 
 
 @app.command(name="create")
 def create_list(
-        title: str = typer.Option(None, help="Title for list")):
-    ...
+        title: str = typer.Option(..., help="Title for list")):
+    """
+    Создает список контактов в Unisender.
+    """
+    uClient = UnisenderClient()
+    result = uClient.create_list(title)
+    list_id = result.get("id")
+    gmu_logger.info(f"List created: {list_id} ({title})")
+    table_print("SUCCESS", f"Список создан. List ID: {list_id} | {title}")
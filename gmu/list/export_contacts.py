@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+import typer
+
+from gmu.utils.contact_export import (CHUNK_SIZE, DEFAULT_RETRIES, DEFAULT_TIMEOUT, ContactExport,
+                                      ContactExportError, ExportReport)
+from gmu.utils.helpers import table_print
+
+app = typer.Typer()
+
+STATUS_NAMES = {"new": "в очереди", "processing": "формируется"}
+
+
+def _format_size(size: float) -> str:
+    return f"{size / 1024:.1f} КБ" if size < 1024 * 1024 else f"{size / 1024 / 1024:.1f} МБ"
+
+
+def _print_progress(report: ExportReport):
+    table_print("INFO", f"Скачано: {_format_size(report.bytes_received)} | Строк: {report.lines} | "
+                        f"{_format_size(report.bytes_per_second)}/с")
+
+
+@app.command(name="export")
+def export_contacts(
+    output: str = typer.Argument(..., help="Файл для выгрузки (CSV; с --gzip или расширением .gz - сжатый)"),
+    list_id: Optional[int] = typer.Option(None, help="ID списка (по умолчанию все контакты)"),
+    field: Optional[List[str]] = typer.Option(
+        None, "--field", "-f", help="Поле для выгрузки, можно указать несколько раз (по умолчанию набор Unisender)"),
+    tag: Optional[str] = typer.Option(None, help="Только контакты с этой меткой"),
+    email_status: Optional[str] = typer.Option(None, help="Только контакты с этим статусом email, например active"),
+    gzip: bool = typer.Option(False, "--gzip", help="Сжать файл gzip (к имени добавится .gz)"),
+    task_uuid: Optional[str] = typer.Option(
+        None, help="Не запускать новую выгрузку, а дождаться и скачать задачу с этим task_uuid"),
+    timeout: float = typer.Option(DEFAULT_TIMEOUT, help="Сколько секунд ждать готовности файла"),
+    retries: int = typer.Option(DEFAULT_RETRIES, help="Повторов при ошибке опроса или обрыве скачивания"),
+    chunk_size: int = typer.Option(CHUNK_SIZE, help="Размер блока при скачивании, байт"),
+):
+    """
+    Выгружает контакты из Unisender в файл.
+    Запускает задачу exportContacts, ждет ее с нарастающим интервалом опроса и
+    скачивает файл потоково, блоками, поэтому память не зависит от размера списка.
+    """
+    if gzip and not output.endswith(".gz"):
+        output += ".gz"
+    job = ContactExport(output, list_id=list_id, field_names=field, tag=tag, email_status=email_status,
+                        compress=output.endswith(".gz"), timeout=timeout, retries=retries, chunk_size=chunk_size)
+    try:
+        if task_uuid is None:
+            task_uuid = job.start()
+            table_print("INFO", f"Выгрузка запущена. task_uuid: {task_uuid}")
+        report = job.run(
+            task_uuid,
+            on_status=lambda status: table_print("INFO", f"Задача {STATUS_NAMES.get(status, status)}..."),
+            on_progress=_print_progress,
+        )
+    except ContactExportError as exc:
+        table_print("ERROR", str(exc))
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        resume = f" Скачать файл позже: gmu list export {output} --task-uuid {task_uuid}" if task_uuid else ""
+        table_print("WARNING", f"Выгрузка прервана.{resume}")
+        raise typer.Exit(code=130)
+    except Exception as exc:
+        table_print("ERROR", f"Выгрузка не удалась: {exc}")
+        raise typer.Exit(code=1)
+
+    table_print("SUCCESS", f"Контактов: {report.rows} | {report.output} | {_format_size(report.bytes_written)} | "
+                           f"{report.elapsed:.1f} с")
@@ -0,0 +1,80 @@
+from typing import Optional
+
+import typer
+
+from gmu.utils.contact_import import (DEFAULT_BATCH_SIZE, DEFAULT_RETRIES, ContactImport, ContactImportError,
+                                      ImportReport)
+from gmu.utils.helpers import table_print
+from gmu.utils.Unisender import IMPORT_CONTACTS_MAX_ROWS
+
+app = typer.Typer()
+
+
+def _print_progress(report: ImportReport):
+    table_print("INFO", f"Отправлено строк: {report.rows_sent} | {report.rows_per_second:.0f} строк/с")
+
+
+@app.command(name="import")
+def import_contacts(
+    csv_file: str = typer.Argument(..., help="CSV с контактами; первая строка - названия полей Unisender (email, Name, ...)"),
+    list_id: Optional[int] = typer.Option(
+        None, help="ID списка, если в файле нет колонки email_list_ids"),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, help=f"Контактов в одном вызове importContacts (не больше {IMPORT_CONTACTS_MAX_ROWS})"),
+    concurrency: Optional[int] = typer.Option(
+        None, help="Одновременных запросов (по умолчанию GMU_UNISENDER_CONCURRENCY или 5)"),
+    retries: int = typer.Option(DEFAULT_RETRIES, help="Повторов для пакета, завершившегося ошибкой"),
+    overwrite_tags: bool = typer.Option(False, "--overwrite-tags", help="Заменить метки контактов, а не дополнить"),
+    overwrite_lists: bool = typer.Option(
+        False, "--overwrite-lists", help="Заменить списки контактов, а не дополнить"),
+    delimiter: Optional[str] = typer.Option(None, help="Разделитель CSV (по умолчанию определяется по файлу)"),
+    gzip: bool = typer.Option(False, "--gzip", help="Сжимать запросы gzip"),
+    restart: bool = typer.Option(False, "--restart", help="Начать импорт заново, не продолжая прерванный"),
+):
+    """
+    Импортирует контакты из CSV в Unisender пакетами, параллельно.
+    Файл читается потоково. Прогресс сохраняется после каждого пакета, поэтому
+    прерванный импорт продолжается с незавершенных пакетов при повторном запуске.
+    """
+    try:
+        job = ContactImport(csv_file, list_id=list_id, batch_size=batch_size, concurrency=concurrency,
+                            retries=retries, overwrite_tags=overwrite_tags, overwrite_lists=overwrite_lists,
+                            delimiter=delimiter, gzip=gzip)
+    except (OSError, UnicodeDecodeError, ContactImportError) as exc:
+        table_print("ERROR", f"Не удалось прочитать {csv_file}: {exc}")
+        raise typer.Exit(code=1)
+
+    if restart:
+        job.checkpoint.delete()
+    else:
+        reason = job.checkpoint.load()
+        if reason:
+            table_print("WARNING", f"Сохраненный прогресс не подходит ({reason}), импорт начнется заново.")
+        elif job.checkpoint.done:
+            table_print("INFO", f"Продолжение импорта: уже загружено строк {job.checkpoint.rows_done}.")
+
+    table_print("INFO", f"Поля: {', '.join(job.field_names)} | Пакет: {job.batch_size} строк")
+    try:
+        report = job.run(_print_progress)
+    except KeyboardInterrupt:
+        table_print("WARNING", "Импорт прерван. Запустите команду снова, чтобы продолжить.")
+        raise typer.Exit(code=130)
+
+    counters = job.checkpoint.counters
+    for line, message in sorted(report.invalid_rows):
+        table_print("WARNING", f"Строка {line}: {message}")
+    if report.invalid_rows and counters["invalid"] > len(report.invalid_rows):
+        table_print("WARNING", f"Показаны первые {len(report.invalid_rows)} ошибочных строк из {counters['invalid']}.")
+    for index, line, error in sorted(report.failed_batches):
+        table_print("ERROR", f"Пакет {index + 1} (со строки {line}): {error}")
+
+    table_print("INFO", f"Отправлено строк: {report.rows_sent} | Пропущено (загружены ранее): {report.rows_skipped} | "
+                        f"{report.elapsed:.1f} с | {report.rows_per_second:.0f} строк/с")
+    table_print(
+        "ERROR" if report.failed_batches else "SUCCESS",
+        f"Добавлено: {counters['inserted']} | Обновлено: {counters['updated']} | "
+        f"Ошибочных строк: {counters['invalid']} | Пакетов с ошибкой: {len(report.failed_batches)}",
+    )
+    if report.failed_batches:
+        table_print("INFO", "Запустите команду снова, чтобы повторить незагруженные пакеты.")
+        raise typer.Exit(code=1)
@@ -2,17 +2,14 @@
 import os
 import pathlib
 import platform
+import sys
 from typing import Optional
 
 import typer
 from dotenv import load_dotenv
 
-from gmu.archive import app as archive_app
-from gmu.campaign import app as campaign_app
-from gmu.message import app as message_app
-from gmu.settings import app as settings_app
-from gmu.version import VERSION_TEXT, app as version_app
-from gmu.webletter import app as webletter_app
+from gmu.version import VERSION_TEXT
+from gmu.utils.lazy_group import LazyCommand, LazyTyperGroup
 
 BASE_DIR = pathlib.Path(__file__).parent
 env_path = BASE_DIR / ".env"
@@ -35,7 +32,42 @@ if env_path.exists():
     load_dotenv(dotenv_path=env_path)
 
 
-app = typer.Typer()
+class GmuGroup(LazyTyperGroup):
+    # Модуль команды импортируется только при ее вызове.
+    lazy_commands = {
+        "version": LazyCommand("gmu.version:app", "version", help="Версия CLI"),
+        "v": LazyCommand("gmu.version:app", "v", hidden=True),
+        "archive": LazyCommand("gmu.archive:app", "archive", help="Создать ZIP-архив"),
+        "a": LazyCommand("gmu.archive:app", "a", hidden=True),
+        "publish": LazyCommand(
+            "gmu.publish:app", "publish", help="Опубликовать письмо в Unisender и WebLetter"),
+        "p": LazyCommand("gmu.publish:app", "p", hidden=True),
+        "campaign": LazyCommand("gmu.campaign:app", help="Команды Unisender для кампаний"),
+        "c": LazyCommand("gmu.campaign:app", hidden=True),
+        "list": LazyCommand("gmu.list:app", help="Команды Unisender для списков контактов"),
+        "message": LazyCommand("gmu.message:app", help="Команды Unisender для писем"),
+        "m": LazyCommand("gmu.message:app", hidden=True),
+        "index": LazyCommand("gmu.index:app", help="Индекс проектов писем"),
+        "ls": LazyCommand("gmu.index:ls_app", "ls", help="Поиск проектов писем по индексу"),
+        "serve": LazyCommand("gmu.serve:app", "serve", help="Запустить демон gmu"),
+        "size": LazyCommand("gmu.size:app", "size", help="Размер итогового письма"),
+        "settings": LazyCommand("gmu.settings:app", help="Настройки проекта"),
+        "cfg": LazyCommand("gmu.settings:app", hidden=True),
+        "sync": LazyCommand("gmu.sync:app", help="Очередь git-синхронизации"),
+        "webletter": LazyCommand("gmu.webletter:app", hidden=True),
+        "wl": LazyCommand("gmu.webletter:app", help="Команды WebLetter"),
+    }
+
+
+app = typer.Typer(cls=GmuGroup)
+
+
+def _flush_project_state():
+    # gmu.json копит изменения в памяти и записывается один раз в конце команды.
+    # Если команда не открывала gmu.json, модуль не импортирован и писать нечего.
+    config_module = sys.modules.get("gmu.utils.GmuConfig")
+    if config_module is not None:
+        config_module.flush_project_states(reset=True)
 
 
 def _version_callback(value: bool):
@@ -46,6 +78,7 @@ def _version_callback(value: bool):
 
 @app.callback()
 def main(
+    ctx: typer.Context,
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -53,22 +86,17 @@ def main(
         callback=_version_callback,
         is_eager=True,
         help="Показать версию CLI",
-    )
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Не использовать кеш ответов Unisender",
+    ),
 ):
-    pass
+    if no_cache:
+        os.environ["GMU_NO_CACHE"] = "1"
+    ctx.call_on_close(_flush_project_state)
 
 
-app.add_typer(version_app)
-app.add_typer(archive_app)
-app.add_typer(campaign_app, name="campaign")
-app.add_typer(campaign_app, name="c", hidden=True)
-app.add_typer(message_app, name="message")
-app.add_typer(message_app, name="m", hidden=True)
-app.add_typer(settings_app, name="settings")
-app.add_typer(settings_app, name="cfg", hidden=True)
-app.add_typer(webletter_app, name="webletter", hidden=True)
-app.add_typer(webletter_app, name="wl")
-
-
 if __name__ == "__main__":
     app()
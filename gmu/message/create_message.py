@@ -1,15 +1,14 @@
-import os
-
 import typer
 
-from gmu.utils.archive import archive_email
+from gmu.utils.fingerprint import letter_fingerprint
 from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.git_sync import run_git_auto_sync
 from gmu.utils.helpers import table_print
 from gmu.utils.HTMLprocessor import HTMLProcessor
 from gmu.utils.logger import gmu_logger
+from gmu.utils.message_pipeline import upload_message
+from gmu.utils.metadata_update import source_fingerprint
 from gmu.utils.Unisender import UnisenderClient
-from gmu.utils.unisender_urls import build_unisender_message_url
 
 app = typer.Typer()
 
@@ -47,24 +46,13 @@ def create_message(
         raise ValueError(
             f'Missing required fields: {", ".join(missing_fields)}')
 
-    arhchive_path = archive_email(html_filename,
-                                  process_result.get('inlined_html'),
-                                  process_result.get('attachments'))
-    process_result['data']['zip_size'] = os.path.getsize(arhchive_path)
+    process_result['data']['upload_fingerprint'] = letter_fingerprint(
+        process_result, int(list_id))
+    process_result['data']['source_fingerprint'] = source_fingerprint(
+        htmlProcessor.original_html, images_folder)
     uClient = UnisenderClient()
-    api_result = uClient.create_email_message(
-        sender_name=process_result.get('data', {}).get('sender_name'),
-        sender_email=process_result.get('data', {}).get('sender_email'),
-        subject=process_result.get('data', {}).get('subject'),
-        body=process_result.get('inlined_html', ''),
-        list_id=int(list_id),
-        attachments=process_result.get('attachments'),
-        lang=process_result.get('data', {}).get('language')
-    )
-
-    message_id = api_result.get('message_id', '')
-    process_result["data"]["message_id"] = message_id
-    process_result["data"]["message_url"] = build_unisender_message_url(message_id)
+    message_id = upload_message(
+        uClient, process_result, int(list_id), html_filename)
 
     if gmu_cfg.exists():
         gmu_cfg.update(process_result.get('data', {}))
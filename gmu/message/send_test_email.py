@@ -2,6 +2,7 @@ from typing import Optional
 
 import typer
 
+from gmu.utils.bulk_test_send import DEFAULT_CHUNK_SIZE, DEFAULT_RETRIES, read_addresses, send_test_bulk
 from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.helpers import table_print
 from gmu.utils.Unisender import UnisenderClient
@@ -13,11 +14,21 @@ app = typer.Typer()
 @app.command(name="test")
 def send_test_message(id: Optional[int] = typer.Option(None, help="Unisender Letter ID"),
                       email: str = typer.Option(
-                          None, help="Email адрес для отправки тестового письма (можно указать несколько адресов через запятую)")
+                          None, help="Email адрес для отправки тестового письма (можно указать несколько адресов через запятую)"),
+                      file: Optional[str] = typer.Option(
+                          None, "--file", "-f", help="Файл с адресами (по одному в строке) для массовой отправки"),
+                      chunk_size: int = typer.Option(
+                          DEFAULT_CHUNK_SIZE, help="Адресов в одном вызове sendTestEmail"),
+                      concurrency: Optional[int] = typer.Option(
+                          None, help="Одновременных запросов (по умолчанию GMU_UNISENDER_CONCURRENCY или 5)"),
+                      retries: int = typer.Option(
+                          DEFAULT_RETRIES, help="Повторов для вызова, завершившегося ошибкой")
                       ):
     """
     Метод для отправки тестового email-сообщения. Отправить можно только уже созданное письмо (например, с помощью метода
     createEmailMessage). Отправлять можно на несколько адресов, перечисленных через запятую.
+    С --file адреса читаются из файла и отправляются пачками по --chunk-size параллельно,
+    неудачные пачки повторяются, в конце выводится результат по каждому адресу.
     """
     if id is None:
         gmu_cfg = GmuConfig()
@@ -27,6 +38,8 @@ def send_test_message(id: Optional[int] = typer.Option(None, help="Unisender Let
             table_print(
                 "ERROR", "Не задан ID письма. Укажите его через параметр --message_id или в gmu.json.")
             return
+    if file is not None:
+        return _send_bulk(id, file, email, chunk_size, concurrency, retries)
     if email is None:
         table_print("ERROR",
                     "Не задан email адрес для отправки тестового письма. Укажите его через параметр --email.")
@@ -46,3 +59,33 @@ def send_test_message(id: Optional[int] = typer.Option(None, help="Unisender Let
                 table_print("WARNING", f"{email} - Unknown status")
     else:
         table_print("ERROR", "Failed to send message")
+
+
+def _send_bulk(message_id: int, file: str, email: Optional[str], chunk_size: int,
+               concurrency: Optional[int], retries: int):
+    try:
+        addresses = read_addresses(file)
+    except OSError as exc:
+        table_print("ERROR", f"Не удалось прочитать файл с адресами: {exc}")
+        raise typer.Exit(code=1)
+    if email:
+        addresses = list(dict.fromkeys(addresses + [item.strip() for item in email.split(",") if item.strip()]))
+    if not addresses:
+        table_print("ERROR", f"В файле {file} нет адресов.")
+        raise typer.Exit(code=1)
+
+    table_print("INFO", f"Отправка письма {message_id} на {len(addresses)} адресов, по {chunk_size} за вызов.")
+    results = send_test_bulk(message_id, addresses, chunk_size, concurrency, retries)
+
+    width = max(len(item.email) for item in results)
+    for item in results:
+        table_print(
+            "SUCCESS" if item.ok else "ERROR",
+            f"{item.email:<{width}} | попыток: {item.attempts} | {item.message}",
+        )
+
+    failed = sum(1 for item in results if not item.ok)
+    if failed:
+        table_print("ERROR", f"Отправлено: {len(results) - failed} | Ошибок: {failed}")
+        raise typer.Exit(code=1)
+    table_print("SUCCESS", f"Отправлено: {len(results)}")
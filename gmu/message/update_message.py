@@ -1,16 +1,16 @@
 
-import os
 from typing import Optional
 
 import typer
 
-from gmu.utils.archive import archive_email
+from gmu.utils.fingerprint import letter_fingerprint
 from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.git_sync import run_git_auto_sync
 from gmu.utils.helpers import table_print
 from gmu.utils.HTMLprocessor import HTMLProcessor
+from gmu.utils.message_pipeline import upload_message
+from gmu.utils.metadata_update import source_fingerprint, update_metadata
 from gmu.utils.Unisender import UnisenderClient
-from gmu.utils.unisender_urls import build_unisender_message_url
 
 app = typer.Typer()
 
@@ -22,13 +22,17 @@ def update_message(
         None, help="Имя HTML файла (по умолчанию первый .html в папке)"),
     list_id: str = typer.Option(20547119, help="ID списка рассылки"),
     images_folder: Optional[str] = typer.Option(
-        "images", help="Папка с картинками")
+        "images", help="Папка с картинками"),
+    full: bool = typer.Option(
+        False, "--full", help="Всегда пересобирать и пересоздавать письмо")
 ):
     """
     Обновляет E-mail письмо по ID в Unisender. Если параметры не заданы, берёт их из gmu.json.
     Также архивирует html и images.
     ВАЖНО: Unisender не поддерживает обновление письма, если картинки были подключены через URL.
-    Поэтому данная функция сначала удаляет письмо, а затем создаёт новое с теми же параметрами, но с новым ID!
+    Поэтому данная функция создаёт новое письмо с теми же параметрами, но с новым ID, и затем удаляет старое!
+    Если с прошлой загрузки изменились только тема, отправитель или список, письмо не пересобирается:
+    в Unisender обновляются метаданные с сохраненным телом письма (--full отключает это).
     """
     uClient = UnisenderClient()
     gmu_cfg = GmuConfig()
@@ -43,30 +47,38 @@ def update_message(
             "ERROR", "Файл gmu.json не найден или не содержит message_id.")
         return
 
-    # Удаляем старое письмо
-    uClient.delete_message(gmu_cfg.data["message_id"])
-
+    if not full:
+        data = update_metadata(uClient, gmu_cfg.data, int(list_id), html_filename, images_folder)
+        if data == {}:
+            table_print(
+                "INFO", f"Письмо не изменилось с последней загрузки. Message ID: {gmu_cfg.data['message_id']}")
+            return
+        if data is not None:
+            gmu_cfg.update(data)
+            table_print(
+                "SUCCESS",
+                f"Метаданные письма обновлены в Unisender. Message ID: {gmu_cfg.data['message_id']} "
+                f"| URL: {gmu_cfg.data.get('message_url')}",
+            )
+            run_git_auto_sync("обновления письма в Unisender")
+            return
+
     htmlProcessor = HTMLProcessor(
         html_filename, images_folder, True, True)
     process_result = htmlProcessor.process()
 
-    arhchive_path = archive_email(html_filename,
-                                  process_result.get('inlined_html'),
-                                  process_result.get('attachments'))
-    process_result['data']['zip_size'] = os.path.getsize(arhchive_path)
-    api_result = uClient.create_email_message(
-        sender_name=process_result.get('data', {}).get('sender_name'),
-        sender_email=process_result.get('data', {}).get('sender_email'),
-        subject=process_result.get('data', {}).get('subject'),
-        body=process_result.get('inlined_html', ''),
-        list_id=int(list_id),
-        attachments=process_result.get('attachments'),
-        lang=process_result.get('data', {}).get('language')
+    process_result['data']['upload_fingerprint'] = letter_fingerprint(
+        process_result, int(list_id))
+    process_result['data']['source_fingerprint'] = source_fingerprint(
+        htmlProcessor.original_html, images_folder)
+    # Старое письмо удаляется только после успешного создания нового
+    message_id = upload_message(
+        uClient,
+        process_result,
+        int(list_id),
+        html_filename,
+        old_message_id=gmu_cfg.data["message_id"],
     )
-
-    message_id = api_result.get('message_id', '')
-    process_result["data"]["message_id"] = message_id
-    process_result["data"]["message_url"] = build_unisender_message_url(message_id)
 
     gmu_cfg.update(process_result.get('data', {}))
     table_print(
@@ -1,14 +1,12 @@
-import os
-
 import typer
 
-from gmu.utils.archive import archive_email
 from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.git_sync import run_git_auto_sync
 from gmu.utils.helpers import table_print
 from gmu.utils.HTMLprocessor import HTMLProcessor
+from gmu.utils.message_pipeline import sync_message
+from gmu.utils.metadata_update import source_fingerprint
 from gmu.utils.Unisender import UnisenderClient
-from gmu.utils.unisender_urls import build_unisender_message_url
 
 app = typer.Typer()
 
@@ -20,69 +18,56 @@ def create_or_update_message(
     html_filename: str = typer.Option(
         None, help="Имя HTML файла (по умолчанию первый .html в папке)"),
     images_folder: str = typer.Option("images", help="Папка с картинками"),
-    force: bool = typer.Option(False, help="Skip delete stage")
+    force: bool = typer.Option(False, help="Skip delete stage"),
+    reupload: bool = typer.Option(
+        False, help="Загрузить письмо заново, даже если оно не изменилось")
 ):
     """
     Создает E-mail письмо в Unisender. В буфер обмена помещает ID созданного письма.
     Если файл конфигурации существует, предлагает обновить или пересоздать.
+    Если письмо не изменилось с последней загрузки, запросы к Unisender не выполняются.
+    Если изменились только тема, отправитель или список, письмо обновляется без пересоздания.
     """
     uClient = UnisenderClient()
 
     htmlProcessor = HTMLProcessor(
         html_filename, images_folder, True, True)
     process_result = htmlProcessor.process()
+    process_result['data']['source_fingerprint'] = source_fingerprint(
+        htmlProcessor.original_html, images_folder)
 
-    arhchive_path = archive_email(html_filename,
-                                  process_result.get('inlined_html'),
-                                  process_result.get('attachments'))
-    process_result['data']['zip_size'] = os.path.getsize(arhchive_path)
     gmu_cfg = GmuConfig()
+    previous = gmu_cfg.data if gmu_cfg.exists() else None
 
-    # Если gmu.json существует, то обновляем
-    if gmu_cfg.exists() and gmu_cfg.data.get("message_id", None) is not None:
-
-        if force == False:
-            # 1. Удаляем существующее письмо
-            uClient.delete_message(gmu_cfg.data.get("message_id", None))
-
-        # 2. Создаем новое письмо
-        api_result = uClient.create_email_message(
-            sender_name=process_result.get('data', {}).get('sender_name'),
-            sender_email=process_result.get('data', {}).get('sender_email'),
-            subject=process_result.get('data', {}).get('subject'),
-            body=process_result.get('inlined_html', ''),
-            list_id=int(list_id),
-            attachments=process_result.get('attachments'),
-            lang=process_result.get('data', {}).get('language')
-        )
-
-        message_id = api_result.get('message_id', '')
-        process_result["data"]["message_id"] = message_id
-        process_result["data"]["message_url"] = build_unisender_message_url(message_id)
+    action = sync_message(
+        uClient,
+        process_result,
+        int(list_id),
+        html_filename,
+        previous=previous,
+        force=force,
+        reupload=reupload,
+    )
+    message_id = process_result['data']['message_id']
+    message_url = process_result['data']['message_url']
 
-        gmu_cfg.update(process_result.get('data', {}))
-        table_print("SUCCESS",
-                    f"Письмо обновлено в Unisender. Message ID: {message_id} | URL: {process_result['data']['message_url']}")
-        run_git_auto_sync("обновления письма в Unisender")
-
-    # Если gmu.json не существует, то создаем
-    else:
-        api_result = uClient.create_email_message(
-            sender_name=process_result.get('data', {}).get('sender_name'),
-            sender_email=process_result.get('data', {}).get('sender_email'),
-            subject=process_result.get('data', {}).get('subject'),
-            body=process_result.get('inlined_html', ''),
-            list_id=int(list_id),
-            attachments=process_result.get('attachments'),
-            lang=process_result.get('data', {}).get('language')
-        )
-
-        message_id = api_result.get('message_id', '')
-        process_result["data"]["message_id"] = message_id
-        process_result["data"]["message_url"] = build_unisender_message_url(message_id)
+    if action == "unchanged":
+        table_print(
+            "INFO", f"Письмо не изменилось с последней загрузки. Message ID: {message_id}")
+        return
 
+    if action == "created":
         gmu_cfg.create(process_result.get('data', {}))
-
         table_print("SUCCESS",
-                    f"Письмо загружено в Unisender. Message ID: {message_id} | URL: {process_result['data']['message_url']}")
+                    f"Письмо загружено в Unisender. Message ID: {message_id} | URL: {message_url}")
         run_git_auto_sync("создания письма в Unisender")
+        return
+
+    gmu_cfg.update(process_result.get('data', {}))
+    if action == "metadata":
+        table_print("SUCCESS",
+                    f"Метаданные письма обновлены в Unisender. Message ID: {message_id} | URL: {message_url}")
+    else:
+        table_print("SUCCESS",
+                    f"Письмо обновлено в Unisender. Message ID: {message_id} | URL: {message_url}")
+    run_git_auto_sync("обновления письма в Unisender")
@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import typer
+
+from gmu.utils.archive import archive_bytes
+from gmu.utils.GmuConfig import GmuConfig
+from gmu.utils.git_sync import run_git_auto_sync
+from gmu.utils.helpers import table_print
+from gmu.utils.HTMLprocessor import HTMLProcessor
+from gmu.utils.logger import gmu_logger
+from gmu.utils.message_pipeline import sync_message
+from gmu.utils.metadata_update import source_fingerprint
+from gmu.utils.paths import find_html_file
+from gmu.utils.Unisender import UnisenderClient
+from gmu.utils.WebLetter import WebLetterClient
+
+app = typer.Typer()
+
+# Варианты HTML: (replace_src, rename_images), как в `gmu m upsert` и `gmu wl upsert`.
+PUBLISH_TARGETS = {
+    "unisender": (True, True),
+    "webletter": (False, False),
+}
+
+UNISENDER_ACTIONS = {
+    "unchanged": "письмо не изменилось",
+    "metadata": "метаданные обновлены",
+    "updated": "письмо обновлено",
+    "created": "письмо загружено",
+}
+
+
+def _publish_unisender(process_result: dict, list_id: int, html_filename, previous: dict,
+                       force: bool, reupload: bool) -> str:
+    action = sync_message(
+        UnisenderClient(),
+        process_result,
+        list_id,
+        html_filename,
+        previous=previous,
+        force=force,
+        reupload=reupload,
+    )
+    data = process_result['data']
+    return f"{UNISENDER_ACTIONS[action]}. Message ID: {data['message_id']} | URL: {data['message_url']}"
+
+
+def _publish_webletter(process_result: dict, html_filename, previous: dict) -> str:
+    wlClient = WebLetterClient()
+    zip_name = f"{Path(html_filename).stem}.zip"
+    zip_bytes = archive_bytes(process_result.get('inlined_html'),
+                              process_result.get('attachments'))
+
+    webletter_id = previous.get("webletter_id")
+    result_json = wlClient.upload(zip_name, zip_bytes, webletter_id)
+    if 'data' not in result_json:
+        raise RuntimeError(f"Ошибка при загрузке файла на WL: {result_json}")
+
+    webletter_id = result_json["data"].get("id", "")
+    process_result["data"]["webletter_id"] = webletter_id
+    process_result["data"]["webletter_url"] = wlClient.build_url(webletter_id)
+    return f"файл загружен на WL - {process_result['data']['webletter_url']}"
+
+
+@app.command(name="p", hidden=True)
+@app.command(name="publish")
+def publish(
+    list_id: str = typer.Option(20547119, help="ID списка рассылки"),
+    html_filename: str = typer.Option(
+        None, help="Имя HTML файла (по умолчанию первый .html в папке)"),
+    images_folder: str = typer.Option("images", help="Папка с картинками"),
+    force: bool = typer.Option(False, help="Skip delete stage"),
+    reupload: bool = typer.Option(
+        False, help="Загрузить письмо в Unisender заново, даже если оно не изменилось")
+):
+    """
+    Публикует письмо в Unisender и WebLetter за один проход.
+    Картинки обрабатываются один раз, оба варианта HTML собираются из общего результата,
+    загрузка в Unisender и WebLetter идет параллельно.
+    """
+    if html_filename is None:
+        try:
+            html_filename = find_html_file().name
+        except FileNotFoundError:
+            table_print("ERROR", "HTML файл не найден в текущей папке.")
+            raise typer.Exit(code=1)
+
+    htmlProcessor = HTMLProcessor(html_filename, images_folder)
+    results = htmlProcessor.process_targets(PUBLISH_TARGETS)
+    results["unisender"]["data"]["source_fingerprint"] = source_fingerprint(
+        htmlProcessor.original_html, images_folder)
+
+    gmu_cfg = GmuConfig()
+    previous = dict(gmu_cfg.data) if gmu_cfg.exists() else {}
+
+    with ThreadPoolExecutor(max_workers=len(PUBLISH_TARGETS)) as pool:
+        futures = {
+            "unisender": pool.submit(
+                _publish_unisender, results["unisender"], int(list_id), html_filename,
+                previous, force, reupload),
+            "webletter": pool.submit(
+                _publish_webletter, results["webletter"], html_filename, previous),
+        }
+
+    data = {}
+    failed = []
+    for target, future in futures.items():
+        try:
+            message = future.result()
+        except Exception as exc:
+            gmu_logger.error(f"Publish to {target} failed: {exc}")
+            table_print("ERROR", f"{target}: {exc}")
+            failed.append(target)
+            continue
+        table_print("SUCCESS", f"{target}: {message}")
+        data.update(results[target].get('data', {}))
+
+    if data:
+        if gmu_cfg.exists():
+            gmu_cfg.update(data)
+        else:
+            gmu_cfg.create(data)
+        run_git_auto_sync("публикации письма")
+
+    if failed:
+        raise typer.Exit(code=1)
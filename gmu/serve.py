@@ -0,0 +1,64 @@
+import signal
+import socket
+from pathlib import Path
+
+import typer
+
+from gmu.utils.daemon import DaemonServer, request
+from gmu.utils.helpers import table_print
+from gmu.utils.paths import daemon_socket_path
+
+app = typer.Typer()
+
+
+@app.command(name="serve")
+def serve(
+    socket_path: str = typer.Option(
+        None, "--socket", help="Путь к Unix-сокету (по умолчанию GMU_SOCKET или $XDG_RUNTIME_DIR/gmu.sock)"),
+    stop: bool = typer.Option(False, "--stop", help="Остановить запущенный демон"),
+    status: bool = typer.Option(False, "--status", help="Показать, запущен ли демон"),
+):
+    """
+    Запускает демон gmu на Unix-сокете. Пока он работает, команды gmu выполняются в нем:
+    импорты, процессы Juice и resvg, кеш картинок и соединение с Unisender не создаются заново.
+    """
+    path = Path(socket_path) if socket_path else daemon_socket_path()
+
+    if stop and status:
+        raise typer.BadParameter("Используйте только один параметр: --stop или --status.")
+
+    if status:
+        reply = request({"type": "ping"}, path)
+        if reply is None:
+            table_print("INFO", f"Демон gmu не запущен ({path}).")
+        else:
+            table_print("INFO", f"Демон gmu запущен. PID: {reply.get('pid')} | Сокет: {path}")
+        return
+
+    if stop:
+        if request({"type": "shutdown"}, path) is None:
+            table_print("WARNING", f"Демон gmu не запущен ({path}).")
+        else:
+            table_print("SUCCESS", "Демон gmu остановлен.")
+        return
+
+    if not hasattr(socket, "AF_UNIX"):
+        table_print("ERROR", "gmu serve требует поддержки Unix-сокетов.")
+        raise typer.Exit(code=1)
+    if request({"type": "ping"}, path) is not None:
+        table_print("ERROR", f"Демон gmu уже запущен: {path}")
+        raise typer.Exit(code=1)
+
+    server = DaemonServer(path)
+    server.warm_up()
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+
+    table_print("SUCCESS", f"Демон gmu запущен: {path}. Остановить: gmu serve --stop или Ctrl+C")
+    try:
+        server.serve_forever()
+    except RuntimeError as exc:
+        table_print("ERROR", str(exc))
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        pass
+    table_print("INFO", "Демон gmu остановлен.")
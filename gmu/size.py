@@ -0,0 +1,90 @@
+import contextlib
+import json
+import sys
+from typing import Optional
+
+import typer
+
+from gmu.utils.archive import archive_bytes
+from gmu.utils.helpers import table_print
+from gmu.utils.HTMLprocessor import HTMLProcessor
+from gmu.utils.size_report import build_size_report
+
+app = typer.Typer()
+
+PART_LABELS = {
+    "inline_styles": "inline style",
+    "style_blocks": "<style>",
+    "mso": "MSO-блоки",
+    "text": "текст",
+    "markup": "разметка",
+}
+
+
+def _kb(size: int) -> str:
+    return f"{size / 1024:.1f} КБ"
+
+
+def _share(size: int, total: int) -> str:
+    return f"{size * 100 / total:.1f}%" if total else "0.0%"
+
+
+def _print_report(report: dict):
+    html = report["html"]
+    table_print("INFO", f"HTML: {_kb(html['bytes'])} ({html['bytes']} байт)")
+    for part, label in PART_LABELS.items():
+        size = html["parts"][part]
+        table_print("INFO", f"  {label}: {_kb(size)} ({_share(size, html['bytes'])})")
+
+    if report["attachments"]:
+        table_print(
+            "INFO",
+            f"Вложения: {len(report['attachments'])} | {_kb(report['attachments_bytes'])}, "
+            f"в base64 {_kb(report['attachments_mime_bytes'])}",
+        )
+        for row in report["attachments"]:
+            table_print("INFO", f"  {row['name']}: {_kb(row['bytes'])}, в base64 {_kb(row['mime_bytes'])}")
+    else:
+        table_print("INFO", "Вложений нет.")
+
+    table_print("INFO", f"MIME-письмо (HTML и вложения в base64, без заголовков): {_kb(report['mime_bytes'])}")
+    if report["zip_bytes"] is not None:
+        table_print("INFO", f"ZIP-архив: {_kb(report['zip_bytes'])}")
+
+    threshold = report["clip_threshold"]
+    if report["clipping"] == "clipped":
+        table_print("ERROR", f"HTML больше порога обрезки Gmail ({_kb(threshold)}): письмо будет обрезано.")
+    elif report["clipping"] == "warning":
+        table_print("WARNING", f"HTML близок к порогу обрезки Gmail ({_kb(threshold)}).")
+    else:
+        table_print("SUCCESS", f"HTML меньше порога обрезки Gmail ({_kb(threshold)}).")
+
+
+@app.command(name="size")
+def size(
+    html_filename: str = typer.Option(
+        None, help="Имя HTML файла (по умолчанию первый .html в папке)"),
+    images_folder: str = typer.Option("images", help="Папка с картинками"),
+    threshold: Optional[int] = typer.Option(
+        None, help="Порог обрезки Gmail в байтах (по умолчанию GMU_CLIP_THRESHOLD или 104448)"),
+    as_json: bool = typer.Option(False, "--json", help="Вывести отчет в JSON"),
+    fail_on_clip: bool = typer.Option(
+        False, "--fail-on-clip", help="Завершиться с кодом 1, если HTML больше порога"),
+):
+    """Показать, из чего складывается размер итогового письма."""
+    # В режиме --json прогресс сборки уходит в stderr, чтобы stdout был чистым JSON.
+    output = contextlib.redirect_stdout(sys.stderr) if as_json else contextlib.nullcontext()
+    with output:
+        process_result = HTMLProcessor(html_filename, images_folder, True, True).process()
+        html = process_result.get('inlined_html')
+        attachments = process_result.get('attachments')
+        report = build_size_report(
+            html, attachments, zip_size=len(archive_bytes(html, attachments)), threshold=threshold)
+
+    if as_json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        _print_report(report)
+
+    if fail_on_clip and report["clipping"] == "clipped":
+        raise typer.Exit(code=1)
@@ -0,0 +1,61 @@
+import datetime
+
+import typer
+
+from gmu.utils.git_sync import SyncQueue, sync_delay
+from gmu.utils.helpers import table_print
+
+app = typer.Typer()
+
+
+def _current_queue() -> SyncQueue:
+    queue, output = SyncQueue.for_cwd()
+    if queue is None:
+        table_print("ERROR", f"Текущая папка не похожа на git-репозиторий. {output}")
+        raise typer.Exit(code=1)
+    return queue
+
+
+def _format_time(timestamp) -> str:
+    if not timestamp:
+        return "-"
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%d.%m.%Y %H:%M:%S")
+
+
+@app.command(name="status")
+def sync_status():
+    """Показать очередь git-синхронизации текущего репозитория."""
+    queue = _current_queue()
+    state = queue.read()
+    jobs = state["jobs"]
+
+    worker_pid = queue.running_worker(state)
+    if worker_pid:
+        table_print("INFO", f"Фоновый обработчик запущен. PID: {worker_pid} | Пауза: {sync_delay():g} с")
+    else:
+        table_print("INFO", "Фоновый обработчик не запущен.")
+
+    if not jobs:
+        table_print("INFO", "Очередь пуста.")
+    else:
+        table_print("INFO", f"В очереди: {len(jobs)}")
+        for job in jobs:
+            table_print("INFO", f"{_format_time(job.get('queued_at'))} | {job.get('action')} | {job.get('project')}")
+
+    last_sync = state.get("last_sync")
+    if last_sync:
+        table_print(
+            "SUCCESS" if last_sync.get("ok") else "ERROR",
+            f"Последняя синхронизация {_format_time(last_sync.get('time'))}: {last_sync.get('message')}",
+        )
+
+
+@app.command(name="flush")
+def sync_flush():
+    """Выполнить git-синхронизацию из очереди сейчас, не дожидаясь фонового обработчика."""
+    queue = _current_queue()
+    ok, message = queue.flush()
+    if not ok:
+        table_print("ERROR", f"Git-синхронизация не выполнена: {message}")
+        raise typer.Exit(code=1)
+    table_print("SUCCESS", f"Git-синхронизация: {message}")
@@ -0,0 +1,184 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Literal, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gmu.utils.Unisender import UnisenderClient
+
+DEFAULT_MAX_CONCURRENCY = 5
+
+
+def _default_max_concurrency() -> int:
+    value = os.environ.get("GMU_UNISENDER_CONCURRENCY")
+    if value and value.isdigit() and int(value) > 0:
+        return int(value)
+    return DEFAULT_MAX_CONCURRENCY
+
+
+class AsyncUnisenderClient:
+    """
+    Асинхронная обертка над UnisenderClient для массовых операций.
+
+    Все запросы идут через общий пул соединений, а семафор ограничивает число
+    одновременных запросов к API. Методы повторяют UnisenderClient.
+
+    Пример:
+        async with AsyncUnisenderClient(max_concurrency=5) as client:
+            statuses = await asyncio.gather(
+                *(client.get_campaign_status(cid) for cid in campaign_ids))
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, use_cache: Optional[bool] = None):
+        """
+        max_concurrency: максимум одновременных запросов к API.
+                         По умолчанию GMU_UNISENDER_CONCURRENCY или 5.
+        use_cache: кешировать ответы читающих методов (см. UnisenderClient).
+        """
+        self.max_concurrency = max_concurrency or _default_max_concurrency()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._client = UnisenderClient(session=self._session, use_cache=use_cache)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def __aenter__(self) -> "AsyncUnisenderClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Закрывает пул соединений."""
+        self._session.close()
+
+    async def _call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def u_request(
+        self,
+        method: str,
+        params: dict = None,
+        request_compression: str = None,
+        response_compression: str = None,
+    ):
+        return await self._call(
+            self._client.u_request, method, params,
+            request_compression, response_compression)
+
+    async def get_campaign_status(self, campaign_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_campaign_status, campaign_id)
+
+    async def get_campaign_common_stats(self, campaign_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_campaign_common_stats, campaign_id)
+
+    async def get_actual_message_version(self, message_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_actual_message_version, message_id)
+
+    async def get_web_version(self, campaign_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_web_version, campaign_id)
+
+    async def get_message(self, message_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_message, message_id)
+
+    async def update_email_message(
+        self,
+        id: int,
+        sender_name: str,
+        sender_email: str,
+        subject: str,
+        body: str,
+        list_id: Optional[int] = None
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(
+            self._client.update_email_message,
+            id, sender_name, sender_email, subject, body, list_id)
+
+    async def create_email_message(
+        self,
+        sender_name: str,
+        sender_email: str,
+        subject: str,
+        body: str,
+        list_id: int,
+        attachments: Optional[Dict[str, bytes]] = None,
+        generate_text: int = 1,
+        lang: str = 'ru',
+        wrap_type: str = 'skip'
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(
+            self._client.create_email_message,
+            sender_name=sender_name,
+            sender_email=sender_email,
+            subject=subject,
+            body=body,
+            list_id=list_id,
+            attachments=attachments,
+            generate_text=generate_text,
+            lang=lang,
+            wrap_type=wrap_type,
+        )
+
+    async def send_test_message(self, message_id: int, email: str) -> str:
+        return await self._call(self._client.send_test_message, message_id, email)
+
+    async def import_contacts(
+        self,
+        field_names: List[str],
+        rows: List[List[str]],
+        overwrite_tags: int = 0,
+        overwrite_lists: int = 0,
+        request_compression: Optional[str] = None,
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(
+            self._client.import_contacts, field_names, rows,
+            overwrite_tags, overwrite_lists, request_compression)
+
+    async def delete_message(self, message_id: int) -> Union[Literal['error'], bool]:
+        return await self._call(self._client.delete_message, message_id)
+
+    async def create_campaign(
+        self,
+        message_id: int,
+        start_time: Optional[str] = None,
+        timezone: Optional[str] = None,
+        track_read: int = 1,
+        track_links: int = 1,
+        track_ga: int = 1,
+        ga_medium: str = 'email',
+        ga_source: str = 'Unisender',
+        ga_campaign: str = 'gefera'
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(
+            self._client.create_campaign,
+            message_id=message_id,
+            start_time=start_time,
+            timezone=timezone,
+            track_read=track_read,
+            track_links=track_links,
+            track_ga=track_ga,
+            ga_medium=ga_medium,
+            ga_source=ga_source,
+            ga_campaign=ga_campaign,
+        )
+
+    async def create_list(self, title: str, before_subscribe_url: Optional[str] = None,
+                          after_subscribe_url: Optional[str] = None
+                          ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.create_list, title, before_subscribe_url, after_subscribe_url)
+
+    async def export_contacts(
+        self,
+        list_id: Optional[int] = None,
+        field_names: Optional[List[str]] = None,
+        tag: Optional[str] = None,
+        email_status: Optional[str] = None,
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.export_contacts, list_id, field_names, tag, email_status)
+
+    async def get_task_result(self, task_uuid: str) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        return await self._call(self._client.get_task_result, task_uuid)
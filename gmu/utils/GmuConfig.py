@@ -1,8 +1,15 @@
+import atexit
+import contextlib
 import copy
+import hashlib
 import json
 import os
+import stat
+import threading
 
+from gmu.utils.file_lock import file_lock
 from gmu.utils.helpers import table_print
+from gmu.utils.paths import user_cache_dir
 
 
 DEFAULT_GMU_CONFIG = {
@@ -18,11 +25,14 @@ DEFAULT_GMU_CONFIG = {
     "campaign_status": None,
     "campaign_creation_time": None,
     "campaign_start_time": None,
+    "campaign_stats": None,
     "web_version_url": None,
     "web_version_letter_id": None,
     "actual_version_id": None,
     "lang": None,
     "zip_size": None,
+    "upload_fingerprint": None,
+    "source_fingerprint": None,
     "created": None,
     "updated": None,
     "letter_version": 0,
@@ -52,6 +62,212 @@ def merge_with_defaults(data: dict | None) -> dict:
     return result
 
 
+# Разобранные gmu.json: абсолютный путь -> ((inode, mtime, размер), данные).
+# Файл перечитывается только после изменения, что особенно заметно в `gmu serve`.
+_parsed_configs = {}
+
+
+def _file_signature(stat_result) -> tuple:
+    # os.replace каждый раз создает новый inode, поэтому запись в тот же тик mtime не теряется.
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def _read_config(path: str, fresh: bool = False):
+    """
+    Данные gmu.json или None, если файла нет.
+    fresh: не доверять кешу (используется под блокировкой перед записью).
+    """
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = _file_signature(stat_result)
+    cached = _parsed_configs.get(path)
+    if not fresh and cached is not None and cached[0] == signature:
+        return copy.deepcopy(cached[1])
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    _parsed_configs[path] = (signature, copy.deepcopy(data))
+    return data
+
+
+def _fsync_directory(directory: str):
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_config(path: str, data: dict):
+    """
+    Атомарная запись: временный файл рядом, fsync и os.replace.
+    Читатели видят либо старый, либо новый файл целиком. Вызывается под блокировкой.
+    """
+    directory = os.path.dirname(path) or "."
+    tmp_path = os.path.join(
+        directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+    _parsed_configs[path] = (_file_signature(os.stat(path)), copy.deepcopy(data))
+
+
+def _lock_path(path: str):
+    # Файл блокировки лежит в кеше GMU, а не рядом с gmu.json, чтобы не попасть в git.
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+    return user_cache_dir() / "locks" / f"{os.path.basename(path)}.{digest}.lock"
+
+
+def _merge_changes(base, ours: dict, theirs) -> dict:
+    """
+    Переносит в theirs (текущий файл на диске) только те ключи, которые команда
+    изменила относительно base (файла, прочитанного в начале команды).
+    Так параллельные процессы, меняющие разные поля, не затирают друг друга.
+    """
+    base = base or {}
+    result = copy.deepcopy(theirs) if theirs is not None else {}
+    for key in set(base) | set(ours):
+        if key not in ours:
+            result.pop(key, None)
+            continue
+        if key in base and ours[key] == base[key]:
+            continue
+        if (isinstance(ours[key], dict) and isinstance(base.get(key), dict)
+                and isinstance(result.get(key), dict)):
+            result[key] = _merge_changes(base[key], ours[key], result[key])
+        else:
+            result[key] = copy.deepcopy(ours[key])
+    return result
+
+
+class ProjectState:
+    """
+    gmu.json в рамках одной команды: файл читается один раз, изменения копятся
+    в памяти и записываются одним атомарным сохранением в flush_project_states().
+    Запись идет под блокировкой; если файл за это время изменил другой процесс,
+    в него переносятся только поля, измененные этой командой.
+    """
+
+    _states = {}
+
+    def __init__(self, path: str):
+        self.path = path
+        self._base = None
+        self._data = None
+        self._loaded = False
+        self.dirty = False
+
+    @classmethod
+    def for_path(cls, path: str = "gmu.json") -> "ProjectState":
+        abspath = os.path.abspath(path)
+        state = cls._states.get(abspath)
+        if state is None:
+            state = cls._states[abspath] = cls(abspath)
+        return state
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._set_clean(_read_config(self.path))
+
+    def _set_clean(self, data):
+        self._base = copy.deepcopy(data)
+        self._data = copy.deepcopy(data)
+        self._loaded = True
+        self.dirty = False
+
+    def exists(self) -> bool:
+        self._ensure_loaded()
+        return self._data is not None
+
+    def snapshot(self) -> dict:
+        """Копия текущих данных, которую можно менять без влияния на состояние."""
+        self._ensure_loaded()
+        if self._data is None:
+            raise FileNotFoundError(f"Файл {self.path} не найден!")
+        return copy.deepcopy(self._data)
+
+    def replace(self, data: dict):
+        self._ensure_loaded()
+        self._data = copy.deepcopy(data)
+        self.dirty = True
+
+    def delete(self):
+        with file_lock(_lock_path(self.path)):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path)
+        self._set_clean(None)
+
+    def _flush_locked(self):
+        if not self.dirty or self._data is None:
+            self.dirty = False
+            return
+        on_disk = _read_config(self.path, fresh=True)
+        if on_disk == self._base:
+            data = self._data
+        else:
+            data = _merge_changes(self._base, self._data, on_disk)
+        _write_config(self.path, data)
+        self._set_clean(data)
+
+    def flush(self):
+        if self.dirty:
+            with file_lock(_lock_path(self.path)):
+                self._flush_locked()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Чтение-изменение-запись под блокировкой: несохраненные изменения команды
+        записываются, файл перечитывается с диска, а измененный в блоке with словарь
+        сохраняется сразу при выходе из него. При исключении файл не меняется.
+        """
+        with file_lock(_lock_path(self.path)):
+            self._flush_locked()
+            data = _read_config(self.path, fresh=True)
+            if data is None:
+                raise FileNotFoundError(f"Файл {self.path} не найден!")
+            yield data
+            _write_config(self.path, data)
+            self._set_clean(data)
+
+
+def flush_project_states(reset: bool = False):
+    """
+    Записывает все измененные gmu.json. Вызывается в конце команды (и перед git-синхронизацией).
+    reset: забыть загруженные данные, чтобы следующее обращение перечитало файл.
+    """
+    for state in list(ProjectState._states.values()):
+        state.flush()
+    if reset:
+        ProjectState._states.clear()
+
+
+atexit.register(flush_project_states)
+
+
 class GmuConfig:
     def __init__(self, path='gmu.json', data=None):
         """
@@ -62,15 +278,19 @@ class GmuConfig:
         self.path = path
         self._data = data.copy() if data != None else None
 
+    @property
+    def state(self) -> ProjectState:
+        # Путь разрешается при каждом обращении: в `gmu serve` текущая папка меняется между командами.
+        return ProjectState.for_path(self.path)
+
     def exists(self):
-        return os.path.exists(self.path)
+        return self.state.exists()
 
     def load(self) -> dict:
-        """Загрузить данные из файла в self._data (и вернуть их)."""
+        """Загрузить данные в self._data (и вернуть их). Файл читается один раз за команду."""
         if not self.exists():
             raise FileNotFoundError(f"Файл {self.path} не найден!")
-        with open(self.path, "r", encoding="utf-8") as f:
-            self._data = json.load(f)
+        self._data = self.state.snapshot()
         return self._data
 
     def migrate(self) -> dict:
@@ -81,13 +301,29 @@ class GmuConfig:
         return data
 
     def save(self, data=None):
-        """Сохранить данные (или свои внутренние, если data не передан) в файл."""
+        """
+        Сохранить данные (или свои внутренние, если data не передан).
+        На диск они попадают одной записью в конце команды (flush_project_states).
+        """
         if data is not None:
             self._data = data.copy()
         if self._data is None:
             raise ValueError("Нет данных для сохранения!")
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=4)
+        self.state.replace(self._data)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Чтение-изменение-запись gmu.json под блокировкой между процессами:
+
+            with GmuConfig().transaction() as data:
+                data["letter_version"] += 1
+
+        Файл перечитывается с диска, изменения записываются сразу при выходе из блока.
+        """
+        with self.state.transaction() as data:
+            yield data
+        self._data = self.state.snapshot()
 
     def create(self, data=None):
         """
@@ -148,7 +384,7 @@ class GmuConfig:
 
     def delete(self):
         if self.exists():
-            os.remove(self.path)
+            self.state.delete()
             table_print("SUCCESS", f"Файл {self.path} удален.")
             return True
         else:
@@ -1,6 +1,8 @@
 import datetime
 import os
 import re
+import threading
+from collections import OrderedDict
 from io import BytesIO
 from pathlib import Path
 
@@ -10,8 +12,11 @@ from PIL import Image
 from rich.console import Console
 from rich.progress import track
 
+from gmu.utils.css_pruner import is_pruning_enabled, prune_unused_css
 from gmu.utils.custom_css_inliner import inline_css_custom
+from gmu.utils.html_minifier import is_minify_enabled, minify_html
 from gmu.utils.logger import gmu_logger
+from gmu.utils.paths import find_html_file
 from gmu.utils.svg_converter import svg_to_png
 
 
@@ -32,6 +37,33 @@ def safe_log(level, message):
 load_dotenv()
 console = Console()
 
+# Обработанные картинки, общие для всех HTMLProcessor в процессе. В `gmu serve`
+# они переживают между командами; ключ включает mtime и размер исходного файла.
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_image_cache = OrderedDict()
+_image_cache_size = 0
+_image_cache_lock = threading.Lock()
+
+
+def _get_cached_image(key):
+    with _image_cache_lock:
+        value = _image_cache.get(key)
+        if value is not None:
+            _image_cache.move_to_end(key)
+        return value
+
+
+def _cache_image(key, value):
+    global _image_cache_size
+    with _image_cache_lock:
+        if key in _image_cache:
+            return
+        _image_cache[key] = value
+        _image_cache_size += len(value[0])
+        while _image_cache_size > IMAGE_CACHE_MAX_BYTES and _image_cache:
+            _, (old_bytes, _) = _image_cache.popitem(last=False)
+            _image_cache_size -= len(old_bytes)
+
 
 class HTMLProcessor:
     def __init__(self, html_filename: str, images_folder: str = "images", replace_src: bool = True, rename_images: bool = True):
@@ -60,6 +92,8 @@ class HTMLProcessor:
         self.attachments = {}
         # Словарь "старое_имя → новое_имя"
         self.image_renames = {}
+        # Словарь "старое_имя → (bytes, расширение)" после обработки, общий для всех вариантов HTML
+        self.encoded_images = {}
         self.size = None
         self.result_html = None
 
@@ -67,17 +101,7 @@ class HTMLProcessor:
 
     def _load_html(self):
         """Загружает HTML-файл и записывает содержимое в self.original_html."""
-        if not self.html_filename:
-            html_files = list(Path(".").glob("*.html"))
-            if not html_files:
-                raise FileNotFoundError(
-                    "HTML file not found in this directory")
-            html_file = html_files[0]
-        else:
-            html_file = Path(self.html_filename)
-            if not html_file.exists():
-                raise FileNotFoundError(f"File {html_file} not found")
-
+        html_file = find_html_file(self.html_filename)
         self.original_html = html_file.read_text(encoding="utf-8")
 
     def _get_soup(self):
@@ -163,11 +187,15 @@ class HTMLProcessor:
         Обрабатывает найденные изображения: конвертация SVG, ресайз и сжатие,
         избегая повторной обработки файла и генерируя новые имена по дате/времени и счётчику.
         """
+        self._encode_images()
+        self._name_attachments()
+
+    def _encode_images(self):
+        """
+        Конвертирует SVG, ресайзит и сжимает найденные изображения.
+        Каждый файл обрабатывается один раз, результат сохраняется в self.encoded_images.
+        """
         console.print("[Processing images]")
-        # Генерируем префикс-метку для всех картинок (одна дата/время на единицу обработки)
-        time_prefix = datetime.datetime.now().strftime("%d%m%Y%H%M")
-        # Ведём счётчик для новых имён
-        image_counter = 1
 
         def _resize_and_compress_image(
             image_bytes: bytes,
@@ -240,10 +268,13 @@ class HTMLProcessor:
                 img.save(output, format=img_format, **save_params)
                 return output.getvalue()
 
+        # Ключи кеша для картинок, которые обрабатываются в этом проходе
+        pending_cache = {}
+
         # Проходимся по списку (fname, width)
         for fname, width in track(self.images_info, description=""):
             # Если уже обрабатывали этот файл, переходим к следующему (не создаём дубль прикрепления)
-            if fname in self.image_renames:
+            if fname in self.encoded_images:
                 continue
 
             img_file = Path(self.images_folder) / fname
@@ -255,21 +286,17 @@ class HTMLProcessor:
                 )
                 continue
 
+            file_stat = img_file.stat()
+            cache_key = (str(img_file.resolve()), file_stat.st_mtime_ns, file_stat.st_size, width)
+            cached = _get_cached_image(cache_key)
+            if cached is not None:
+                self.encoded_images[fname] = cached
+                continue
+            pending_cache[fname] = cache_key
+
             file_bytes = img_file.read_bytes()
             ext = fname.split('.')[-1].lower()
 
-            # Генерация нового имени (в случае rename_images) одна для данного файла
-            # и фиксируется до конца обработки
-            if self.rename_images:
-                # Формат: DDMMYYYYHHMM_счётчик
-                # (final_ext добавляется после обработки)
-                tentative_name = f"{time_prefix}_{image_counter}"
-                image_counter += 1
-            else:
-                # Если не переименовываем - используем исходное имя без расширения,
-                # чтобы svg корректно получил .png после конвертации.
-                tentative_name = fname.rsplit('.', 1)[0]
-
             # 1. SVG -> PNG через resvg-js без системных Cairo/GTK зависимостей.
             if ext == 'svg':
                 try:
@@ -288,9 +315,7 @@ class HTMLProcessor:
                         png_bytes = _resize_and_compress_image(
                             png_bytes, target_width=width, output_format='PNG')
 
-                    new_name = f"{tentative_name}{final_ext}"
-                    self.attachments[new_name] = png_bytes
-                    self.image_renames[fname] = new_name
+                    self.encoded_images[fname] = (png_bytes, final_ext)
                     safe_log(
                         'info', f"SVG {fname} successfully converted to PNG")
                 except Exception as e:
@@ -319,14 +344,7 @@ class HTMLProcessor:
                     f"[bold yellow]WARNING:[/bold yellow] GIF-изображения не ресайзятся. '{fname}' будет пропущено."
                 )
 
-                if self.rename_images:
-                    # .gif → добавляем расширение
-                    new_name = f"{tentative_name}.gif"
-                else:
-                    new_name = fname
-
-                self.attachments[new_name] = file_bytes
-                self.image_renames[fname] = new_name
+                self.encoded_images[fname] = (file_bytes, '.gif')
                 continue
 
             # 3. Остальные форматы (jpg / jpeg / png / webp / bmp / tiff / ...)
@@ -356,14 +374,7 @@ class HTMLProcessor:
                     output_format=img_format
                 )
 
-                if self.rename_images:
-                    new_name = f"{tentative_name}{final_ext}"
-                else:
-                    # Если не переименовываем, оставляем исходное имя
-                    new_name = fname
-
-                self.attachments[new_name] = processed_bytes
-                self.image_renames[fname] = new_name
+                self.encoded_images[fname] = (processed_bytes, final_ext)
                 safe_log(
                     'info', f"Image {fname} ({ext.upper()}) successfully processed.")
             except Exception as e:
@@ -373,13 +384,36 @@ class HTMLProcessor:
                     f"[bold red]ERROR:[/bold red] Ошибка при обработке изображения {fname}: {e}"
                 )
                 # Ошибка — всё равно добавим файл во вложения, чтобы письмо сформировалось
-                if self.rename_images:
-                    new_name = f"{tentative_name}{final_ext}"
-                else:
-                    new_name = fname
+                self.encoded_images[fname] = (file_bytes, final_ext)
 
-                self.attachments[new_name] = file_bytes
-                self.image_renames[fname] = new_name
+        for fname, cache_key in pending_cache.items():
+            if fname in self.encoded_images:
+                _cache_image(cache_key, self.encoded_images[fname])
+
+    def _name_attachments(self):
+        """
+        Формирует вложения из обработанных изображений: при rename_images даёт им
+        новые имена по дате/времени и счётчику, иначе оставляет исходные.
+        """
+        # Генерируем префикс-метку для всех картинок (одна дата/время на единицу обработки)
+        time_prefix = datetime.datetime.now().strftime("%d%m%Y%H%M")
+        self.attachments = {}
+        self.image_renames = {}
+
+        # Ведём счётчик для новых имён в порядке обработки файлов
+        for image_counter, (fname, (image_bytes, final_ext)) in enumerate(self.encoded_images.items(), start=1):
+            if self.rename_images:
+                # Формат: DDMMYYYYHHMM_счётчик
+                new_name = f"{time_prefix}_{image_counter}{final_ext}"
+            elif fname.split('.')[-1].lower() == 'svg':
+                # Если не переименовываем - svg получает .png после конвертации
+                new_name = f"{fname.rsplit('.', 1)[0]}{final_ext}"
+            else:
+                # Если не переименовываем, оставляем исходное имя
+                new_name = fname
+
+            self.attachments[new_name] = image_bytes
+            self.image_renames[fname] = new_name
 
     def _update_image_sources(self):
         """
@@ -464,12 +498,39 @@ class HTMLProcessor:
         for tag in all_tags_with_style:
             tag['style'] = _optimize_style(tag['style'])
 
+    def _prune_css(self):
+        """Удаляет из <style> правила, селекторы которых не находят ни одного элемента."""
+        if not is_pruning_enabled():
+            return
+        stats = prune_unused_css(self.soup)
+        if stats.rules_removed or stats.selectors_removed:
+            safe_log(
+                'info',
+                f"CSS pruning: removed {stats.rules_removed} of {stats.rules_before} rules "
+                f"and {stats.selectors_removed} selectors, {stats.bytes_saved} bytes saved")
+        for reason in stats.skipped_blocks:
+            safe_log('warning', f"CSS pruning skipped a <style> block: {reason}")
+
     def _inline_css(self):
         """Инлайнит все стили через Juice с сохранением Outlook-комментариев."""
 
         # Juice обрабатывает CSS-каскад заметно полнее, чем локальный Python-инлайнер.
         self.result_html = inline_css_custom(str(self.soup))
 
+    def _minify_html(self):
+        """Минифицирует HTML после инлайна, не трогая условные комментарии Outlook."""
+        if not is_minify_enabled():
+            return
+        self.result_html, stats = minify_html(self.result_html)
+        if stats.reverted:
+            safe_log('warning', "HTML minification reverted: conditional comments or <pre> blocks would change")
+            return
+        safe_log(
+            'info',
+            f"HTML minified: {stats.bytes_before} -> {stats.bytes_after} bytes, {stats.bytes_saved} bytes saved")
+        console.print(
+            f"[Minified HTML: -{stats.bytes_saved} bytes ({stats.bytes_before} → {stats.bytes_after})]")
+
     def process(self):
         """Основной метод, запускающий весь пайплайн обработки."""
 
@@ -491,9 +552,48 @@ class HTMLProcessor:
         self._preserve_existing_dimensions()
         # 6. Убираем пробелы из inline-style
         self._remove_spaces_from_style()
-        # 7. Инлайн CSS (Juice)
+        # 7. Удаляем неиспользуемые CSS-правила
+        self._prune_css()
+        # 8. Инлайн CSS (Juice)
         self._inline_css()
+        # 9. Минификация HTML (GMU_MINIFY_HTML=1)
+        self._minify_html()
+
+        return self._result()
 
+    def process_targets(self, targets: dict) -> dict:
+        """
+        Готовит несколько вариантов HTML из одного файла.
+        targets: словарь "имя варианта → (replace_src, rename_images)".
+        Изображения обрабатываются один раз и переиспользуются всеми вариантами.
+        Возвращает словарь "имя варианта → результат как у process()".
+        """
+        self._get_soup()
+        self._extract_sender_name()
+        self._extract_sender_mail()
+        self._extract_subject()
+        self._extract_preheader()
+        self._extract_language()
+        self._find_images()
+        self._encode_images()
+
+        results = {}
+        for target_name, (replace_src, rename_images) in targets.items():
+            self.replace_src = replace_src
+            self.rename_images = rename_images
+            self._get_soup()
+            self._find_images()
+            self._name_attachments()
+            self._update_image_sources()
+            self._preserve_existing_dimensions()
+            self._remove_spaces_from_style()
+            self._prune_css()
+            self._inline_css()
+            self._minify_html()
+            results[target_name] = self._result()
+        return results
+
+    def _result(self) -> dict:
         return {
             'data': {
                 'sender_name': self.sender_name,
@@ -1,20 +1,106 @@
 import bz2
 import gzip
+import hashlib
+import json
 import os
-import pathlib
-import platform
+import time
 import urllib.parse
-from typing import Dict, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import pyperclip
 import requests
 from dotenv import load_dotenv
 
+from gmu.utils.disk_cache import MISSING, DiskCache, is_cache_disabled
+from gmu.utils.logger import requests_logger
+from gmu.utils.paths import user_cache_dir
+from gmu.utils.rate_limiter import RateLimiter, get_rate_limiter
+
 load_dotenv()
+
+# Коды ошибок Unisender при превышении лимита частоты вызовов.
+RATE_LIMIT_ERROR_CODES = (
+    "api_call_limit_exceeded_for_api_key",
+    "api_call_limit_exceeded_for_ip",
+)
+RATE_LIMIT_RETRIES = 5
+# Ограничение Unisender на число контактов в одном вызове importContacts.
+IMPORT_CONTACTS_MAX_ROWS = 500
+
+# Читающие методы, ответы которых кешируются на диске: параметр с ID и TTL в секундах.
+CACHED_METHODS = {
+    "getMessage": ("id", 60),
+    "getActualMessageVersion": ("message_id", 60),
+    "getWebVersion": ("campaign_id", 24 * 60 * 60),
+    "getCampaignStatus": ("campaign_id", 15),
+}
+# Изменяющие методы: параметр с ID и читающие методы, кеш которых нужно сбросить.
+CACHE_INVALIDATIONS = {
+    "deleteMessage": ("message_id", ("getMessage", "getActualMessageVersion")),
+    "updateEmailMessage": ("id", ("getMessage", "getActualMessageVersion")),
+    "createCampaign": ("message_id", ("getMessage", "getActualMessageVersion")),
+}
+
+
+_shared_session: Optional[requests.Session] = None
+
+
+def shared_session() -> requests.Session:
+    """
+    Общая для процесса сессия requests. В `gmu serve` соединения с Unisender
+    переиспользуются между командами.
+    """
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = requests.Session()
+    return _shared_session
+
+
+class _QueryString:
+    """Параметры запроса для журнала; urlencode выполняется только при записи."""
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def __str__(self):
+        return urllib.parse.urlencode(self.params, doseq=True)
+
+
+class UnisenderAPIError(Exception):
+    """
+    Unisender вернул ошибку. code - код ошибки API (например invalid_arg), если он есть
+    в ответе; status_code - HTTP-статус ответа.
+    """
+
+    def __init__(self, message, code: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+        self.status_code = status_code
+
+
+class UnisenderRateLimitError(UnisenderAPIError):
+    """Unisender отклонил запрос из-за превышения лимита вызовов."""
 
 
 class UnisenderClient:
-    def __init__(self):
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        use_cache: Optional[bool] = None,
+    ):
+        """
+        session: requests.Session для переиспользования соединений.
+                 Если не передан, используется общая сессия процесса.
+        rate_limiter: ограничитель частоты запросов. По умолчанию общий лимитер
+                      процесса, настроенный через GMU_RATE_LIMIT и GMU_RATE_LIMITS.
+        use_cache: кешировать ответы читающих методов на диске.
+                   По умолчанию включено, если не задан GMU_NO_CACHE.
+        """
+        self.session = session if session is not None else shared_session()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.use_cache = not is_cache_disabled() if use_cache is None else use_cache
+        self.cache = DiskCache(user_cache_dir() / "responses")
         self.API_KEY = os.environ.get(
             "UNISENDER_API_KEY", "No API key provided")
         self.API_URL = os.environ.get(
@@ -27,58 +113,41 @@ class UnisenderClient:
             raise ValueError(
                 "UNISENDER_API_URL environment variables must be set.")
 
-    def _get_log_file_path(self):
-        candidates = []
-        if platform.system() == "Windows":
-            appdata = os.getenv("APPDATA")
-            if appdata:
-                candidates.append(pathlib.Path(appdata) / "GMU" / "requests.log")
-        else:
-            home = pathlib.Path.home()
-            candidates.append(home / ".config" / "GMU" / "requests.log")
-        candidates.append(pathlib.Path("requests.log"))
-
-        for candidate in candidates:
-            try:
-                candidate.parent.mkdir(parents=True, exist_ok=True)
-                with open(candidate, "a", encoding="utf-8"):
-                    pass
-                return candidate
-            except OSError:
-                continue
-        return None
-
     def _log_https_request(self, url, params, request_method, extra_info=None):
         # Не логгируем api_key явно
         safe_params = {}
+        contact_values = 0
         for k, v in params.items():
-            if k.lower() == "api_key":
+            if k.startswith("data["):
+                # Контакты из importContacts не пишем в журнал: это персональные данные и мегабайты текста.
+                contact_values += 1
+            elif k.lower() == "api_key":
                 safe_params[k] = "***"
             elif isinstance(v, bytes):
                 safe_params[k] = "<binary>"
             else:
                 safe_params[k] = v
-        qs = urllib.parse.urlencode(safe_params, doseq=True)
-        log_text = f"{request_method} {url}?{qs}"
-        if extra_info:
-            log_text += f" | {extra_info}"
-        logfile = self._get_log_file_path()
-        if logfile is None:
-            return
-        with open(logfile, "a", encoding="utf-8") as f:
-            f.write(log_text + "\n")
+        if contact_values:
+            safe_params["data"] = f"<{contact_values} values>"
+        # Строка собирается в потоке записи журнала, а не на пути запроса.
+        requests_logger.info(
+            "%s %s?%s%s",
+            request_method,
+            url,
+            _QueryString(safe_params),
+            f" | {extra_info}" if extra_info else "",
+            extra={"http_method": request_method, "url": url, "params": safe_params,
+                   "extra_info": extra_info},
+        )
 
-    def u_request(
+    def _prepare_request(
         self,
         method: str,
         params: dict = None,
         request_compression: str = None,
         response_compression: str = None,
-    ):
-        """
-        request_compression: None, 'gzip', или 'bzip2'
-        response_compression: None, 'gzip', или 'bzip2'
-        """
+    ) -> Tuple[str, Union[dict, bytes], Dict[str, str]]:
+        """Собирает URL, тело и заголовки POST-запроса к методу API."""
         if params is None:
             params = {}
 
@@ -119,17 +188,17 @@ class UnisenderClient:
                 extra_info=f"compressed:{request_compression}, size:{len(payload)}"
             )
 
-            response = requests.post(query_url, data=payload, headers=headers)
+            return query_url, payload, headers
         else:
             # Обычный POST: всё через form-data
             full_params = {**base_params, **params_to_compress}
             post_url = url
             headers = {"Content-Type": "application/x-www-form-urlencoded"}
             self._log_https_request(post_url, full_params, "POST")
-            response = requests.post(
-                post_url, data=full_params, headers=headers)
+            return post_url, full_params, headers
 
-        # Проверяем статус и возвращаем результат
+    def _parse_response(self, response: requests.Response):
+        """Возвращает поле result ответа API или выбрасывает исключение с ошибкой."""
         try:
             resp_json = response.json()
         except Exception:
@@ -138,8 +207,72 @@ class UnisenderClient:
 
         if 'result' in resp_json and 'error' not in resp_json:
             return resp_json['result']
-        else:
-            raise Exception(resp_json.get('error', resp_json))
+        if response.status_code == 429 or resp_json.get('code') in RATE_LIMIT_ERROR_CODES:
+            raise UnisenderRateLimitError(
+                resp_json.get('error', resp_json), resp_json.get('code'), response.status_code)
+        raise UnisenderAPIError(resp_json.get('error', resp_json), resp_json.get('code'), response.status_code)
+
+    def _cache_key(self, method: str, params: dict) -> Optional[str]:
+        if not self.use_cache or method not in CACHED_METHODS:
+            return None
+        id_param, _ = CACHED_METHODS[method]
+        if params.get(id_param) is None:
+            return None
+        # В хеш входят URL и ключ API, чтобы кеш разных аккаунтов не смешивался.
+        digest = hashlib.sha256(json.dumps(
+            [self.API_URL, self.API_KEY, method, params],
+            sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{method}/{params[id_param]}/{digest}"
+
+    def _invalidate_cache(self, method: str, params: dict):
+        if method not in CACHE_INVALIDATIONS:
+            return
+        id_param, read_methods = CACHE_INVALIDATIONS[method]
+        if params.get(id_param) is None:
+            return
+        for read_method in read_methods:
+            self.cache.invalidate(f"{read_method}/{params[id_param]}")
+
+    def u_request(
+        self,
+        method: str,
+        params: dict = None,
+        request_compression: str = None,
+        response_compression: str = None,
+    ):
+        """
+        request_compression: None, 'gzip', или 'bzip2'
+        response_compression: None, 'gzip', или 'bzip2'
+        """
+        if params is None:
+            params = {}
+
+        cache_key = self._cache_key(method, params)
+        if cache_key:
+            _, ttl = CACHED_METHODS[method]
+            cached = self.cache.get(cache_key, ttl)
+            if cached is not MISSING:
+                return cached
+
+        url, data, headers = self._prepare_request(
+            method, params, request_compression, response_compression)
+
+        # При ответе о превышении лимита ждем и повторяем, а не падаем.
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire(method)
+            response = self.session.post(url, data=data, headers=headers)
+            try:
+                result = self._parse_response(response)
+                break
+            except UnisenderRateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                time.sleep(2 ** attempt)
+
+        if cache_key:
+            self.cache.set(cache_key, result)
+        self._invalidate_cache(method, params)
+        return result
 
     def get_campaign_status(self, campaign_id: int) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
         result = self.u_request('getCampaignStatus', {
@@ -292,3 +425,59 @@ class UnisenderClient:
 
         result = self.u_request('createCampaign', params)
         return result
+
+    def create_list(self, title: str, before_subscribe_url: Optional[str] = None,
+                    after_subscribe_url: Optional[str] = None) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        """Создает список контактов. Возвращает словарь с id нового списка."""
+        params = {'title': title}
+        if before_subscribe_url:
+            params['before_subscribe_url'] = before_subscribe_url
+        if after_subscribe_url:
+            params['after_subscribe_url'] = after_subscribe_url
+        return self.u_request('createList', params)
+
+    def import_contacts(
+        self,
+        field_names: List[str],
+        rows: List[List[str]],
+        overwrite_tags: int = 0,
+        overwrite_lists: int = 0,
+        request_compression: Optional[str] = None,
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        """
+        Массовый импорт контактов (importContacts): не больше IMPORT_CONTACTS_MAX_ROWS строк за вызов.
+        Возвращает total, inserted, updated, deleted, new_emails, invalid и log с ошибками по строкам.
+        """
+        params = {'overwrite_tags': overwrite_tags, 'overwrite_lists': overwrite_lists}
+        for column, name in enumerate(field_names):
+            params[f'field_names[{column}]'] = name
+        for row_index, row in enumerate(rows):
+            for column, value in enumerate(row):
+                params[f'data[{row_index}][{column}]'] = value
+        return self.u_request('importContacts', params, request_compression=request_compression)
+
+    def export_contacts(
+        self,
+        list_id: Optional[int] = None,
+        field_names: Optional[List[str]] = None,
+        tag: Optional[str] = None,
+        email_status: Optional[str] = None,
+    ) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        """
+        Запускает асинхронную выгрузку контактов (exportContacts). Возвращает task_uuid и status;
+        ссылку на файл отдает get_task_result, когда задача завершится.
+        """
+        params = {}
+        if list_id is not None:
+            params['list_id'] = list_id
+        for column, name in enumerate(field_names or []):
+            params[f'field_names[{column}]'] = name
+        if tag:
+            params['tag'] = tag
+        if email_status:
+            params['email_status'] = email_status
+        return self.u_request('exportContacts', params)
+
+    def get_task_result(self, task_uuid: str) -> Union[Literal['error'], Dict[str, Union[str, int]]]:
+        """Статус асинхронной задачи: new, processing или completed (тогда с file_to_download)."""
+        return self.u_request('getTaskResult', {'task_uuid': task_uuid})
@@ -0,0 +1,52 @@
+import os
+from typing import Optional, Union
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_WL_ENDPOINT = "https://wl.gefera.ru/api/webletters/"
+
+
+class WebLetterClient:
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        session: requests.Session для переиспользования соединений.
+        """
+        self.session = session if session is not None else requests.Session()
+        self.AUTH_TOKEN = os.environ.get("WL_AUTH_TOKEN")
+        self.ENDPOINT = os.environ.get("WL_ENDPOINT", DEFAULT_WL_ENDPOINT)
+        self.URL = os.environ.get("WL_URL")
+
+        if not self.AUTH_TOKEN:
+            raise ValueError(
+                "WL_AUTH_TOKEN environment variables must be set.")
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": self.AUTH_TOKEN}
+
+    def build_url(self, webletter_id: str) -> str:
+        return f"{self.URL}{webletter_id}"
+
+    def upload(self, zip_name: str, content: Union[bytes, object], webletter_id: Optional[str] = None) -> dict:
+        """
+        Загружает ZIP-архив письма в WebLetter.
+        :param zip_name: имя архива
+        :param content: содержимое архива (bytes или открытый файл)
+        :param webletter_id: ID письма для обновления. Если не задан, создается новое письмо.
+        :return: JSON-ответ WebLetter
+        """
+        files = {"file": (zip_name, content, "application/zip")}
+        if webletter_id:
+            response = self.session.put(
+                f"{self.ENDPOINT}{webletter_id}", headers=self.headers, files=files)
+        else:
+            response = self.session.post(
+                f"{self.ENDPOINT}upload", headers=self.headers, files=files)
+        return response.json()
+
+    def delete(self, webletter_id: str) -> requests.Response:
+        return self.session.delete(
+            f"{self.ENDPOINT.rstrip('/')}/{webletter_id}", headers=self.headers)
@@ -1,11 +1,12 @@
 import os
 import zipfile
-from pathlib import Path
+from io import BytesIO
 
 from rich.console import Console
 from rich.progress import track
 
 from gmu.utils.helpers import table_print
+from gmu.utils.paths import find_html_file
 
 console = Console()
 
@@ -23,22 +24,40 @@ def archive_email(html_filename: str, html_content: str, attachments: dict, arch
     :return: путь к архиву
     """
     if not archive_name:
-        html_files = list(Path(".").glob("*.html"))
-        if not html_files:
+        try:
+            name = find_html_file(html_filename).stem
+        except FileNotFoundError:
             raise FileNotFoundError(
                 "HTML не найден в рабочей директории. Проверьте, что вы в корректной директории.")
-        name = html_files[0].stem
         archive_name = f"{name}.zip"
+
+    console.print("📦 Archiving a letter")
+    _write_archive(archive_name, html_content, attachments, show_progress=True)
+    table_print("SUCCESS", f"Архив письма сохранен: {archive_name}")
+    return os.path.abspath(archive_name)
+
+
+def archive_bytes(html_content: str, attachments: dict) -> bytes:
+    """
+    Собирает тот же zip-архив, что и archive_email, но в памяти, без записи на диск.
+    :return: содержимое архива
+    """
+    buffer = BytesIO()
+    _write_archive(buffer, html_content, attachments)
+    return buffer.getvalue()
+
+
+def _write_archive(target, html_content: str, attachments: dict, show_progress: bool = False):
     images_folder = "images"
 
-    with zipfile.ZipFile(archive_name, "w", zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zipf:
         # Пишем финальный index.html (в корень архива)
         zipf.writestr("index.html", html_content)
 
-        console.print("📦 Archiving a letter")
         # Создаем папку images в архиве и пишем туда все вложения
-        for img_name, img_bytes in track(attachments.items(), description=""):
+        items = attachments.items()
+        if show_progress:
+            items = track(items, description="")
+        for img_name, img_bytes in items:
             arcname = f"{images_folder}/{img_name}"
             zipf.writestr(arcname, img_bytes)
-    table_print("SUCCESS", f"Архив письма сохранен: {archive_name}")
-    return os.path.abspath(archive_name)
@@ -0,0 +1,133 @@
+"""
+Массовая тестовая отправка по списку адресов для проверки письма.
+
+Адреса делятся на пачки не больше `chunk_size` (sendTestEmail принимает
+ограниченное число получателей за вызов), пачки отправляются параллельно
+через AsyncUnisenderClient: у них общий пул соединений и лимит запросов
+процесса (GMU_RATE_LIMIT / GMU_RATE_LIMITS, например `sendTestEmail=2`).
+Пачка, вызов для которой не удался из-за временной ошибки (лимит запросов,
+сеть, ответ 5xx), повторяется с нарастающей паузой. Если Unisender отвечает
+ошибкой аргументов (код invalid_arg: неверный адрес, слишком много
+получателей), пачка сразу, без повторов, делится пополам, пока проблемные
+адреса не останутся отдельно, чтобы один адрес не ронял весь список.
+Остальные ошибки (нет письма, неверный ключ API) не повторяются и
+записываются на всю пачку.
+Адрес, которого нет в ответе sendTestEmail, считается неотправленным.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import requests
+
+from gmu.utils.AsyncUnisender import AsyncUnisenderClient
+from gmu.utils.logger import gmu_logger
+from gmu.utils.Unisender import UnisenderAPIError, UnisenderRateLimitError
+
+DEFAULT_CHUNK_SIZE = 10
+DEFAULT_RETRIES = 2
+RETRY_DELAY = 1.0
+# Коды ошибок API, которые относятся к переданным адресам, а не ко всему вызову.
+ADDRESS_ERROR_CODES = ("invalid_arg",)
+# Коды, которыми Unisender сообщает о собственном сбое: повтор того же вызова может пройти.
+TRANSIENT_ERROR_CODES = ("unspecified",)
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+@dataclass
+class AddressResult:
+    email: str
+    ok: bool
+    message: str
+    attempts: int
+
+
+def read_addresses(path: str) -> List[str]:
+    """
+    Адреса из файла: по одному в строке или через запятую / точку с запятой.
+    Строки с # - комментарии; повторы убираются с сохранением порядка.
+    """
+    addresses = []
+    for line in Path(path).read_text(encoding="utf-8-sig").splitlines():
+        line = line.split("#", 1)[0]
+        addresses.extend(part for part in _SEPARATORS.split(line) if part)
+    return list(dict.fromkeys(addresses))
+
+
+def chunked(items: List[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _parse_result(chunk: List[str], result, attempts: int) -> List[AddressResult]:
+    """Разбирает ответ sendTestEmail: словарь "адрес -> {success|error}" или общее сообщение."""
+    if not isinstance(result, dict):
+        return [AddressResult(email, True, str(result or "OK"), attempts) for email in chunk]
+    results = []
+    for email in chunk:
+        item = result.get(email)
+        if isinstance(item, dict) and item.get("success"):
+            results.append(AddressResult(email, True, "OK", attempts))
+        elif isinstance(item, dict) and "error" in item:
+            results.append(AddressResult(email, False, str(item["error"]), attempts))
+        else:
+            results.append(AddressResult(email, False, "Адреса нет в ответе Unisender", attempts))
+    return results
+
+
+def _is_address_error(error: Exception) -> bool:
+    return isinstance(error, UnisenderAPIError) and error.code in ADDRESS_ERROR_CODES
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (UnisenderRateLimitError, requests.RequestException)):
+        return True
+    if isinstance(error, UnisenderAPIError):
+        return (error.status_code or 0) >= 500 or error.code in TRANSIENT_ERROR_CODES
+    return False
+
+
+async def _send_chunk(client: AsyncUnisenderClient, message_id: int, chunk: List[str],
+                      retries: int) -> List[AddressResult]:
+    error, attempts = None, 0
+    for attempt in range(1, retries + 2):
+        attempts = attempt
+        try:
+            result = await client.send_test_message(message_id, ",".join(chunk))
+            return _parse_result(chunk, result, attempt)
+        except Exception as exc:
+            error = exc
+            gmu_logger.warning(f"sendTestEmail failed for {len(chunk)} addresses (attempt {attempt}): {exc}")
+            # Ошибка аргументов или отсутствующее письмо при повторе не исчезнут.
+            if attempt > retries or not _is_transient(exc):
+                break
+            await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+    if len(chunk) > 1 and _is_address_error(error):
+        # Ошибка одного адреса не должна отменять отправку остальным.
+        middle = len(chunk) // 2
+        halves = await asyncio.gather(
+            _send_chunk(client, message_id, chunk[:middle], 0),
+            _send_chunk(client, message_id, chunk[middle:], 0),
+        )
+        return halves[0] + halves[1]
+    return [AddressResult(email, False, str(error), attempts) for email in chunk]
+
+
+async def _send_all(message_id: int, addresses: List[str], chunk_size: int, concurrency: Optional[int],
+                    retries: int) -> List[AddressResult]:
+    async with AsyncUnisenderClient(max_concurrency=concurrency) as client:
+        chunk_results = await asyncio.gather(*(
+            _send_chunk(client, message_id, chunk, retries) for chunk in chunked(addresses, chunk_size)))
+    results = {item.email: item for chunk in chunk_results for item in chunk}
+    return [results[email] for email in addresses]
+
+
+def send_test_bulk(message_id: int, addresses: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   concurrency: Optional[int] = None, retries: int = DEFAULT_RETRIES) -> List[AddressResult]:
+    """Отправляет тестовое письмо на все адреса; результаты в порядке addresses."""
+    return asyncio.run(_send_all(message_id, addresses, chunk_size, concurrency, retries))
@@ -0,0 +1,167 @@
+"""
+Опрос статусов кампаний для `gmu c watch`.
+
+Каждую кампанию опрашивает своя задача через AsyncUnisenderClient (один пул
+соединений, лимит запросов процесса, без кеша ответов). Пауза между
+запросами начинается с `interval`, сбрасывается при смене статуса, а иначе
+растет в BACKOFF раз: до ACTIVE_MAX_INTERVAL, пока кампания запланирована
+или отправляется, и до `max_interval` в остальных статусах (модерация,
+анализ). Неудачные вызовы повторяются с той же паузой, не больше MAX_ERRORS
+подряд. В финальном статусе запрашивается getCampaignCommonStats, и задача
+завершается. gmu.json проекта записывается только при смене статуса.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from gmu.utils.AsyncUnisender import AsyncUnisenderClient
+from gmu.utils.GmuConfig import GmuConfig, ProjectState
+from gmu.utils.logger import gmu_logger
+from gmu.utils.project_state import update_project_config
+
+ACTIVE_STATUSES = ("scheduled", "in_progress")
+FINAL_STATUSES = ("completed", "stopped", "canceled", "declined")
+DEFAULT_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 300.0
+ACTIVE_MAX_INTERVAL = 30.0
+BACKOFF = 1.5
+MAX_ERRORS = 5
+
+_SKIPPED_DIRS = ("node_modules", "__pycache__")
+
+
+@dataclass
+class WatchedCampaign:
+    campaign_id: int
+    config_path: Optional[str] = None
+    status: Optional[str] = None
+    stats: Optional[dict] = None
+    error: Optional[str] = None
+    polls: int = 0
+    details: dict = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        if self.config_path:
+            project = os.path.basename(os.path.dirname(os.path.abspath(self.config_path)))
+            return f"{self.campaign_id} ({project})"
+        return str(self.campaign_id)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+
+def find_project_campaigns(roots: List[str]) -> Dict[int, WatchedCampaign]:
+    """
+    Кампании из gmu.json в папках roots и их подпапках (кроме скрытых и node_modules).
+    Для каждой кампании запоминается путь к gmu.json и сохраненные статус и статистика.
+    """
+    campaigns = {}
+    for root in roots:
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = sorted(name for name in dirs if not name.startswith(".") and name not in _SKIPPED_DIRS)
+            if "gmu.json" not in files:
+                continue
+            path = os.path.join(directory, "gmu.json")
+            try:
+                data = GmuConfig(path).load()
+            except (OSError, ValueError) as exc:
+                gmu_logger.warning(f"Cannot read {path}: {exc}")
+                continue
+            campaign_id = data.get("campaign_id")
+            if campaign_id and int(campaign_id) not in campaigns:
+                campaigns[int(campaign_id)] = WatchedCampaign(
+                    int(campaign_id), path, data.get("campaign_status"), data.get("campaign_stats"))
+    return campaigns
+
+
+def next_interval(delay: float, status: Optional[str], interval: float, max_interval: float) -> float:
+    """Следующая пауза для кампании, статус которой не изменился."""
+    cap = min(ACTIVE_MAX_INTERVAL, max_interval) if status in ACTIVE_STATUSES else max_interval
+    return max(interval, min(delay * BACKOFF, cap))
+
+
+def save_campaign_state(campaign: WatchedCampaign):
+    """Записывает статус (и статистику) в gmu.json проекта сразу, не дожидаясь конца команды."""
+    if not campaign.config_path:
+        return
+    update_project_config({
+        "campaign_status": campaign.status,
+        "campaign_creation_time": campaign.details.get("creation_time"),
+        "campaign_start_time": campaign.details.get("start_time"),
+        "campaign_stats": campaign.stats,
+    }, campaign.config_path)
+    ProjectState.for_path(campaign.config_path).flush()
+
+
+async def _call_with_retries(call, campaign_id: int, delay: float, max_interval: float):
+    """Вызов метода API с повторами после ошибок; после MAX_ERRORS ошибок подряд исключение пробрасывается."""
+    for attempt in range(1, MAX_ERRORS + 1):
+        try:
+            return await call(campaign_id)
+        except Exception as exc:
+            gmu_logger.warning(f"{call.__name__} {campaign_id} failed ({attempt}/{MAX_ERRORS}): {exc}")
+            if attempt == MAX_ERRORS:
+                raise
+            delay = min(delay * BACKOFF, max_interval)
+            await asyncio.sleep(delay)
+
+
+async def _watch_campaign(client: AsyncUnisenderClient, campaign: WatchedCampaign, interval: float,
+                          max_interval: float, on_change: Callable[[WatchedCampaign], None]):
+    delay = interval
+    while True:
+        try:
+            result = await _call_with_retries(
+                client.get_campaign_status, campaign.campaign_id, delay, max_interval)
+        except Exception as exc:
+            campaign.error = str(exc)
+            return
+
+        campaign.polls += 1
+        status = result.get("status")
+        changed = status != campaign.status
+        campaign.status = status
+        campaign.details = result
+        if campaign.finished and (changed or campaign.stats is None):
+            try:
+                campaign.stats = await _call_with_retries(
+                    client.get_campaign_common_stats, campaign.campaign_id, interval, max_interval)
+            except Exception:
+                pass
+            changed = True
+        if changed:
+            save_campaign_state(campaign)
+            on_change(campaign)
+        if campaign.finished:
+            return
+
+        delay = interval if changed else next_interval(delay, status, interval, max_interval)
+        await asyncio.sleep(delay)
+
+
+async def _watch_all(campaigns: List[WatchedCampaign], interval: float, max_interval: float,
+                     concurrency: Optional[int], timeout: Optional[float],
+                     on_change: Callable[[WatchedCampaign], None]) -> bool:
+    async with AsyncUnisenderClient(max_concurrency=concurrency, use_cache=False) as client:
+        watchers = asyncio.gather(*(
+            _watch_campaign(client, campaign, interval, max_interval, on_change) for campaign in campaigns))
+        try:
+            await asyncio.wait_for(watchers, timeout)
+        except asyncio.TimeoutError:
+            return False
+    return True
+
+
+def watch_campaigns(campaigns: List[WatchedCampaign], interval: float = DEFAULT_INTERVAL,
+                    max_interval: float = DEFAULT_MAX_INTERVAL, concurrency: Optional[int] = None,
+                    timeout: Optional[float] = None,
+                    on_change: Callable[[WatchedCampaign], None] = lambda campaign: None) -> bool:
+    """
+    Опрашивает кампании, пока все не придут в финальный статус (или не выйдет timeout).
+    on_change вызывается при каждой смене статуса. Возвращает False при таймауте.
+    """
+    return asyncio.run(_watch_all(campaigns, interval, max_interval, concurrency, timeout, on_change))
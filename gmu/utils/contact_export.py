@@ -0,0 +1,209 @@
+"""
+Выгрузка контактов для `gmu list export`.
+
+exportContacts только запускает задачу на стороне Unisender; getTaskResult
+опрашивается с растущим интервалом (от POLL_INTERVAL до POLL_MAX_INTERVAL),
+пока задача не завершится и не вернет ссылку на CSV-файл.
+
+Файл скачивается потоковым запросом и пишется на диск блоками (при
+необходимости через gzip), поэтому память не зависит от размера списка.
+Данные пишутся в <output>.part и переименовываются в <output> только после
+полной загрузки. Оборванное соединение продолжается с полученного байта
+запросом с Range; если сервер игнорирует Range, файл скачивается заново.
+Во время загрузки прогресс показывается в строках файла; число контактов
+считается после загрузки разбором CSV, потому что значения в кавычках
+могут содержать переводы строк.
+"""
+
+import csv
+import gzip
+import os
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, List, Optional
+
+import requests
+
+from gmu.utils.logger import gmu_logger
+from gmu.utils.Unisender import UnisenderClient, shared_session
+
+POLL_INTERVAL = 2.0
+POLL_MAX_INTERVAL = 30.0
+POLL_BACKOFF = 1.5
+DEFAULT_TIMEOUT = 6 * 60 * 60
+DEFAULT_RETRIES = 5
+RETRY_DELAY = 1.0
+CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 5.0
+# Таймауты соединения и чтения одного блока при скачивании, секунды.
+DOWNLOAD_TIMEOUT = (10, 120)
+
+PENDING_STATUSES = ("new", "processing")
+
+
+class ContactExportError(Exception):
+    """Выгрузка не удалась: задача завершилась ошибкой, не успела или файл не скачался."""
+
+
+@dataclass
+class ExportReport:
+    task_uuid: str = ""
+    output: str = ""
+    bytes_received: int = 0
+    bytes_written: int = 0
+    lines: int = 0
+    rows: int = 0
+    restarts: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    download_started: Optional[float] = None
+    elapsed: float = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.download_started is None:
+            return 0.0
+        elapsed = time.perf_counter() - self.download_started
+        return self.bytes_received / elapsed if elapsed else 0.0
+
+
+def _open_output(path: str, compress: bool) -> BinaryIO:
+    return gzip.open(path, "wb", compresslevel=6) if compress else open(path, "wb")
+
+
+def count_csv_rows(path: str, compress: bool) -> int:
+    """Число записей CSV без строки заголовка."""
+    opener = gzip.open if compress else open
+    with opener(path, "rt", encoding="utf-8-sig", errors="replace", newline="") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def _wait_for_file(client: UnisenderClient, task_uuid: str, timeout: float, retries: int,
+                   on_status: Callable[[str], None]) -> str:
+    """Опрашивает getTaskResult, пока задача не завершится; возвращает ссылку на файл."""
+    deadline = time.monotonic() + timeout
+    delay, errors, last_status = POLL_INTERVAL, 0, None
+    while True:
+        try:
+            result = client.get_task_result(task_uuid)
+            errors = 0
+        except Exception as exc:
+            errors += 1
+            gmu_logger.warning(f"getTaskResult {task_uuid} failed ({errors}/{retries}): {exc}")
+            if errors > retries:
+                raise ContactExportError(f"Не удалось получить статус задачи {task_uuid}: {exc}")
+            result = None
+
+        status = result.get("status") if result is not None else last_status
+        if status == "completed":
+            url = result.get("file_to_download")
+            if not url:
+                raise ContactExportError(f"Задача {task_uuid} завершилась без ссылки на файл.")
+            return url
+        if result is not None and status not in PENDING_STATUSES:
+            raise ContactExportError(f"Задача {task_uuid} завершилась со статусом {status}.")
+        if status is not None and status != last_status:
+            on_status(status)
+            last_status = status
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ContactExportError(
+                f"Задача {task_uuid} не завершилась за {timeout:.0f} с. Продолжить можно с --task-uuid {task_uuid}.")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+
+class ContactExport:
+    """
+    Выгрузка контактов в файл output. compress: писать gzip.
+    Фильтры list_id, tag и email_status передаются в exportContacts как есть.
+    """
+
+    def __init__(self, output: str, list_id: Optional[int] = None, field_names: Optional[List[str]] = None,
+                 tag: Optional[str] = None, email_status: Optional[str] = None, compress: bool = False,
+                 timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, chunk_size: int = CHUNK_SIZE):
+        self.output = output
+        self.list_id = list_id
+        self.field_names = field_names
+        self.tag = tag
+        self.email_status = email_status
+        self.compress = compress
+        self.timeout = timeout
+        self.retries = retries
+        self.chunk_size = max(1, chunk_size)
+        self.client = UnisenderClient()
+
+    def start(self) -> str:
+        """Запускает задачу exportContacts и возвращает ее task_uuid."""
+        result = self.client.export_contacts(self.list_id, self.field_names, self.tag, self.email_status)
+        task_uuid = result.get("task_uuid")
+        if not task_uuid:
+            raise ContactExportError(f"exportContacts не вернул task_uuid: {result}")
+        gmu_logger.info(f"Contact export started: {task_uuid} (list {self.list_id})")
+        return task_uuid
+
+    def run(self, task_uuid: str, on_status: Callable[[str], None] = lambda status: None,
+            on_progress: Callable[[ExportReport], None] = lambda report: None) -> ExportReport:
+        """Ждет завершения задачи task_uuid и скачивает файл."""
+        report = ExportReport(task_uuid=task_uuid, output=self.output)
+        url = _wait_for_file(self.client, task_uuid, self.timeout, self.retries, on_status)
+        report.download_started = time.perf_counter()
+        self._download(url, report, on_progress)
+        report.elapsed = time.perf_counter() - report.started
+        gmu_logger.info(f"Contact export saved: {self.output} ({report.rows} rows, {report.bytes_received} bytes)")
+        return report
+
+    def _download(self, url: str, report: ExportReport, on_progress: Callable[[ExportReport], None]):
+        part_path = f"{self.output}.part"
+        session = shared_session()
+        writer = _open_output(part_path, self.compress)
+        newlines = 0
+        last_progress = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                # Range считается в байтах тела, поэтому сжатие при передаче отключено.
+                headers = {"Accept-Encoding": "identity"}
+                if report.bytes_received:
+                    headers["Range"] = f"bytes={report.bytes_received}-"
+                received_before = report.bytes_received
+                try:
+                    with session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                        if response.status_code >= 500:
+                            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                        if response.status_code not in (200, 206):
+                            raise ContactExportError(f"Файл не скачался: HTTP {response.status_code}")
+                        if report.bytes_received and response.status_code == 200:
+                            # Сервер не поддерживает докачку: файл пишется заново.
+                            writer.close()
+                            writer = _open_output(part_path, self.compress)
+                            report.bytes_received, newlines = 0, 0
+                            report.restarts += 1
+                        for chunk in response.iter_content(self.chunk_size):
+                            writer.write(chunk)
+                            report.bytes_received += len(chunk)
+                            newlines += chunk.count(b"\n")
+                            if time.perf_counter() - last_progress >= PROGRESS_INTERVAL:
+                                report.lines = newlines
+                                on_progress(report)
+                                last_progress = time.perf_counter()
+                    break
+                except requests.RequestException as exc:
+                    # Счетчик попыток сбрасывается, если с прошлого обрыва что-то скачалось.
+                    attempt = 1 if report.bytes_received > received_before else attempt + 1
+                    gmu_logger.warning(f"Export download interrupted at {report.bytes_received} bytes "
+                                       f"(attempt {attempt}): {exc}")
+                    if attempt > self.retries:
+                        raise ContactExportError(f"Файл не скачался: {exc}")
+                    time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+            writer.close()
+        except BaseException:
+            writer.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+        report.lines = newlines
+        report.rows = count_csv_rows(part_path, self.compress)
+        os.replace(part_path, self.output)
+        report.bytes_written = os.path.getsize(self.output)
@@ -0,0 +1,256 @@
+"""
+Потоковый импорт контактов для `gmu list import`.
+
+CSV читается построчно и делится на пакеты по `batch_size` строк для
+importContacts. Одновременно отправляется не больше `concurrency` пакетов,
+поэтому память ограничена отправляемыми пакетами, а не размером файла.
+Вызовы идут через AsyncUnisenderClient (общий пул соединений и лимит
+запросов); неудачный пакет повторяется с нарастающей паузой.
+
+Прогресс сохраняется в ~/.cache/gmu/imports после каждого пакета: признаки
+файла (путь, размер, mtime) и параметров импорта, номера завершенных пакетов
+и накопленные счетчики. Повторный запуск того же импорта пропускает
+завершенные пакеты (их строки читаются, но не отправляются) и отправляет
+остальные; файл прогресса удаляется, когда все пакеты загружены.
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from gmu.utils.AsyncUnisender import AsyncUnisenderClient
+from gmu.utils.logger import gmu_logger
+from gmu.utils.paths import user_cache_dir
+from gmu.utils.Unisender import IMPORT_CONTACTS_MAX_ROWS
+
+DEFAULT_BATCH_SIZE = IMPORT_CONTACTS_MAX_ROWS
+DEFAULT_RETRIES = 3
+RETRY_DELAY = 1.0
+PROGRESS_INTERVAL = 5.0
+MAX_REPORTED_ROWS = 20
+
+COUNTERS = ("total", "inserted", "updated", "deleted", "new_emails", "invalid")
+
+
+@dataclass
+class Batch:
+    index: int
+    line_numbers: List[int]
+    rows: List[List[str]]
+
+
+@dataclass
+class ImportReport:
+    rows_sent: int = 0
+    rows_skipped: int = 0
+    batches_sent: int = 0
+    counters: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTERS, 0))
+    invalid_rows: List[Tuple[int, str]] = field(default_factory=list)
+    failed_batches: List[Tuple[int, int, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed or time.perf_counter() - self.started
+        return self.rows_sent / elapsed if elapsed else 0.0
+
+
+class ContactImportError(Exception):
+    """Файл нельзя импортировать (нет колонки email, пустой файл)."""
+
+
+def _detect_dialect(path: str, delimiter: Optional[str]):
+    if delimiter:
+        return {"delimiter": delimiter}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(64 * 1024)
+    try:
+        # Выгрузки Excel с русской локалью разделены точкой с запятой.
+        return {"dialect": csv.Sniffer().sniff(sample, delimiters=",;\t")}
+    except csv.Error:
+        return {"delimiter": ","}
+
+
+def read_header(path: str, delimiter: Optional[str] = None) -> List[str]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f, **_detect_dialect(path, delimiter)), None)
+    if not header:
+        raise ContactImportError(f"Файл {path} пуст.")
+    header = [name.strip() for name in header]
+    if "email" not in (name.lower() for name in header):
+        raise ContactImportError("В первой строке CSV нет колонки email.")
+    # Системные поля Unisender пишутся в нижнем регистре; пользовательские оставляем как есть.
+    return ["email" if name.lower() == "email" else name for name in header]
+
+
+def iter_batches(path: str, batch_size: int, delimiter: Optional[str] = None,
+                 extra_values: Optional[List[str]] = None) -> Iterator[Batch]:
+    """Пакеты строк CSV без заголовка; файл читается потоково. extra_values дописываются к каждой строке."""
+    extra_values = extra_values or []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, **_detect_dialect(path, delimiter))
+        next(reader, None)
+        index, line_numbers, rows = 0, [], []
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            line_numbers.append(reader.line_num)
+            rows.append([value.strip() for value in row] + extra_values)
+            if len(rows) == batch_size:
+                yield Batch(index, line_numbers, rows)
+                index, line_numbers, rows = index + 1, [], []
+        if rows:
+            yield Batch(index, line_numbers, rows)
+
+
+class Checkpoint:
+    """Состояние импорта файла в ~/.cache/gmu/imports; запись атомарная."""
+
+    def __init__(self, csv_path: str, options: dict):
+        stat_result = os.stat(csv_path)
+        source = os.path.abspath(csv_path)
+        self.identity = {"source": source, "size": stat_result.st_size,
+                         "mtime_ns": stat_result.st_mtime_ns, "options": options}
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        self.path = user_cache_dir() / "imports" / f"{digest}.json"
+        self.done = set()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.rows_done = 0
+
+    def load(self) -> Optional[str]:
+        """
+        Читает сохраненный прогресс. Возвращает None, если его нет или он подходит,
+        иначе причину, по которой импорт начнется заново.
+        """
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get("identity") != self.identity:
+            return "файл или параметры импорта изменились"
+        self.done = set(state.get("done", []))
+        self.counters.update(state.get("counters", {}))
+        self.rows_done = state.get("rows_done", 0)
+        return None
+
+    def mark_done(self, batch: Batch, result: dict):
+        self.done.add(batch.index)
+        self.rows_done += len(batch.rows)
+        for name in COUNTERS:
+            self.counters[name] += int(result.get(name) or 0)
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({
+            "identity": self.identity,
+            "done": sorted(self.done),
+            "rows_done": self.rows_done,
+            "counters": self.counters,
+        }), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        self.path.unlink(missing_ok=True)
+
+
+async def _send_batch(client: AsyncUnisenderClient, batch: Batch, field_names: List[str], options: dict,
+                      retries: int) -> Tuple[Batch, Optional[dict], Optional[str]]:
+    for attempt in range(1, retries + 2):
+        try:
+            result = await client.import_contacts(field_names, batch.rows, **options)
+            return batch, result, None
+        except Exception as exc:
+            gmu_logger.warning(f"importContacts batch {batch.index} failed (attempt {attempt}): {exc}")
+            if attempt > retries:
+                return batch, None, str(exc)
+            await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+
+def _collect(report: ImportReport, checkpoint: Checkpoint, batch: Batch, result: Optional[dict],
+             error: Optional[str]):
+    if error is not None:
+        report.failed_batches.append((batch.index, batch.line_numbers[0], error))
+        return
+    report.rows_sent += len(batch.rows)
+    report.batches_sent += 1
+    for item in result.get("log") or []:
+        if len(report.invalid_rows) >= MAX_REPORTED_ROWS:
+            break
+        try:
+            line = batch.line_numbers[int(item.get("index"))]
+        except (TypeError, ValueError, IndexError):
+            continue
+        report.invalid_rows.append((line, item.get("message") or item.get("code") or ""))
+    checkpoint.mark_done(batch, result)
+
+
+async def _import(batches: Iterator[Batch], field_names: List[str], checkpoint: Checkpoint, options: dict,
+                  concurrency: Optional[int], retries: int, report: ImportReport,
+                  on_progress: Callable[[ImportReport], None]):
+    last_progress = time.perf_counter()
+    async with AsyncUnisenderClient(max_concurrency=concurrency) as client:
+        limit = client.max_concurrency
+        pending = set()
+
+        def collect(done):
+            for task in done:
+                _collect(report, checkpoint, *task.result())
+
+        for batch in batches:
+            if batch.index in checkpoint.done:
+                report.rows_skipped += len(batch.rows)
+                continue
+            # Новый пакет читается из файла, только когда освободилось место: память не растет с размером файла.
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+            pending.add(asyncio.create_task(_send_batch(client, batch, field_names, options, retries)))
+            if time.perf_counter() - last_progress >= PROGRESS_INTERVAL:
+                on_progress(report)
+                last_progress = time.perf_counter()
+        if pending:
+            collect((await asyncio.wait(pending))[0])
+
+
+class ContactImport:
+    """
+    Импорт одного CSV: заголовок читается сразу, строки - потоково в run().
+    list_id добавляет колонку email_list_ids, если ее нет в файле.
+    """
+
+    def __init__(self, csv_path: str, list_id: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: Optional[int] = None, retries: int = DEFAULT_RETRIES, overwrite_tags: bool = False,
+                 overwrite_lists: bool = False, delimiter: Optional[str] = None, gzip: bool = False):
+        self.csv_path = csv_path
+        self.batch_size = max(1, min(batch_size, IMPORT_CONTACTS_MAX_ROWS))
+        self.concurrency = concurrency
+        self.retries = retries
+        self.delimiter = delimiter
+        self.field_names = read_header(csv_path, delimiter)
+        self.extra_values = []
+        if list_id is not None and "email_list_ids" not in self.field_names:
+            self.field_names.append("email_list_ids")
+            self.extra_values.append(str(list_id))
+        self.options = {"overwrite_tags": int(overwrite_tags), "overwrite_lists": int(overwrite_lists),
+                        "request_compression": "gzip" if gzip else None}
+        self.checkpoint = Checkpoint(csv_path, {"batch_size": self.batch_size, "field_names": self.field_names,
+                                                "extra_values": self.extra_values, **self.options})
+
+    def run(self, on_progress: Callable[[ImportReport], None] = lambda report: None) -> ImportReport:
+        """Отправляет незавершенные пакеты; чекпоинт удаляется, если ошибок не осталось."""
+        report = ImportReport()
+        batches = iter_batches(self.csv_path, self.batch_size, self.delimiter, self.extra_values)
+        asyncio.run(_import(batches, self.field_names, self.checkpoint, self.options, self.concurrency,
+                            self.retries, report, on_progress))
+        report.elapsed = time.perf_counter() - report.started
+        if not report.failed_batches:
+            self.checkpoint.delete()
+        return report
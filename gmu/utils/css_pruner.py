@@ -0,0 +1,451 @@
+"""
+Удаляет CSS-правила, которые ничему в письме не соответствуют, перед инлайнингом Juice.
+
+Письма используют общую большую библиотеку стилей, поэтому большинство
+селекторов в блоках <style> не находят ни одного элемента. Без них инлайнинг
+быстрее, а сохраняемая часть стилей (media-запросы, псевдоклассы) меньше.
+
+Очистка осторожная: блок <style>, который не удалось разобрать, селектор,
+который soupsieve не умеет проверить, и селекторы для разметки, которую
+добавляют сами почтовые клиенты (Outlook.com, Apple Mail, Gmail, Yahoo,
+темная тема Outlook), остаются как есть. Разметка внутри условных
+комментариев <!--[if mso]>...<![endif]--> не попадает в дерево документа,
+поэтому селектор, класс, id или тег которого встречается в такой разметке,
+тоже сохраняется. Блоки <style data-embed>, которые
+пропускает и Juice, не трогаются. Остальное решает конфиг Juice:
+  * preserveMediaQueries: неиспользуемые правила внутри @media удаляются,
+    пустые @media убираются; при false @media остается на усмотрение Juice;
+  * preservePseudos: правило :hover/::before остается, пока есть его элемент;
+    при false и включенном removeStyleTags такие правила удаляет Juice, значит и очистка;
+  * preserveFontFaces / preserveKeyFrames: при false удаляются @font-face и
+    @keyframes, на которые ничто не ссылается.
+
+GMU_PRUNE_CSS=0 выключает этот этап.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup, Comment
+
+from gmu.utils.custom_css_inliner import juice_config_path
+
+# Значения по умолчанию самого Juice.
+DEFAULT_PRESERVE_FLAGS = {
+    "preserveMediaQueries": True,
+    "preserveFontFaces": True,
+    "preserveKeyFrames": True,
+    "preservePseudos": True,
+    "removeStyleTags": True,
+}
+
+# Разметка, которую добавляют почтовые клиенты: в исходном HTML ее нет, но правила для нее нужны.
+CLIENT_HACK_SELECTOR = re.compile(
+    r"ExternalClass|ReadMsgBody|#outlook|MessageViewBody|MessageWebViewDiv|x-apple-data-detectors"
+    r"|data-ogsc|data-ogsb|\[owa\]|yshortcuts|\bu\s*\+|#body\b|\.body\b|\bmso|\[class\^?=|\[id\^?=",
+    re.IGNORECASE,
+)
+
+# Псевдоклассы и псевдоэлементы, которые зависят от состояния или создают содержимое:
+# по исходной разметке проверяется селектор без них.
+_DYNAMIC_PSEUDO = re.compile(
+    r"::?(?:-[a-z-]+|hover|active|focus|focus-within|focus-visible|visited|link|target|checked"
+    r"|before|after|first-line|first-letter|selection|placeholder|marker|backdrop)\b(?:\([^)]*\))?",
+    re.IGNORECASE,
+)
+_FUNCTIONAL_PSEUDO = re.compile(r":(?:not|is|where|has|matches|-webkit-any|-moz-any)\([^()]*\)", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"\[[^\]]*\]")
+_CLASS_TOKEN = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_ID_TOKEN = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+_FONT_FAMILY = re.compile(r"font-family\s*:\s*([^;}]+)", re.IGNORECASE)
+_KEYFRAMES_NAME = re.compile(r"@(?:-[a-z]+-)?keyframes\s+([^\s{]+)", re.IGNORECASE)
+_TAG_TOKEN = re.compile(r"(?:^|[\s>+~,(])([a-zA-Z][\w-]*(?::[a-zA-Z][\w-]*)?)")
+# Тело условного комментария Outlook: <!--[if mso]>...<![endif]-->.
+_CONDITIONAL_BODY = re.compile(r"^\s*\[if\b[^\]]*\]>(.*)<!\[endif\]\s*$", re.DOTALL | re.IGNORECASE)
+
+_MEDIA_LIKE = {"media", "supports"}
+_DOUBLE_QUOTED = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SINGLE_QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'", re.DOTALL)
+
+
+class CssParseError(ValueError):
+    """Стили не удается надежно разбить на правила."""
+
+
+@dataclass
+class CssItem:
+    kind: str  # "rule", "at-block", "at-statement"
+    leading: str  # пробелы и комментарии перед правилом
+    prelude: str
+    body: Optional[str] = None
+    name: str = ""
+
+    def text(self, prelude: Optional[str] = None, body: Optional[str] = None) -> str:
+        prelude = self.prelude if prelude is None else prelude
+        if self.kind == "at-statement":
+            return f"{self.leading}{prelude};"
+        return f"{self.leading}{prelude}{{{self.body if body is None else body}}}"
+
+
+@dataclass
+class PruneStats:
+    rules_before: int = 0
+    rules_removed: int = 0
+    selectors_removed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    skipped_blocks: List[str] = field(default_factory=list)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def is_pruning_enabled() -> bool:
+    return os.environ.get("GMU_PRUNE_CSS", "1").lower() not in ("0", "false", "no", "off")
+
+
+def read_preserve_flags(config_path=None) -> Dict[str, bool]:
+    """Флаги preserve* и removeStyleTags из juice_config.js; не заданные там - как в Juice."""
+    flags = dict(DEFAULT_PRESERVE_FLAGS)
+    try:
+        with open(config_path or juice_config_path(), "r", encoding="utf-8") as f:
+            source = f.read()
+    except OSError:
+        return flags
+    source = re.sub(r"//[^\n]*|/\*.*?\*/", "", source, flags=re.DOTALL)
+    for key in flags:
+        match = re.search(rf"\b{key}\s*:\s*(true|false)\b", source)
+        if match:
+            flags[key] = match.group(1) == "true"
+    return flags
+
+
+def _skip_string(css: str, i: int) -> int:
+    match = (_DOUBLE_QUOTED if css[i] == '"' else _SINGLE_QUOTED).match(css, i)
+    if match is None:
+        raise CssParseError("Unterminated string")
+    return match.end()
+
+
+def _skip_comment(css: str, i: int) -> int:
+    end = css.find("*/", i + 2)
+    if end < 0:
+        raise CssParseError("Unterminated comment")
+    return end + 2
+
+
+# Пробелы и комментарии между правилами; HTML-комментарии внутри <style> браузер игнорирует.
+_TRIVIA = re.compile(r"(?:\s+|/\*.*?\*/|<!--|-->)*", re.DOTALL)
+_BLOCK_TOKENS = re.compile(r"[\"'{}]|/\*")
+_scan_patterns: Dict[str, "re.Pattern"] = {}
+
+
+def _scan_to(css: str, i: int, stops: str) -> int:
+    """Индекс первого символа из stops вне строк, комментариев и скобок."""
+    pattern = _scan_patterns.get(stops)
+    if pattern is None:
+        pattern = _scan_patterns[stops] = re.compile(r"[\"'()\[\]" + re.escape(stops) + r"]|/\*")
+    depth = 0
+    while True:
+        match = pattern.search(css, i)
+        if match is None:
+            return -1
+        i = match.start()
+        char = css[i]
+        if char in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if char == "/":
+            i = _skip_comment(css, i)
+            continue
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0:
+            return i
+        i += 1
+
+
+def _block_end(css: str, open_index: int) -> int:
+    """Индекс закрывающей скобки блока, открытого в open_index."""
+    depth = 0
+    i = open_index
+    while True:
+        match = _BLOCK_TOKENS.search(css, i)
+        if match is None:
+            raise CssParseError("Unbalanced braces")
+        i = match.start()
+        char = css[i]
+        if char in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if char == "/":
+            i = _skip_comment(css, i)
+            continue
+        if char == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+
+
+def parse_stylesheet(css: str) -> tuple:
+    """(список правил, хвост из пробелов и комментариев)."""
+    items = []
+    i = 0
+    while True:
+        start = i
+        i = _TRIVIA.match(css, i).end()
+        leading = css[start:i]
+        if i >= len(css):
+            return items, leading
+        if css[i] == "}":
+            raise CssParseError("Unexpected '}'")
+
+        stop = _scan_to(css, i, "{;}")
+        if stop < 0:
+            raise CssParseError("Unterminated rule")
+        prelude = css[i:stop]
+        if css[stop] == "}":
+            raise CssParseError("Unexpected '}'")
+
+        if css[i] == "@":
+            name = re.match(r"@([-\w]+)", prelude)
+            name = name.group(1).lower() if name else ""
+            if css[stop] == ";":
+                items.append(CssItem("at-statement", leading, prelude, name=name))
+                i = stop + 1
+                continue
+            end = _block_end(css, stop)
+            items.append(CssItem("at-block", leading, prelude, css[stop + 1:end], name=name))
+        else:
+            if css[stop] == ";":
+                raise CssParseError("Declaration outside of a rule")
+            end = _block_end(css, stop)
+            items.append(CssItem("rule", leading, prelude, css[stop + 1:end]))
+        i = end + 1
+
+
+def split_selectors(prelude: str) -> List[str]:
+    selectors = []
+    start = 0
+    while True:
+        comma = _scan_to(prelude, start, ",")
+        if comma < 0:
+            selectors.append(prelude[start:])
+            return [selector for selector in selectors if selector.strip()]
+        selectors.append(prelude[start:comma])
+        start = comma + 1
+
+
+class SelectorMatcher:
+    """
+    Проверяет селекторы на soup. Элементы проиндексированы по классам, id и тегам:
+    селектор с отсутствующим в документе классом или id отбрасывается сразу, остальные
+    проверяются soupsieve только на самом коротком списке подходящих элементов.
+    """
+
+    def __init__(self, soup: BeautifulSoup, drop_pseudos: bool = False):
+        self.soup = soup
+        self.drop_pseudos = drop_pseudos
+        self.by_class: Dict[str, list] = {}
+        self.by_id: Dict[str, list] = {}
+        self.by_tag: Dict[str, list] = {}
+        for tag in soup.find_all(True):
+            self.by_tag.setdefault(tag.name, []).append(tag)
+            for name in tag.get("class") or []:
+                self.by_class.setdefault(name, []).append(tag)
+            if tag.get("id"):
+                self.by_id.setdefault(tag["id"], []).append(tag)
+        self.conditional_classes, self.conditional_ids, self.conditional_tags = set(), set(), set()
+        self._index_conditional_comments()
+        self._results: Dict[str, bool] = {}
+
+    def _index_conditional_comments(self):
+        """Классы, id и теги разметки внутри условных комментариев (в том числе вложенных)."""
+        pending = [str(comment) for comment in self.soup.find_all(string=lambda text: isinstance(text, Comment))]
+        while pending:
+            match = _CONDITIONAL_BODY.match(pending.pop())
+            if match is None:
+                continue
+            fragment = BeautifulSoup(match.group(1), "html.parser")
+            for tag in fragment.find_all(True):
+                self.conditional_tags.add(tag.name.lower())
+                self.conditional_classes.update(tag.get("class") or [])
+                if tag.get("id"):
+                    self.conditional_ids.add(tag["id"])
+            pending.extend(str(comment) for comment in fragment.find_all(string=lambda text: isinstance(text, Comment)))
+
+    def _in_conditional(self, selector: str) -> bool:
+        # Структуру между деревом и условной разметкой не проверить: достаточно одного совпадения.
+        selector = _ATTRIBUTE.sub("", selector.replace("\\", ""))
+        if any(name in self.conditional_classes for name in _CLASS_TOKEN.findall(selector)):
+            return True
+        if any(name in self.conditional_ids for name in _ID_TOKEN.findall(selector)):
+            return True
+        # table, td и другие общие теги есть почти в любом условном блоке, поэтому
+        # учитываются только теги, которых нет в самом документе (v:roundrect, o:p).
+        tags = {name.lower() for name in _TAG_TOKEN.findall(selector)}
+        tags |= {name.split(":")[0] for name in tags}
+        return any(name in self.conditional_tags and name not in self.by_tag for name in tags)
+
+    def _has_match(self, selector: str) -> bool:
+        if "\\" in selector:
+            return self.soup.select_one(selector) is not None
+        simplified = _ATTRIBUTE.sub("", selector)
+        previous = None
+        while previous != simplified:
+            previous, simplified = simplified, _FUNCTIONAL_PSEUDO.sub("", simplified)
+
+        # Класс или id, которого нет в документе: совпадений точно нет.
+        anchors = [self.by_class.get(name, []) for name in _CLASS_TOKEN.findall(simplified)]
+        anchors += [self.by_id.get(name, []) for name in _ID_TOKEN.findall(simplified)]
+        if any(not elements for elements in anchors):
+            return False
+
+        compiled = soupsieve.compile(selector)
+        compound = re.split(r"[\s>+~]+", simplified.strip())[-1]
+        tag_name = re.match(r"[a-zA-Z][\w-]*", compound)
+        rightmost = [self.by_class[name] for name in _CLASS_TOKEN.findall(compound)]
+        rightmost += [self.by_id[name] for name in _ID_TOKEN.findall(compound)]
+        if tag_name:
+            rightmost.append(self.by_tag.get(tag_name.group(0).lower(), []))
+        if "(" in simplified or "|" in simplified:
+            rightmost = []
+
+        # Самый короткий список кандидатов: элементы под правую часть селектора
+        # или поддеревья самого редкого класса (для селекторов без + и ~).
+        best_rightmost = min(rightmost, key=len) if rightmost else None
+        best_anchor = min(anchors, key=len) if anchors and not re.search(r"[+~]", simplified) else None
+        if best_rightmost is not None and (best_anchor is None or len(best_rightmost) <= len(best_anchor)):
+            return any(compiled.match(tag) for tag in best_rightmost)
+        if best_anchor is not None:
+            return any(compiled.match(tag) or compiled.select_one(tag) is not None for tag in best_anchor)
+        return compiled.select_one(self.soup) is not None
+
+    def keep(self, selector: str) -> bool:
+        selector = selector.strip()
+        if selector not in self._results:
+            self._results[selector] = self._keep(selector)
+        return self._results[selector]
+
+    def _keep(self, selector: str) -> bool:
+        if CLIENT_HACK_SELECTOR.search(selector):
+            return True
+        if self.drop_pseudos and _DYNAMIC_PSEUDO.search(selector):
+            return False
+        base = _DYNAMIC_PSEUDO.sub("", selector).strip()
+        if self._in_conditional(base):
+            return True
+        if not base or base[-1] in ">+~":
+            base = (base + " *").strip()
+        try:
+            return self._has_match(base)
+        except Exception:
+            # Селектор, который soupsieve не понимает, лучше оставить.
+            return True
+
+
+def _referenced_names(css: str, soup: BeautifulSoup) -> str:
+    """Текст, в котором ищутся имена шрифтов и анимаций: CSS и inline-стили."""
+    inline = " ".join(tag.get("style", "") for tag in soup.find_all(style=True))
+    return css + " " + inline
+
+
+class CssPruner:
+    def __init__(self, soup: BeautifulSoup, flags: Optional[Dict[str, bool]] = None):
+        self.soup = soup
+        self.flags = flags or read_preserve_flags()
+        self.matcher = SelectorMatcher(
+            soup, drop_pseudos=not self.flags["preservePseudos"] and self.flags["removeStyleTags"])
+        self.stats = PruneStats()
+
+    def _prune_items(self, items: List[CssItem]) -> List[str]:
+        parts = []
+        for item in items:
+            if item.kind == "rule":
+                self.stats.rules_before += 1
+                selectors = split_selectors(item.prelude)
+                kept = [selector for selector in selectors if self.matcher.keep(selector)]
+                if not kept:
+                    self.stats.rules_removed += 1
+                    continue
+                if len(kept) < len(selectors):
+                    self.stats.selectors_removed += len(selectors) - len(kept)
+                    trailing = item.prelude[len(item.prelude.rstrip()):]
+                    prelude = ",".join(kept).strip() + trailing
+                    parts.append(item.text(prelude=prelude))
+                else:
+                    parts.append(item.text())
+            elif item.kind == "at-block" and item.name in _MEDIA_LIKE:
+                if item.name == "media" and not self.flags["preserveMediaQueries"]:
+                    parts.append(item.text())
+                    continue
+                inner_items, tail = parse_stylesheet(item.body)
+                inner = self._prune_items(inner_items)
+                if inner:
+                    parts.append(item.text(body="".join(inner) + tail))
+            else:
+                parts.append(item.text())
+        return parts
+
+    def _drop_unused_definitions(self, parts: List[str]) -> List[str]:
+        """@font-face и @keyframes без ссылок на них, если Juice не просили их сохранять."""
+        drop_fonts = not self.flags["preserveFontFaces"]
+        drop_keyframes = not self.flags["preserveKeyFrames"]
+        if not (drop_fonts or drop_keyframes):
+            return parts
+
+        references = _referenced_names("".join(
+            part for part in parts
+            if not re.match(r"\s*@(font-face|(-[a-z]+-)?keyframes)", part, re.IGNORECASE)), self.soup)
+        result = []
+        for part in parts:
+            stripped = part.lstrip()
+            if drop_fonts and stripped.lower().startswith("@font-face"):
+                family = _FONT_FAMILY.search(stripped)
+                name = family.group(1).strip().strip("\"'") if family else ""
+                if name and name not in references:
+                    self.stats.rules_removed += 1
+                    continue
+            keyframes = _KEYFRAMES_NAME.match(stripped) if drop_keyframes else None
+            if keyframes and keyframes.group(1) not in references:
+                self.stats.rules_removed += 1
+                continue
+            result.append(part)
+        return result
+
+    def prune_css(self, css: str) -> str:
+        items, tail = parse_stylesheet(css)
+        parts = self._drop_unused_definitions(self._prune_items(items))
+        return "".join(parts) + tail
+
+    def prune(self) -> PruneStats:
+        """Чистит все <style> в soup на месте и возвращает статистику."""
+        for style in self.soup.find_all("style"):
+            if style.has_attr("data-embed"):
+                continue
+            css = style.string
+            if not css or not css.strip():
+                continue
+            try:
+                pruned = self.prune_css(str(css))
+            except CssParseError as exc:
+                self.stats.skipped_blocks.append(str(exc))
+                continue
+            self.stats.bytes_before += len(css.encode("utf-8"))
+            self.stats.bytes_after += len(pruned.encode("utf-8"))
+            if pruned != css:
+                style.string = type(css)(pruned)
+        return self.stats
+
+
+def prune_unused_css(soup: BeautifulSoup) -> PruneStats:
+    return CssPruner(soup).prune()
@@ -1,10 +1,27 @@
 """
 CSS inlining adapter backed by the Node.js Juice package.
+
+Results are cached in ~/.cache/gmu/juice, keyed by the input HTML, the
+Juice config file and the Juice version, so an unchanged letter is not sent
+to Node again. The cache is size-bounded (GMU_JUICE_CACHE_MAX_BYTES) and is
+skipped with `gmu --no-cache` / GMU_NO_CACHE=1. Under `gmu serve` the
+persistent Juice process is sent the config hash with every request and
+reloads its options when the config changes.
 """
 
+import hashlib
+import json
 import os
 import subprocess
 from pathlib import Path
+from typing import Optional
+
+from gmu.utils.disk_cache import MISSING, DiskCache, is_cache_disabled
+from gmu.utils.node_modules import node_environment
+from gmu.utils.node_sidecar import NodeSidecarError, get_sidecar
+from gmu.utils.paths import user_cache_dir
+
+JUICE_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
 
 class JuiceInlinerError(RuntimeError):
@@ -21,15 +38,106 @@ def _format_stderr(stderr: str) -> str:
     return "\n".join(tail)
 
 
+def juice_config_path() -> Path:
+    return Path(os.environ.get("GMU_JUICE_CONFIG") or Path(__file__).with_name("juice_config.js"))
+
+
+def _juice_identity(module_path: str) -> Optional[str]:
+    """Version from Juice's package.json, or the module file's mtime when there is none."""
+    path = Path(module_path)
+    for candidate in (path, *path.parents):
+        package_json = candidate / "package.json"
+        if package_json.is_file():
+            try:
+                package = json.loads(package_json.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                package = {}
+            if package.get("name") == "juice" and package.get("version"):
+                return f"juice@{package['version']}"
+        if candidate.name == "node_modules":
+            break
+    try:
+        stat_result = path.stat()
+    except OSError:
+        return None
+    return f"{path.resolve()}:{stat_result.st_mtime_ns}:{stat_result.st_size}"
+
+
+def _read_config() -> Optional[bytes]:
+    try:
+        return juice_config_path().read_bytes()
+    except OSError:
+        return None
+
+
+def _result_cache_key(html_content: str, env: dict, config: Optional[bytes]) -> Optional[str]:
+    """Cache key, or None while the Juice module path is not known (before node first resolves it)."""
+    module_path = env.get("GMU_JUICE_MODULE")
+    identity = _juice_identity(module_path) if module_path else None
+    if identity is None or config is None:
+        return None
+
+    digest = hashlib.sha256()
+    for part in (identity.encode("utf-8"), config, html_content.encode("utf-8")):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    key = digest.hexdigest()
+    return f"{key[:2]}/{key}"
+
+
+def _result_cache() -> DiskCache:
+    try:
+        max_bytes = int(os.environ.get("GMU_JUICE_CACHE_MAX_BYTES", JUICE_CACHE_MAX_BYTES))
+    except ValueError:
+        max_bytes = JUICE_CACHE_MAX_BYTES
+    return DiskCache(user_cache_dir() / "juice", max_bytes=max_bytes)
+
+
 def inline_css_custom(html_content: str) -> str:
     """Inline CSS with Juice while keeping the historical Python API."""
-    script_path = Path(__file__).with_name("juice_inliner.js")
     node_binary = os.environ.get("GMU_NODE_BINARY", "node")
+    use_cache = not is_cache_disabled()
+    # The config is read once: the same bytes key the cache and tell the sidecar which options to use.
+    config = _read_config()
+    cache_key = _result_cache_key(html_content, node_environment(node_binary), config) if use_cache else None
+    if cache_key:
+        cached = _result_cache().get(cache_key)
+        if cached is not MISSING and isinstance(cached, str):
+            return cached
+
+    result = _run_juice(html_content, node_binary, config)
+
+    if use_cache:
+        # Путь к Juice мог стать известен только после этого запуска node.
+        cache_key = cache_key or _result_cache_key(html_content, node_environment(node_binary), config)
+        if cache_key:
+            _result_cache().set(cache_key, result)
+    return result
+
+
+def _run_juice(html_content: str, node_binary: str, config: Optional[bytes] = None) -> str:
+    sidecar = get_sidecar("juice_inliner.js")
+    if sidecar is not None:
+        # The sidecar outlives config edits; it reloads the options when this hash changes.
+        config_hash = hashlib.sha256(config).hexdigest() if config is not None else None
+        try:
+            return sidecar.call(
+                html_content.encode("utf-8"), config=str(juice_config_path()), config_hash=config_hash,
+            ).decode("utf-8", errors="replace")
+        except NodeSidecarError as exc:
+            raise JuiceInlinerError(
+                "Juice CSS inlining failed. Install npm dependencies with "
+                "`npm install` in the project directory, then run GMU again.\n"
+                f"{_format_stderr(str(exc))}"
+            ) from exc
+
+    script_path = Path(__file__).with_name("juice_inliner.js")
 
     try:
         completed = subprocess.run(
             [node_binary, str(script_path)],
             input=html_content,
+            env=node_environment(node_binary),
             capture_output=True,
             text=True,
             encoding="utf-8",
@@ -0,0 +1,340 @@
+"""
+Демон `gmu serve` и тонкий клиент, который передает ему команды.
+
+Клиент отправляет через Unix-сокет argv, текущую папку, окружение и
+признаки терминала и передает обратно вывод команды, запросы ввода и код
+завершения. Демон держит между командами импортированные модули, Node-процессы,
+кеши картинок и gmu.json и сессию Unisender. Команды выполняются по одной,
+потому что меняют текущую папку, окружение и стандартные потоки процесса демона.
+
+На уровне модуля импортируется только стандартная библиотека: клиентскую
+часть gmu.cli загружает раньше всего остального.
+"""
+
+import builtins
+import importlib
+import io
+import json
+import os
+import pathlib
+import shutil
+import socket
+import struct
+import sys
+import threading
+import traceback
+from typing import Optional
+
+from gmu.utils.paths import daemon_socket_path
+
+_LENGTH = struct.Struct(">I")
+
+# Команды и опции, которые всегда выполняются в текущем процессе.
+LOCAL_COMMANDS = {"serve"}
+LOCAL_OPTIONS = {"--install-completion", "--show-completion"}
+
+
+def send_frame(sock: socket.socket, message: dict):
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[dict]:
+    """Следующее сообщение или None, если соединение закрыто."""
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, _LENGTH.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def connect(path: Optional[pathlib.Path] = None) -> Optional[socket.socket]:
+    """Подключается к демону. None, если демон не запущен или Unix-сокеты недоступны."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path or daemon_socket_path()))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(message: dict, path: Optional[pathlib.Path] = None) -> Optional[dict]:
+    """Отправляет служебное сообщение (ping, shutdown) и возвращает ответ демона."""
+    sock = connect(path)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            send_frame(sock, message)
+            return recv_frame(sock)
+        except OSError:
+            return None
+
+
+def should_forward(argv: list) -> bool:
+    if os.environ.get("GMU_NO_DAEMON", "").lower() in ("1", "true", "yes"):
+        return False
+    if "_GMU_COMPLETE" in os.environ or LOCAL_OPTIONS.intersection(argv):
+        return False
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    return command not in LOCAL_COMMANDS
+
+
+def forward(argv: list) -> Optional[int]:
+    """
+    Выполняет команду в запущенном `gmu serve` и возвращает код выхода.
+    None - демон недоступен, команду нужно выполнить в текущем процессе.
+    """
+    if not should_forward(argv):
+        return None
+    sock = connect()
+    if sock is None:
+        return None
+
+    env = dict(os.environ)
+    terminal_size = shutil.get_terminal_size()
+    env.setdefault("COLUMNS", str(terminal_size.columns))
+    env.setdefault("LINES", str(terminal_size.lines))
+
+    with sock:
+        try:
+            send_frame(sock, {
+                "type": "run",
+                "argv": list(argv),
+                "cwd": os.getcwd(),
+                "env": env,
+                "stdout_isatty": sys.stdout.isatty(),
+                "stderr_isatty": sys.stderr.isatty(),
+            })
+        except OSError:
+            # Команда еще не начата, ее можно выполнить локально.
+            return None
+
+        while True:
+            try:
+                message = recv_frame(sock)
+            except OSError:
+                message = None
+            if message is None:
+                sys.stderr.write("gmu serve: соединение с демоном прервано.\n")
+                return 1
+
+            kind = message.get("type")
+            if kind == "stdout":
+                sys.stdout.write(message.get("data", ""))
+                sys.stdout.flush()
+            elif kind == "stderr":
+                sys.stderr.write(message.get("data", ""))
+                sys.stderr.flush()
+            elif kind == "input":
+                try:
+                    line = input(message.get("prompt", ""))
+                except EOFError:
+                    line = None
+                send_frame(sock, {"type": "input", "data": line})
+            elif kind == "exit":
+                return int(message.get("code") or 0)
+
+
+class _Channel:
+    """Соединение с клиентом, в которое одновременно пишут stdout, stderr и input()."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message: dict):
+        with self._lock:
+            send_frame(self.conn, message)
+
+    def input(self, prompt: str = "") -> str:
+        self.send({"type": "input", "prompt": str(prompt)})
+        reply = recv_frame(self.conn)
+        if reply is None or reply.get("data") is None:
+            raise EOFError
+        return reply["data"]
+
+
+class _RemoteStream(io.TextIOBase):
+    def __init__(self, channel: _Channel, name: str, isatty: bool):
+        self._channel = channel
+        self._name = name
+        self._isatty = isatty
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self._isatty
+
+    def write(self, text):
+        if text:
+            self._channel.send({"type": self._name, "data": text})
+        return len(text)
+
+
+# Модули, создающие rich Console при импорте. Консоль запоминает цвета, ширину
+# и признак терминала при создании, поэтому в демоне пересоздается для каждой команды.
+_CONSOLE_MODULES = ("gmu.utils.helpers", "gmu.utils.archive", "gmu.utils.HTMLprocessor")
+
+
+def _reset_client_state():
+    """
+    Сбрасывает то, что модули вычисляют один раз за процесс из окружения и терминала:
+    лимитер запросов (GMU_RATE_LIMIT*) и консоли rich (COLUMNS, цвета, TTY клиента).
+    Вызывается после того, как окружение и потоки клиента уже установлены.
+    """
+    import rich
+    from rich.console import Console
+
+    from gmu.utils.rate_limiter import reset_rate_limiter
+
+    reset_rate_limiter()
+    # Глобальная консоль rich.get_console(), ее использует rich.progress.track.
+    rich._console = None
+    for name in _CONSOLE_MODULES:
+        module = sys.modules.get(name)
+        if module is not None:
+            module.console = Console()
+
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write(f"{code}\n")
+    return 1
+
+
+class DaemonServer:
+    def __init__(self, socket_path: Optional[pathlib.Path] = None):
+        self.socket_path = pathlib.Path(socket_path or daemon_socket_path())
+        self._run_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def warm_up(self):
+        """Импортирует все команды и включает постоянные процессы node."""
+        from gmu.main import GmuGroup
+        from gmu.utils.node_sidecar import enable_sidecars
+
+        enable_sidecars()
+        for entry in GmuGroup.lazy_commands.values():
+            importlib.import_module(entry.import_path.split(":")[0])
+
+    def stop(self):
+        self._stopped.set()
+
+    def serve_forever(self):
+        if request({"type": "ping"}, self.socket_path) is not None:
+            raise RuntimeError(f"Демон gmu уже запущен: {self.socket_path}")
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Сокет доступен только владельцу: клиент передает демону свое окружение.
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        server.settimeout(0.5)
+
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            try:
+                message = recv_frame(conn)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+
+            kind = message.get("type")
+            try:
+                if kind == "ping":
+                    send_frame(conn, {"type": "pong", "pid": os.getpid()})
+                elif kind == "shutdown":
+                    send_frame(conn, {"type": "exit", "code": 0})
+                    self.stop()
+                elif kind == "run":
+                    with self._run_lock:
+                        code = self._run(_Channel(conn), message)
+                    send_frame(conn, {"type": "exit", "code": code})
+            except OSError:
+                # Клиент отключился (например, по Ctrl+C).
+                pass
+
+    def _run(self, channel: _Channel, message: dict) -> int:
+        from dotenv import load_dotenv
+
+        from gmu.main import app, env_path
+
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        saved_stdout, saved_stderr, saved_input = sys.stdout, sys.stderr, builtins.input
+        try:
+            sys.stdout = _RemoteStream(channel, "stdout", message.get("stdout_isatty", False))
+            sys.stderr = _RemoteStream(channel, "stderr", message.get("stderr_isatty", False))
+            builtins.input = channel.input
+
+            os.environ.clear()
+            os.environ.update(message.get("env") or {})
+            os.chdir(message.get("cwd") or saved_cwd)
+            # Как при обычном запуске: .env дополняет, но не перезаписывает окружение клиента.
+            if env_path.exists():
+                load_dotenv(dotenv_path=env_path)
+            load_dotenv()
+            _reset_client_state()
+
+            app(args=list(message.get("argv") or []), prog_name="gmu")
+            return 0
+        except SystemExit as exc:
+            return _exit_code(exc.code)
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.stdout, sys.stderr, builtins.input = saved_stdout, saved_stderr, saved_input
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+            _reset_client_state()
@@ -0,0 +1,106 @@
+"""
+Небольшой кеш ключ-значение на диске с TTL, который задается при чтении.
+
+Ключи - пути через косую черту ('getMessage/123/<hash>'), поэтому
+`invalidate` удаляет сразу все записи с одним префиксом. С `max_bytes`
+размер кеша ограничен: чтение обновляет mtime записи, а запись удаляет
+самые давно использованные записи сверх лимита.
+"""
+
+import json
+import os
+import pathlib
+import re
+import shutil
+import time
+from typing import Any, Optional
+
+MISSING = object()
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def is_cache_disabled() -> bool:
+    """Кеш выключается опцией `gmu --no-cache` или GMU_NO_CACHE=1."""
+    return os.environ.get("GMU_NO_CACHE", "").lower() in ("1", "true", "yes")
+
+
+class DiskCache:
+    def __init__(self, directory: pathlib.Path, max_bytes: Optional[int] = None):
+        self.directory = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> pathlib.Path:
+        parts = [_UNSAFE_CHARS.sub("_", part) for part in key.split("/") if part]
+        return self.directory.joinpath(*parts).with_suffix(".json")
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Any:
+        """Значение по ключу или MISSING, если записи нет или она старше ttl секунд."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+
+        if ttl is not None and time.time() - float(entry.get("created", 0)) > ttl:
+            return MISSING
+        if self.max_bytes:
+            # mtime - время последнего использования для вытеснения.
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry.get("value", MISSING)
+
+    def set(self, key: str, value: Any) -> bool:
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            return False
+        if self.max_bytes:
+            self.evict(self.max_bytes)
+        return True
+
+    def evict(self, max_bytes: int):
+        """Удаляет давно не использованные записи, пока кеш больше max_bytes."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat_result.st_mtime, stat_result.st_size, path))
+                total += stat_result.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def invalidate(self, prefix: str):
+        """Удаляет все записи, ключ которых начинается с prefix."""
+        parts = [_UNSAFE_CHARS.sub("_", part) for part in prefix.split("/") if part]
+        if not parts:
+            return
+        target = self.directory.joinpath(*parts)
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            target.with_suffix(".json").unlink()
+        except OSError:
+            pass
@@ -0,0 +1,49 @@
+"""
+Файловая блокировка, общая для процессов gmu на одной машине.
+"""
+
+import os
+import pathlib
+import time
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _lock(handle):
+    if os.name == "nt":
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK сдается после ~10 секунд ожидания, пробуем снова.
+                time.sleep(0.05)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(handle):
+    if os.name == "nt":
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Union[str, os.PathLike]) -> Iterator[None]:
+    """Эксклюзивная блокировка файла `path` (файл создается, если его нет)."""
+    lock_path = pathlib.Path(path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        _lock(handle)
+        try:
+            yield
+        finally:
+            _unlock(handle)
@@ -0,0 +1,114 @@
+"""
+Отпечаток обработанного письма, который сохраняется в gmu.json после каждой загрузки.
+
+Имена вложений содержат время и меняются при каждом запуске, поэтому хеш
+тела считается после замены их на хеши содержимого. Так отпечаток зависит
+только от того, что увидит получатель.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import PurePath
+from typing import Any, Dict, Optional
+
+METADATA_FIELDS = ("sender_name", "sender_email", "subject", "preheader")
+COMPARED_PARTS = ("body", "attachments", "metadata")
+
+# Тема и отправитель лежат в <head>; в отпечаток тела они не входят,
+# чтобы их правка считалась изменением только метаданных.
+_METADATA_TAGS = re.compile(
+    r"<title\b[^>]*>.*?</title\s*>|<meta\b[^>]*\bname=[\"']?sender-(?:name|email)\b[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _sha256(value: bytes) -> str:
+    return hashlib.sha256(value).hexdigest()
+
+
+def _replace_names(body: str, renames: Dict[str, str]) -> str:
+    """Заменяет имена файлов за один проход, чтобы замены не цеплялись друг за друга."""
+    if not renames:
+        return body
+    # Длинные имена идут первыми, чтобы не совпасть по общему префиксу.
+    pattern = re.compile("|".join(
+        re.escape(name) for name in sorted(renames, key=len, reverse=True)))
+    return pattern.sub(lambda match: renames[match.group(0)], body)
+
+
+def images_signature(images_folder: str) -> list:
+    """[относительный путь, размер, mtime] каждого файла в папке картинок."""
+    images_folder = images_folder or "images"
+    files = []
+    for root, _, names in os.walk(images_folder):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            files.append([os.path.relpath(path, images_folder), stat_result.st_size, stat_result.st_mtime_ns])
+    return sorted(files)
+
+
+def strip_metadata_tags(html: str) -> str:
+    """HTML без <title> и meta-тегов отправителя."""
+    return _METADATA_TAGS.sub("", html)
+
+
+def metadata_digest(data: dict, list_id: Optional[int] = None) -> str:
+    metadata = {field: data.get(field) for field in METADATA_FIELDS}
+    metadata["list_id"] = list_id
+    return _sha256(json.dumps(metadata, sort_keys=True).encode("utf-8"))
+
+
+def _stable_body(body: str, attachment_digests: Dict[str, str]) -> str:
+    body = strip_metadata_tags(body)
+    return _replace_names(body, {
+        name: digest[:16] + PurePath(name).suffix
+        for name, digest in attachment_digests.items()
+    })
+
+
+def letter_fingerprint(process_result: dict, list_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Считает отпечаток результата HTMLProcessor.process().
+    attachment_names хранит соответствие "хеш содержимого -> имя вложения",
+    чтобы при обновлении письма можно было сослаться на уже загруженные файлы.
+    """
+    data = process_result.get("data", {})
+    attachments = process_result.get("attachments") or {}
+    digests = {name: _sha256(content) for name, content in attachments.items()}
+
+    body = _stable_body(process_result.get("inlined_html") or "", digests)
+
+    return {
+        "body": _sha256(json.dumps([body, data.get("language")]).encode("utf-8")),
+        "attachments": _sha256(json.dumps(sorted(digests.values())).encode("utf-8")),
+        "metadata": metadata_digest(data, list_id),
+        "attachment_names": {digest: name for name, digest in digests.items()},
+    }
+
+
+def changed_parts(previous: Optional[dict], current: dict) -> set:
+    """Какие части отпечатка (body, attachments, metadata) отличаются."""
+    previous = previous or {}
+    return {part for part in COMPARED_PARTS if previous.get(part) != current.get(part)}
+
+
+def reuse_attachment_names(process_result: dict, previous: dict) -> str:
+    """
+    Возвращает тело письма, в котором новые имена вложений заменены на имена,
+    под которыми те же файлы уже загружены в Unisender.
+    """
+    body = process_result.get("inlined_html") or ""
+    uploaded_names = previous.get("attachment_names") or {}
+    renames = {}
+    for name, content in (process_result.get("attachments") or {}).items():
+        uploaded_name = uploaded_names.get(_sha256(content))
+        if uploaded_name and uploaded_name != name:
+            renames[name] = uploaded_name
+
+    return _replace_names(body, renames)
@@ -1,11 +1,36 @@
+"""
+Отложенная git-синхронизация.
+
+Команды только добавляют задание в очередь в папке git репозитория
+(.git/gmu-sync-queue.json) и запускают отдельный фоновый процесс. Он ждет,
+пока GMU_SYNC_DELAY секунд не придет новых заданий, и обрабатывает их все
+разом: одно увеличение letter_version на проект и один коммит, pull и push
+только если есть что коммитить или отправлять. `gmu sync status` показывает
+очередь, `gmu sync flush` обрабатывает ее сразу. GMU_SYNC_MODE=inline
+выполняет каждое задание внутри самой команды.
+"""
+
 from __future__ import annotations
 
+import json
+import os
 import subprocess
+import sys
+import time
 from pathlib import Path
+from typing import Optional
 
+from gmu.utils.file_lock import file_lock
+from gmu.utils.GmuConfig import flush_project_states
 from gmu.utils.helpers import table_print
+from gmu.utils.logger import gmu_logger
 from gmu.utils.project_state import bump_letter_version, is_git_auto_sync_enabled
 
+QUEUE_FILE = "gmu-sync-queue.json"
+QUEUE_LOCK_FILE = "gmu-sync-queue.lock"
+PROCESS_LOCK_FILE = "gmu-sync.lock"
+DEFAULT_SYNC_DELAY = 5.0
+
 
 def _format_output(stdout: str, stderr: str) -> str:
     output = "\n".join(part.strip() for part in (stdout, stderr) if part.strip())
@@ -14,11 +39,11 @@ def _format_output(stdout: str, stderr: str) -> str:
     return output
 
 
-def _run_git(args: list[str]) -> tuple[bool, str]:
+def _run_git(args: list[str], cwd: Optional[Path] = None) -> tuple[bool, str]:
     try:
         result = subprocess.run(
             ["git", *args],
-            cwd=Path.cwd(),
+            cwd=cwd or Path.cwd(),
             capture_output=True,
             text=True,
             encoding="utf-8",
@@ -32,40 +57,269 @@ def _run_git(args: list[str]) -> tuple[bool, str]:
     return result.returncode == 0, output
 
 
+def sync_delay() -> float:
+    try:
+        return max(0.0, float(os.environ.get("GMU_SYNC_DELAY", DEFAULT_SYNC_DELAY)))
+    except ValueError:
+        return DEFAULT_SYNC_DELAY
+
+
+class SyncQueue:
+    """Очередь git-синхронизации одного репозитория."""
+
+    def __init__(self, git_dir: Path, work_tree: Path):
+        self.git_dir = Path(git_dir)
+        self.work_tree = Path(work_tree)
+        self.path = self.git_dir / QUEUE_FILE
+        self.lock_path = self.git_dir / QUEUE_LOCK_FILE
+        self.process_lock_path = self.git_dir / PROCESS_LOCK_FILE
+
+    @classmethod
+    def for_cwd(cls, cwd: Optional[Path] = None) -> tuple[Optional["SyncQueue"], str]:
+        """Очередь репозитория, в котором лежит cwd, или (None, вывод git)."""
+        ok, output = _run_git(["rev-parse", "--absolute-git-dir", "--show-toplevel"], cwd=cwd)
+        if not ok:
+            return None, output
+        git_dir, work_tree = output.splitlines()[:2]
+        return cls(Path(git_dir), Path(work_tree)), ""
+
+    def read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        state.setdefault("jobs", [])
+        return state
+
+    def write(self, state: dict):
+        tmp_path = self.path.with_name(f"{QUEUE_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def running_worker(self, state: Optional[dict] = None) -> Optional[int]:
+        """PID работающего фонового обработчика или None."""
+        pid = (state if state is not None else self.read()).get("worker_pid")
+        return pid if _pid_alive(pid) else None
+
+    def add(self, action_name: str, project: Path) -> bool:
+        """Добавляет задачу. True, если нужно запустить фоновый обработчик."""
+        with file_lock(self.lock_path):
+            state = self.read()
+            now = time.time()
+            state["jobs"].append({"action": action_name, "project": str(project), "queued_at": now})
+            state["updated_at"] = now
+            start_worker = not _pid_alive(state.get("worker_pid"))
+            if start_worker:
+                state["worker_pid"] = None
+            self.write(state)
+        return start_worker
+
+    def take_jobs(self) -> list:
+        with file_lock(self.lock_path):
+            state = self.read()
+            jobs, state["jobs"] = state["jobs"], []
+            self.write(state)
+        return jobs
+
+    def finish(self, jobs: list, ok: bool, message: str):
+        """Записывает результат. Невыполненные задачи возвращаются в начало очереди."""
+        with file_lock(self.lock_path):
+            state = self.read()
+            if not ok:
+                state["jobs"] = jobs + state["jobs"]
+            state["last_sync"] = {"time": time.time(), "ok": ok, "message": message}
+            self.write(state)
+
+    def process(self) -> tuple[bool, str]:
+        """Обрабатывает все задачи очереди одним коммитом. Вызывается под process_lock_path."""
+        jobs = self.take_jobs()
+        if not jobs:
+            return True, "Очередь пуста."
+        ok, message = _sync_jobs(self.work_tree, jobs)
+        self.finish(jobs, ok, message)
+        if ok:
+            gmu_logger.info(f"Git sync: {message}")
+        else:
+            gmu_logger.error(f"Git sync failed: {message}")
+        return ok, message
+
+    def flush(self) -> tuple[bool, str]:
+        """Синхронизирует очередь сейчас (дожидается фонового обработчика, если он занят)."""
+        with file_lock(self.process_lock_path):
+            return self.process()
+
+    def run_worker(self):
+        """Фоновый обработчик: ждет паузы в GMU_SYNC_DELAY секунд и синхронизирует пакет."""
+        with file_lock(self.lock_path):
+            state = self.read()
+            if _pid_alive(state.get("worker_pid")) and state["worker_pid"] != os.getpid():
+                return
+            state["worker_pid"] = os.getpid()
+            self.write(state)
+
+        delay = sync_delay()
+        while True:
+            with file_lock(self.lock_path):
+                state = self.read()
+                if not state["jobs"]:
+                    # Решение о выходе и снятие worker_pid - под той же блокировкой,
+                    # что и добавление задач, поэтому новая задача не останется без обработчика.
+                    state["worker_pid"] = None
+                    self.write(state)
+                    return
+            idle = time.time() - float(state.get("updated_at") or 0)
+            if idle < delay:
+                time.sleep(delay - idle)
+                continue
+            with file_lock(self.process_lock_path):
+                ok, _ = self.process()
+            if not ok:
+                # Задачи вернулись в очередь; повторит следующая команда или gmu sync flush.
+                with file_lock(self.lock_path):
+                    state = self.read()
+                    state["worker_pid"] = None
+                    self.write(state)
+                return
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    if os.name == "nt":
+        import ctypes
+
+        process_query_limited_information = 0x1000
+        still_active = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(process_query_limited_information, False, int(pid))
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == still_active
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _start_worker(queue: SyncQueue):
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(
+        [sys.executable, "-m", "gmu.utils.git_sync", "--worker", str(queue.git_dir), str(queue.work_tree)],
+        cwd=queue.work_tree,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        **kwargs,
+    )
+
+
+def _describe_actions(jobs: list) -> str:
+    counts = {}
+    for job in jobs:
+        counts[job["action"]] = counts.get(job["action"], 0) + 1
+    return "\n".join(
+        f"- {action}" + (f" (x{count})" if count > 1 else "") for action, count in counts.items())
+
+
+def _sync_jobs(work_tree: Path, jobs: list) -> tuple[bool, str]:
+    projects = list(dict.fromkeys(Path(job["project"]) for job in jobs))
+    actions = ", ".join(dict.fromkeys(job["action"] for job in jobs))
+    pathspecs = [os.path.relpath(project, work_tree) for project in projects]
+
+    ok, changes = _run_git(["status", "--porcelain", "--", *pathspecs], cwd=work_tree)
+    if not ok:
+        return False, f"git status не выполнен. {changes}"
+    ok, ahead = _run_git(["rev-list", "--count", "@{upstream}..HEAD"], cwd=work_tree)
+    unpushed = ok and ahead.strip() not in ("", "0")
+    if not changes and not unpushed:
+        return True, "Изменений нет, коммит не требуется."
+
+    ok, output = _run_git(["pull"], cwd=work_tree)
+    if not ok:
+        return False, f"git pull не выполнен после: {actions}. {output}"
+
+    commit_message = None
+    if changes:
+        versions = []
+        for project in projects:
+            config_path = project / "gmu.json"
+            if config_path.exists():
+                versions.append(f"{project.name} v {bump_letter_version(str(config_path))}")
+        flush_project_states(reset=True)
+
+        ok, output = _run_git(["add", "--", *pathspecs], cwd=work_tree)
+        if not ok:
+            return False, f"git add не выполнен. {output}"
+
+        commit_message = ", ".join(versions) or ", ".join(project.name for project in projects)
+        ok, output = _run_git(
+            ["commit", "-m", commit_message, "-m", _describe_actions(jobs)], cwd=work_tree)
+        if not ok:
+            return False, f"git commit не выполнен. {output}"
+
+    ok, output = _run_git(["push"], cwd=work_tree)
+    if not ok:
+        return False, f"git push не выполнен. {output}"
+
+    if commit_message is None:
+        return True, "Отправлены ранее созданные коммиты."
+    return True, f"{commit_message} (операций: {len(jobs)})"
+
+
 def run_git_auto_sync(action_name: str = "обновления письма") -> bool:
+    """
+    Ставит git-синхронизацию проекта в очередь и сразу возвращается.
+    Коммит и push выполняет фоновый обработчик (или сама команда при GMU_SYNC_MODE=inline).
+    """
     if not is_git_auto_sync_enabled():
         return False
 
-    ok, output = _run_git(["rev-parse", "--is-inside-work-tree"])
-    if not ok:
+    queue, output = SyncQueue.for_cwd()
+    if queue is None:
         table_print(
             "WARNING",
             f"Git-синхронизация включена, но текущая папка не похожа на git-репозиторий. {output}",
         )
         return False
 
-    ok, output = _run_git(["pull"])
-    if not ok:
-        table_print("ERROR", f"git pull не выполнен после {action_name}. {output}")
-        return False
+    # Изменения команды должны быть на диске до git add.
+    flush_project_states(reset=True)
 
-    version = bump_letter_version()
-    commit_message = f"{Path.cwd().name} v {version}"
+    last_sync = queue.read().get("last_sync") or {}
+    if last_sync and not last_sync.get("ok"):
+        table_print("WARNING", f"Прошлая git-синхронизация не выполнена: {last_sync.get('message')}")
 
-    ok, output = _run_git(["add", "./"])
-    if not ok:
-        table_print("ERROR", f"git add ./ не выполнен. {output}")
-        return False
+    start_worker = queue.add(action_name, Path.cwd().resolve())
 
-    ok, output = _run_git(["commit", "-m", commit_message])
-    if not ok:
-        table_print("ERROR", f"git commit не выполнен. {output}")
-        return False
-
-    ok, output = _run_git(["push"])
-    if not ok:
-        table_print("ERROR", f"git push не выполнен. {output}")
-        return False
+    if os.environ.get("GMU_SYNC_MODE", "").lower() == "inline":
+        ok, message = queue.flush()
+        table_print("SUCCESS" if ok else "ERROR", f"Git-синхронизация: {message}")
+        return ok
 
-    table_print("SUCCESS", f"Git-синхронизация выполнена: {commit_message}")
+    if start_worker:
+        _start_worker(queue)
+    table_print(
+        "INFO",
+        f"Git-синхронизация после {action_name} поставлена в очередь "
+        f"(через {sync_delay():g} с). Статус: gmu sync status",
+    )
     return True
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--worker"]:
+    SyncQueue(Path(sys.argv[2]), Path(sys.argv[3])).run_worker()
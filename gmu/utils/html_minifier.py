@@ -0,0 +1,242 @@
+"""
+Минификация HTML письма после инлайнинга, перед загрузкой.
+
+Работает со строкой HTML, а не с заново разобранным деревом, поэтому
+разметка, которую он не трогает, остается байт в байт:
+  * условные комментарии (`<!--[if mso]>...<![endif]-->`, в том числе
+    вложенные) копируются как есть, маркеры блоков для не-Outlook клиентов
+    (`<!--[if !mso]><!-->` ... `<!--<![endif]-->`) тоже сохраняются;
+  * `<pre>`, `<textarea>` и `<script>` копируются как есть;
+  * остальные комментарии удаляются;
+  * пробелы в тексте схлопываются, а рядом с блочными тегами удаляются;
+  * пробелы между атрибутами и внутри атрибутов `style` сокращаются,
+    последняя `;` удаляется, `0px` становится `0`;
+  * в CSS блоков `<style>` удаляются комментарии и пробелы вокруг скобок и `;`.
+
+Значения атрибутов остаются в кавычках: некоторые веб-почты неверно
+обрабатывают атрибуты без кавычек. minify_html() проверяет, что условные
+комментарии и неизменяемые блоки не изменились, и иначе возвращает исходный HTML.
+
+По умолчанию этап выключен; GMU_MINIFY_HTML=1 включает его.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+_TOKEN = re.compile(
+    r"""
+    (?P<revealed_open><!--\[if[^\]]*\]><!-->)
+  | (?P<revealed_close><!--<!\[endif\]-->)
+  | (?P<conditional><!--\[if[^\]]*\]>.*?<!\[endif\]-->)
+  | (?P<comment><!--.*?-->)
+  | (?P<verbatim><(?P<verbatim_name>pre|textarea|script)\b[^>]*>.*?</(?P=verbatim_name)\s*>)
+  | (?P<style_open><style\b[^>]*>)(?P<css>.*?)(?P<style_close></style\s*>)
+  | (?P<tag></?[a-zA-Z][^\s/>]*(?:[^"'>]|"[^"]*"|'[^']*')*>)
+  | (?P<declaration><![^>]*>)
+  | (?P<text>[^<]+|<)
+    """,
+    re.DOTALL | re.IGNORECASE | re.VERBOSE,
+)
+
+_CONDITIONAL_MARKER = re.compile(r"<!--\[if[^\]]*\]>(?!<!-->)|<!\[endif\]-->", re.IGNORECASE)
+
+_BLOCK_TAGS = {
+    "html", "head", "body", "meta", "title", "link", "style", "base",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "caption", "col", "colgroup",
+    "div", "p", "center", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ol", "li", "blockquote", "section", "article", "header", "footer", "main",
+    "nav", "aside", "figure", "form", "fieldset", "noscript",
+}
+
+_ATTRIBUTE = re.compile(r"""\s*([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?""")
+_ZERO_UNIT = re.compile(r"(?<![\w.#-])0(?:px|pt|em|rem)\b", re.IGNORECASE)
+# Пробельные символы HTML и CSS. \s и str.strip() захватывают и неразрывный пробел U+00A0,
+# а он значим: "100\xa0₽" не переносится, из \xa0 собирают отступ прехедера.
+_WHITESPACE = " \t\r\n\f"
+_SPACES = re.compile(r"[ \t\r\n\f]+")
+
+
+@dataclass
+class MinifyStats:
+    bytes_before: int = 0
+    bytes_after: int = 0
+    reverted: bool = False
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def is_minify_enabled() -> bool:
+    return os.environ.get("GMU_MINIFY_HTML", "").lower() in ("1", "true", "yes", "on")
+
+
+def _split_outside_quotes(value: str, separator: str) -> List[str]:
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for index, char in enumerate(value):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == separator and depth == 0:
+            parts.append(value[start:index])
+            start = index + 1
+    parts.append(value[start:])
+    return parts
+
+
+def minify_style(style: str) -> str:
+    """`color : red ; margin: 0px  auto;` -> `color:red;margin:0 auto`."""
+    declarations = []
+    for declaration in _split_outside_quotes(style, ";"):
+        declaration = declaration.strip(_WHITESPACE)
+        if not declaration:
+            continue
+        name, separator, value = declaration.partition(":")
+        if not separator:
+            declarations.append(declaration)
+            continue
+        if "'" in value or '"' in value or "&quot;" in value:
+            # Строки внутри значения (шрифты, url) не трогаем.
+            value = value.strip(_WHITESPACE)
+        else:
+            value = _SPACES.sub(" ", value.strip(_WHITESPACE))
+            value = re.sub(r"[ \t\r\n\f]*,[ \t\r\n\f]*", ",", value)
+            value = re.sub(r"[ \t\r\n\f]*![ \t\r\n\f]*important", "!important", value, flags=re.IGNORECASE)
+            value = _ZERO_UNIT.sub("0", value)
+        declarations.append(f"{name.strip(_WHITESPACE)}:{value}")
+    return ";".join(declarations)
+
+
+def _minify_tag(tag: str) -> str:
+    closing = tag.startswith("</")
+    name_match = re.match(r"</?([^\s/>]+)", tag)
+    name = name_match.group(1)
+    if closing:
+        return f"</{name}>"
+
+    body = tag[name_match.end():-1]
+    self_closing = body.rstrip().endswith("/")
+    if self_closing:
+        body = body.rstrip()[:-1]
+
+    parts = [f"<{name}"]
+    for attribute in _ATTRIBUTE.finditer(body):
+        attr_name, attr_value = attribute.group(1), attribute.group(2)
+        if attr_value is None:
+            parts.append(f" {attr_name}")
+            continue
+        if attr_name.lower() == "style" and attr_value[:1] in "\"'":
+            quote = attr_value[0]
+            attr_value = f"{quote}{minify_style(attr_value[1:-1])}{quote}"
+        parts.append(f" {attr_name}={attr_value}")
+    parts.append("/>" if self_closing else ">")
+    return "".join(parts)
+
+
+def _minify_css(css: str) -> str:
+    pieces = re.split(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""", css)
+    for index in range(0, len(pieces), 2):
+        piece = re.sub(r"/\*.*?\*/", "", pieces[index], flags=re.DOTALL)
+        piece = _SPACES.sub(" ", piece)
+        pieces[index] = re.sub(r" ?([{};]) ?", r"\1", piece)
+    return "".join(pieces).strip(_WHITESPACE)
+
+
+def _tag_name(token: str) -> str:
+    match = re.match(r"</?([a-zA-Z0-9]+)", token)
+    return match.group(1).lower() if match else ""
+
+
+def tokenize_html(html: str) -> List[Tuple[str, str]]:
+    """
+    Разбивает HTML на пары (вид, фрагмент); склейка фрагментов дает исходную строку.
+    Виды: conditional, revealed_open, revealed_close, comment, verbatim, style, tag, declaration, text.
+    """
+    tokens = []
+    position = 0
+    while position < len(html):
+        match = _TOKEN.match(html, position)
+        if match.group("style_open"):
+            kind = "style"
+        elif match.group("verbatim"):
+            kind = "verbatim"
+        else:
+            kind = match.lastgroup
+        end = match.end()
+        if kind == "conditional":
+            end = _conditional_end(html, position) or end
+        tokens.append((kind, html[position:end]))
+        position = end
+    return tokens
+
+
+def _conditional_end(html: str, start: int):
+    """Конец условного комментария с учетом вложенных [if] ... [endif]."""
+    depth = 0
+    for marker in _CONDITIONAL_MARKER.finditer(html, start):
+        depth += 1 if marker.group(0).startswith("<!--") else -1
+        if depth == 0:
+            return marker.end()
+    return None
+
+
+def _is_boundary(token: Tuple[str, str]) -> bool:
+    """Пробелы рядом с этим токеном не влияют на отображение."""
+    kind, value = token
+    if kind in ("conditional", "revealed_open", "revealed_close", "declaration", "style"):
+        return True
+    return kind == "tag" and _tag_name(value) in _BLOCK_TAGS
+
+
+def _protected_parts(html: str) -> List[str]:
+    """Фрагменты, которые минификатор обязан оставить без изменений."""
+    return [
+        value for kind, value in tokenize_html(html)
+        if kind in ("conditional", "verbatim", "revealed_open", "revealed_close")
+    ]
+
+
+def minify_html(html: str) -> Tuple[str, MinifyStats]:
+    tokens = [token for token in tokenize_html(html) if token[0] != "comment"]
+
+    # Соседние текстовые куски (например, вокруг удаленного комментария) склеиваются.
+    merged: List[Tuple[str, str]] = []
+    for token in tokens:
+        if token[0] == "text" and merged and merged[-1][0] == "text":
+            merged[-1] = ("text", merged[-1][1] + token[1])
+        else:
+            merged.append(token)
+
+    output = []
+    for index, (kind, value) in enumerate(merged):
+        if kind == "text":
+            value = _SPACES.sub(" ", value)
+            if index == 0 or _is_boundary(merged[index - 1]):
+                value = value.lstrip(_WHITESPACE)
+            if index == len(merged) - 1 or _is_boundary(merged[index + 1]):
+                value = value.rstrip(_WHITESPACE)
+            output.append(value)
+        elif kind == "tag":
+            output.append(_minify_tag(value))
+        elif kind == "style":
+            match = _TOKEN.match(value)
+            output.append(_minify_tag(match.group("style_open")) + _minify_css(match.group("css")) + "</style>")
+        else:
+            output.append(value)
+
+    result = "".join(output)
+    stats = MinifyStats(len(html.encode("utf-8")), len(result.encode("utf-8")))
+    if _protected_parts(result) != _protected_parts(html):
+        return html, MinifyStats(stats.bytes_before, stats.bytes_before, reverted=True)
+    return result, stats
@@ -1,11 +1,19 @@
+const crypto = require("crypto");
 const fs = require("fs");
 const path = require("path");
 const { resolveNodeModule } = require("./node_module_loader");
+const { serve } = require("./node_sidecar");
 
-function loadJuiceOptions() {
-  const configPath = process.env.GMU_JUICE_CONFIG || path.join(__dirname, "juice_config.js");
+function defaultConfigPath() {
+  return process.env.GMU_JUICE_CONFIG || path.join(__dirname, "juice_config.js");
+}
+
+function loadJuiceOptions(configPath) {
   try {
-    return require(configPath);
+    const resolved = require.resolve(configPath);
+    // The persistent process reloads an edited config instead of reusing the cached module.
+    delete require.cache[resolved];
+    return require(resolved);
   } catch (error) {
     throw new Error(
       `Cannot load Juice config from '${configPath}'. ` +
@@ -14,13 +22,41 @@ function loadJuiceOptions() {
   }
 }
 
-try {
+function configHash(configPath) {
+  try {
+    return crypto.createHash("sha256").update(fs.readFileSync(configPath)).digest("hex");
+  } catch (error) {
+    return null;
+  }
+}
+
+function main() {
   const juice = resolveNodeModule("juice", "GMU_JUICE_MODULE");
-  const juiceOptions = loadJuiceOptions();
+
+  if (process.argv.includes("--serve")) {
+    // Options are reloaded whenever the request names another config or its hash changed,
+    // so results match the config the caller used for its cache key.
+    let loaded = { path: null, hash: null, options: null };
+    serve((header, body) => {
+      const configPath = header.config || defaultConfigPath();
+      const hash = header.config_hash || configHash(configPath);
+      if (loaded.path !== configPath || loaded.hash !== hash) {
+        loaded = { path: configPath, hash, options: loadJuiceOptions(configPath) };
+      }
+      return juice(body.toString("utf8"), loaded.options);
+    });
+    return;
+  }
+
+  const juiceOptions = loadJuiceOptions(defaultConfigPath());
   const html = fs.readFileSync(0, "utf8");
   const result = juice(html, juiceOptions);
 
   process.stdout.write(result);
+}
+
+try {
+  main();
 } catch (error) {
   process.stderr.write(error && error.stack ? error.stack : String(error));
   process.exit(1);
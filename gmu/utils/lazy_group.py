@@ -0,0 +1,78 @@
+"""
+Ленивая загрузка команд верхнего уровня.
+
+Модули команд при импорте тянут Pillow, BeautifulSoup, requests и другие
+библиотеки. Корневая группа знает только путь к модулю, справку и видимость
+каждой команды и импортирует модуль при первом обращении к команде.
+Автодополнение корневого уровня отвечает по одному этому реестру.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import click
+import typer.main
+from click.shell_completion import CompletionItem
+from typer.core import TyperGroup
+
+
+@dataclass(frozen=True)
+class LazyCommand:
+    """
+    import_path : "модуль:атрибут" с Typer-приложением.
+    command     : имя команды внутри приложения. None - приложение целиком
+                  становится группой (как app.add_typer(..., name=...)).
+    help        : краткая справка для автодополнения.
+    hidden      : скрытый псевдоним.
+    """
+    import_path: str
+    command: Optional[str] = None
+    help: str = ""
+    hidden: bool = False
+
+
+class LazyTyperGroup(TyperGroup):
+    """Корневая группа, в которой команды из lazy_commands импортируются по первому обращению."""
+
+    lazy_commands: Dict[str, LazyCommand] = {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        names = super().list_commands(ctx)
+        return names + [name for name in self.lazy_commands if name not in names]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        command = super().get_command(ctx, cmd_name)
+        if command is None and cmd_name in self.lazy_commands:
+            command = self._load(cmd_name, self.lazy_commands[cmd_name])
+            self.commands[cmd_name] = command
+        return command
+
+    def _load(self, cmd_name: str, entry: LazyCommand) -> click.Command:
+        module_name, attr = entry.import_path.split(":")
+        typer_app = getattr(importlib.import_module(module_name), attr)
+
+        if entry.command is None:
+            command = typer.main.get_group(typer_app)
+            command.name = cmd_name
+        else:
+            command = typer.main.get_command(typer_app)
+            if isinstance(command, click.Group):
+                command = command.commands[entry.command]
+        command.hidden = entry.hidden
+        return command
+
+    def shell_complete(self, ctx: click.Context, incomplete: str) -> List[CompletionItem]:
+        results = [
+            CompletionItem(name, help=command.get_short_help_str())
+            for name, command in self.commands.items()
+            if name.startswith(incomplete) and not command.hidden
+        ]
+        results.extend(
+            CompletionItem(name, help=entry.help)
+            for name, entry in self.lazy_commands.items()
+            if name.startswith(incomplete) and not entry.hidden and name not in self.commands
+        )
+        # Опции корневой команды; подкоманды выше уже перечислены без импорта модулей.
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
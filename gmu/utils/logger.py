@@ -1,15 +1,52 @@
+"""
+Запись журналов gmu.log и requests.log.
+
+Логгеры только кладут записи в очередь в памяти. Поток QueueListener
+форматирует их, пишет пачками (файл сбрасывается на диск, когда очередь
+опустела) и ротирует файлы по размеру. Пути к журналам определяются один
+раз за процесс.
+
+GMU_LOG_FORMAT=json переключает оба файла на JSON Lines. GMU_LOG_MAX_BYTES
+и GMU_LOG_BACKUPS настраивают ротацию.
+"""
+
+import atexit
+import datetime
+import json
 import logging
+import logging.handlers
 import os
 import pathlib
 import platform
+import queue
+import sys
+
+DEFAULT_LOG_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+REQUESTS_LOGGER_NAME = "gmu.requests"
+
+
+def _resolve_log_path(candidates):
+    for log_candidate in candidates:
+        try:
+            log_candidate.parent.mkdir(parents=True, exist_ok=True)
+            with open(log_candidate, "a", encoding="utf-8"):
+                pass
+            return log_candidate
+        except OSError:
+            continue
+    return None
 
 
 if platform.system() == "Windows":
     appdata = os.getenv("APPDATA")
     log_candidates = []
+    requests_log_candidates = []
     if appdata:
         log_candidates.append(pathlib.Path(appdata) / "gmu" / 'gmu.log')
+        requests_log_candidates.append(pathlib.Path(appdata) / "GMU" / "requests.log")
     log_candidates.append(pathlib.Path("gmu.log"))
+    requests_log_candidates.append(pathlib.Path("requests.log"))
 else:
     # Linux и macOS
     home = pathlib.Path.home()
@@ -17,29 +54,133 @@ else:
         home / ".config" / "gmu" / "gmu.log",
         pathlib.Path("gmu.log"),
     ]
+    requests_log_candidates = [
+        home / ".config" / "GMU" / "requests.log",
+        pathlib.Path("requests.log"),
+    ]
+
+gmu_log = _resolve_log_path(log_candidates)
+requests_log = _resolve_log_path(requests_log_candidates)
 
-for log_candidate in log_candidates:
+
+def _env_int(name: str, default: int) -> int:
     try:
-        log_candidate.parent.mkdir(parents=True, exist_ok=True)
-        with open(log_candidate, "a", encoding="utf-8"):
-            pass
-        gmu_log = log_candidate
-        break
-    except OSError:
-        continue
-else:
-    gmu_log = None
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Стандартные атрибуты LogRecord; все остальное пришло через extra= и попадает в JSON.
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна запись - один JSON-объект в строке."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
 
-logging_kwargs = {
-    "format": "[%(asctime)s] [%(levelname)s] %(message)s",
-    "datefmt": "%m.%d.%Y %H:%M",
-    "level": logging.INFO,
-}
-if gmu_log is not None:
-    logging_kwargs["filename"] = str(gmu_log)
-    logging_kwargs["encoding"] = "utf-8"
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладет запись в очередь как есть: очередь живет в том же процессе,
+    поэтому форматирование (и str() аргументов) откладывается до потока записи.
+    """
 
-logging.basicConfig(**logging_kwargs)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _BatchingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler, который сбрасывает буфер на диск, только когда очередь
+    опустела, и считает размер файла сам, без tell() на каждую запись.
+    """
+
+    def __init__(self, filename, log_queue: queue.Queue, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding="utf-8", delay=True)
+        self._queue = log_queue
+        self._size = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode("utf-8"))
+            if self._size is None:
+                try:
+                    self._size = os.path.getsize(self.baseFilename)
+                except OSError:
+                    self._size = 0
+            if self.maxBytes > 0 and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._size += size
+            if self._queue.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def _is_request_record(record: logging.LogRecord) -> bool:
+    return record.name == REQUESTS_LOGGER_NAME
+
+
+def _build_handlers(log_queue: queue.Queue) -> list:
+    if os.environ.get("GMU_LOG_FORMAT", "").lower() in ("json", "jsonl"):
+        gmu_formatter = requests_formatter = JsonLinesFormatter()
+    else:
+        gmu_formatter = logging.Formatter(
+            "[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%m.%d.%Y %H:%M")
+        requests_formatter = logging.Formatter("%(message)s")
+    max_bytes = _env_int("GMU_LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES)
+    backup_count = _env_int("GMU_LOG_BACKUPS", DEFAULT_LOG_BACKUPS)
+
+    if gmu_log is not None:
+        gmu_handler = _BatchingRotatingFileHandler(gmu_log, log_queue, max_bytes, backup_count)
+    else:
+        gmu_handler = logging.StreamHandler(sys.stderr)
+    gmu_handler.setFormatter(gmu_formatter)
+    gmu_handler.addFilter(lambda record: not _is_request_record(record))
+    handlers = [gmu_handler]
+
+    if requests_log is not None:
+        requests_handler = _BatchingRotatingFileHandler(
+            requests_log, log_queue, max_bytes, backup_count)
+        requests_handler.setFormatter(requests_formatter)
+        requests_handler.addFilter(_is_request_record)
+        handlers.append(requests_handler)
+    return handlers
+
+
+_log_queue = queue.SimpleQueue()
+_listener = logging.handlers.QueueListener(_log_queue, *_build_handlers(_log_queue))
+_listener.start()
+atexit.register(_listener.stop)
+
+_queue_handler = _DeferredQueueHandler(_log_queue)
+
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(_queue_handler)
 
 gmu_logger = logging.getLogger('gmu_logger')
+
+# Журнал запросов к API пишется только в requests.log.
+requests_logger = logging.getLogger(REQUESTS_LOGGER_NAME)
+requests_logger.setLevel(logging.INFO)
+requests_logger.addHandler(_queue_handler)
+requests_logger.propagate = False
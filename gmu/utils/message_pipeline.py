@@ -0,0 +1,158 @@
+"""
+Загрузка писем в Unisender.
+
+Сначала создается новое письмо, а старое удаляется только после успешного
+создания нового и сборки архива, поэтому неудачный запуск не оставляет проект
+без письма. ZIP-архив собирается параллельно с загрузкой письма.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from gmu.utils.archive import archive_email
+from gmu.utils.fingerprint import changed_parts, letter_fingerprint, reuse_attachment_names
+from gmu.utils.helpers import table_print
+from gmu.utils.logger import gmu_logger
+from gmu.utils.metadata_update import remember_uploaded_body
+from gmu.utils.Unisender import UnisenderClient
+from gmu.utils.unisender_urls import build_unisender_message_url
+
+
+def upload_message(
+    uClient: UnisenderClient,
+    process_result: dict,
+    list_id: int,
+    html_filename: Optional[str] = None,
+    old_message_id: Optional[int] = None,
+) -> int:
+    """
+    Загружает обработанное письмо в Unisender и заполняет process_result['data']
+    полями message_id, message_url и zip_size.
+
+    Архив собирается параллельно с загрузкой письма. Если передан old_message_id,
+    старое письмо удаляется после успешного создания нового и сборки архива.
+    Если архив не собрался, новое письмо все равно записывается в data, а старое
+    не удаляется.
+    """
+    data = process_result.get('data', {})
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        archive_future = pool.submit(
+            archive_email,
+            html_filename,
+            process_result.get('inlined_html'),
+            process_result.get('attachments'),
+        )
+        create_future = pool.submit(
+            uClient.create_email_message,
+            sender_name=data.get('sender_name'),
+            sender_email=data.get('sender_email'),
+            subject=data.get('subject'),
+            body=process_result.get('inlined_html', ''),
+            list_id=int(list_id),
+            attachments=process_result.get('attachments'),
+            lang=data.get('language'),
+        )
+
+        # Если создание не удалось, старое письмо остается нетронутым.
+        api_result = create_future.result()
+        message_id = api_result.get('message_id', '')
+        data['message_id'] = message_id
+        data['message_url'] = build_unisender_message_url(message_id)
+        remember_uploaded_body(data, process_result.get('inlined_html', ''))
+
+        try:
+            data['zip_size'] = os.path.getsize(archive_future.result())
+        except Exception as exc:
+            # Письмо уже создано: его ID нужно сохранить, а старое письмо оставить.
+            gmu_logger.warning(f"Archive for message {message_id} was not built: {exc}")
+            table_print("WARNING", f"Письмо создано, но архив не собран: {exc}")
+            if old_message_id:
+                table_print("WARNING", f"Старое письмо {old_message_id} не удалено.")
+            return message_id
+
+        delete_future = None
+        if old_message_id:
+            delete_future = pool.submit(uClient.delete_message, old_message_id)
+
+        if delete_future is not None:
+            try:
+                delete_future.result()
+            except Exception as exc:
+                gmu_logger.warning(
+                    f"Old message {old_message_id} was not deleted: {exc}")
+                table_print(
+                    "WARNING",
+                    f"Новое письмо создано, но старое письмо {old_message_id} не удалено: {exc}",
+                )
+
+    return message_id
+
+
+def sync_message(
+    uClient: UnisenderClient,
+    process_result: dict,
+    list_id: int,
+    html_filename: Optional[str] = None,
+    previous: Optional[dict] = None,
+    force: bool = False,
+    reupload: bool = False,
+) -> str:
+    """
+    Приводит письмо в Unisender в соответствие с process_result.
+    previous: данные из gmu.json от прошлой загрузки (message_id, upload_fingerprint).
+
+    Возвращает выполненное действие:
+      'unchanged' - письмо не изменилось, запросы к Unisender не выполнялись;
+      'metadata'  - изменились только тема, отправитель или список, письмо обновлено;
+      'updated'   - письмо пересоздано (старое удаляется, если не задан force);
+      'created'   - письма еще не было, оно создано.
+    """
+    data = process_result.setdefault('data', {})
+    fingerprint = letter_fingerprint(process_result, int(list_id))
+    data['upload_fingerprint'] = fingerprint
+
+    previous = previous or {}
+    message_id = previous.get("message_id")
+    if message_id is None:
+        upload_message(uClient, process_result, int(list_id), html_filename)
+        return "created"
+
+    previous_fingerprint = previous.get("upload_fingerprint")
+    changes = changed_parts(previous_fingerprint, fingerprint)
+
+    if not reupload and changes <= {"metadata"}:
+        archive_path = archive_email(html_filename,
+                                     process_result.get('inlined_html'),
+                                     process_result.get('attachments'))
+        data['zip_size'] = os.path.getsize(archive_path)
+        data['message_id'] = message_id
+        data['message_url'] = build_unisender_message_url(message_id)
+        fingerprint['attachment_names'] = previous_fingerprint.get('attachment_names')
+        body = reuse_attachment_names(process_result, previous_fingerprint)
+        if not changes:
+            remember_uploaded_body(data, body)
+            return "unchanged"
+
+        # Тело и вложения те же: достаточно обновить тему и отправителя.
+        uClient.update_email_message(
+            id=message_id,
+            sender_name=data.get('sender_name'),
+            sender_email=data.get('sender_email'),
+            subject=data.get('subject'),
+            body=body,
+            list_id=int(list_id),
+        )
+        remember_uploaded_body(data, body)
+        return "metadata"
+
+    # Новое письмо создается раньше, чем удаляется старое (удаление пропускается с force)
+    upload_message(
+        uClient,
+        process_result,
+        int(list_id),
+        html_filename,
+        old_message_id=None if force else message_id,
+    )
+    return "updated"
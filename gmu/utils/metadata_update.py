@@ -0,0 +1,315 @@
+"""
+Быстрый путь `gmu m update` при правке темы, отправителя и прехедера.
+
+Каждая загрузка в Unisender сохраняет отправленное тело письма в
+~/.cache/gmu/bodies с ключом из ID письма и отпечатка исходников: HTML без
+<title>, meta-тегов отправителя и текста прехедера, файлы папки картинок
+(имя, размер, mtime) и параметры, влияющие на итоговый HTML (конфиг Juice,
+GMU_PRUNE_CSS, GMU_MINIFY_HTML). Отпечаток хранится и в gmu.json как
+source_fingerprint.
+
+Если исходники не изменились, update_metadata() берет тему и отправителя из
+<head> HTML (файл читается один раз: для отпечатка он нужен целиком),
+подставляет их в <title> и meta-теги сохраненного тела, заменяет текст
+прехедера и вызывает updateEmailMessage без обработки картинок, SVG и Juice.
+Если изменились, возвращает None, и команда выполняет полное обновление.
+
+Прехедер - первый <div style="display: none">, как в HTMLProcessor. Быстрый
+путь применяется, только если внутри него нет тегов: разметку прехедера
+обрабатывает Juice. В теле письма прехедер находится по номеру div в
+документе и проверяется по стилю и по тексту из gmu.json.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+
+from gmu.version import VERSION_TEXT
+from gmu.utils.disk_cache import MISSING, DiskCache, is_cache_disabled
+from gmu.utils.fingerprint import images_signature, metadata_digest, strip_metadata_tags
+from gmu.utils.html_minifier import is_minify_enabled, minify_html, tokenize_html
+from gmu.utils.paths import find_html_file, user_cache_dir
+
+BODY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_TITLE = re.compile(r"(<title\b[^>]*>).*?(</title\s*>)", re.IGNORECASE | re.DOTALL)
+_CONTENT_ATTRIBUTE = re.compile(r"""(\bcontent\s*=\s*)("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+_STYLE_ATTRIBUTE = re.compile(r"""(?<![\w-])style\s*=\s*("[^"]*"|'[^']*')""", re.IGNORECASE)
+_DIV_TAG = re.compile(r"<(/?)div\b", re.IGNORECASE)
+_HIDDEN = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _HeadParser(HTMLParser):
+    """Читает <title> и meta-теги отправителя; останавливается на </head> или <body>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.metadata = {"subject": None, "sender_name": None, "sender_email": None}
+        self._title_parts = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == "title":
+            self._title_parts = []
+        elif tag == "meta" and attributes.get("name") in ("sender-name", "sender-email"):
+            field = attributes["name"].replace("-", "_")
+            if self.metadata[field] is None:
+                default = "Unknown Sender" if field == "sender_name" else "Unknown Email"
+                self.metadata[field] = attributes.get("content", default)
+        elif tag == "body":
+            raise _StopParsing
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            if self.metadata["subject"] is None:
+                self.metadata["subject"] = "".join(self._title_parts)
+            self._title_parts = None
+        elif tag == "head":
+            raise _StopParsing
+
+
+def read_head_metadata(html_text: str) -> dict:
+    """Тема и отправитель из <head>; разбор останавливается на </head> или <body>."""
+    parser = _HeadParser()
+    try:
+        parser.feed(html_text)
+    except _StopParsing:
+        pass
+    if parser.metadata["subject"] is None:
+        parser.metadata["subject"] = "No Subject"
+    return parser.metadata
+
+
+def _div_blocks(html_text: str) -> list:
+    """
+    (открывающий тег, начало, конец содержимого) каждого <div> вне комментариев.
+    Конец None, если div не закрыт или внутри есть другой div.
+    """
+    blocks, stack, position = [], [], 0
+    for kind, value in tokenize_html(html_text):
+        start, position = position, position + len(value)
+        match = _DIV_TAG.match(value) if kind == "tag" else None
+        if match is None:
+            continue
+        if match.group(1):
+            if stack:
+                block = blocks[stack.pop()]
+                if not block[3]:
+                    block[2] = start
+        else:
+            if stack:
+                blocks[stack[-1]][3] = True
+            blocks.append([value, position, None, False])
+            stack.append(len(blocks) - 1)
+    return [(tag, start, end) for tag, start, end, _ in blocks]
+
+
+def find_preheader(html_text: str) -> Optional[tuple]:
+    """
+    (номер div, начало, конец) текста прехедера в исходном HTML или None,
+    если прехедера нет или в нем есть теги.
+    """
+    for index, (tag, start, end) in enumerate(_div_blocks(html_text)):
+        style = _STYLE_ATTRIBUTE.search(tag)
+        if style and "display: none" in html.unescape(style.group(1)[1:-1]):
+            if end is None or "<" in html_text[start:end]:
+                return None
+            return index, start, end
+    return None
+
+
+def preheader_text(content: str) -> Optional[str]:
+    """Текст прехедера так же, как его сохраняет HTMLProcessor._extract_preheader."""
+    text = html.unescape(content).strip()
+    if text and not re.fullmatch(r"[\s\u200b\xa0&zwnj; ]+", text):
+        return text
+    return None
+
+
+def _same_text(first: Optional[str], second: Optional[str]) -> bool:
+    return " ".join((first or "").split()) == " ".join((second or "").split())
+
+
+def apply_preheader(body: str, index: int, content: str, previous_text: Optional[str]) -> Optional[str]:
+    """
+    Заменяет текст прехедера в готовом HTML. None, если div с номером index
+    в body не скрыт, содержит теги или его текст не совпадает с previous_text.
+    """
+    blocks = _div_blocks(body)
+    if index >= len(blocks):
+        return None
+    tag, start, end = blocks[index]
+    style = _STYLE_ATTRIBUTE.search(tag)
+    if end is None or style is None or not _HIDDEN.search(style.group(1)):
+        return None
+    current = body[start:end]
+    if "<" in current or not _same_text(preheader_text(current), previous_text):
+        return None
+    return body[:start] + content + body[end:]
+
+
+def _pipeline_options() -> list:
+    from gmu.utils.custom_css_inliner import juice_config_path
+
+    try:
+        juice_config = hashlib.sha256(juice_config_path().read_bytes()).hexdigest()
+    except OSError:
+        juice_config = None
+    return [
+        VERSION_TEXT,
+        juice_config,
+        os.environ.get("GMU_PRUNE_CSS", ""),
+        os.environ.get("GMU_MINIFY_HTML", ""),
+    ]
+
+
+def source_fingerprint(html_text: str, images_folder: str) -> str:
+    """Отпечаток исходников письма без темы и отправителя."""
+    preheader = find_preheader(html_text)
+    if preheader is not None:
+        _, start, end = preheader
+        html_text = html_text[:start] + html_text[end:]
+    digest = hashlib.sha256()
+    digest.update(strip_metadata_tags(html_text).encode("utf-8"))
+    digest.update(json.dumps([images_signature(images_folder), _pipeline_options()]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _body_cache() -> DiskCache:
+    return DiskCache(user_cache_dir() / "bodies", max_bytes=BODY_CACHE_MAX_BYTES)
+
+
+def remember_uploaded_body(data: dict, body: str):
+    """Сохраняет тело, отправленное в Unisender, если известен отпечаток исходников."""
+    if is_cache_disabled() or not data.get("source_fingerprint") or not data.get("message_id"):
+        return
+    _body_cache().set(f"{data['message_id']}/{data['source_fingerprint']}", body)
+
+
+def apply_metadata(body: str, metadata: dict) -> str:
+    """Подставляет новую тему и отправителя в <title> и meta-теги готового HTML."""
+    if metadata.get("subject") is not None:
+        subject = html.escape(metadata["subject"], quote=False)
+        body = _TITLE.sub(lambda match: match.group(1) + subject + match.group(2), body, count=1)
+
+    for field, name in (("sender_name", "sender-name"), ("sender_email", "sender-email")):
+        if metadata.get(field) is None:
+            continue
+        content = '"' + html.escape(metadata[field], quote=True) + '"'
+        meta_tag = re.compile(r"<meta\b[^>]*\bname=[\"']?" + name + r"\b[^>]*>", re.IGNORECASE)
+        body = meta_tag.sub(
+            lambda match: _CONTENT_ATTRIBUTE.sub(lambda attr: attr.group(1) + content, match.group(0), count=1),
+            body,
+        )
+    return body
+
+
+def _patch_archive(archive_path: Path, metadata: dict, preheader: Optional[tuple] = None) -> Optional[int]:
+    """
+    Обновляет index.html в ZIP-архиве письма; возвращает новый размер архива.
+    preheader: аргументы apply_preheader после body.
+    """
+    if not archive_path.exists():
+        return None
+    tmp_path = archive_path.with_name(f"{archive_path.name}.{os.getpid()}.tmp")
+    try:
+        with zipfile.ZipFile(archive_path) as source, \
+                zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                content = source.read(item)
+                if item.filename == "index.html":
+                    content = apply_metadata(content.decode("utf-8"), metadata)
+                    if preheader is not None:
+                        content = apply_preheader(content, *preheader)
+                        if content is None:
+                            raise ValueError("Preheader not found in index.html")
+                target.writestr(item, content)
+        os.replace(tmp_path, archive_path)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        tmp_path.unlink(missing_ok=True)
+        return None
+    return archive_path.stat().st_size
+
+
+def update_metadata(uClient, config_data: dict, list_id: int, html_filename: Optional[str] = None,
+                    images_folder: str = "images") -> Optional[dict]:
+    """
+    Обновляет в Unisender только тему, отправителя, прехедер и список.
+    Возвращает поля для gmu.json или None, если быстрый путь неприменим
+    (изменилось тело или картинки, нет тела в кеше, кеш отключен, прехедер
+    не найден в сохраненном теле).
+    Если не изменилось ничего, запрос к Unisender не выполняется.
+    """
+    message_id = config_data.get("message_id")
+    previous_fingerprint = config_data.get("upload_fingerprint") or {}
+    if is_cache_disabled() or not message_id or not config_data.get("source_fingerprint"):
+        return None
+
+    html_path = find_html_file(html_filename)
+    html_text = html_path.read_text(encoding="utf-8")
+    fingerprint = source_fingerprint(html_text, images_folder)
+    if fingerprint != config_data["source_fingerprint"]:
+        return None
+    body = _body_cache().get(f"{message_id}/{fingerprint}")
+    if body is MISSING or not isinstance(body, str):
+        return None
+
+    metadata = read_head_metadata(html_text)
+    data = {field: metadata[field] for field in ("subject", "sender_name", "sender_email")}
+    # Прехедер с тегами входит в отпечаток: раз отпечаток совпал, он не менялся.
+    data["preheader"] = config_data.get("preheader")
+    preheader = find_preheader(html_text)
+    patch = None
+    if preheader is not None:
+        index, start, end = preheader
+        content = html_text[start:end]
+        data["preheader"] = preheader_text(content)
+        # Как при полной обработке: BeautifulSoup раскрывает сущности и экранирует только &, < и >.
+        content = html.escape(html.unescape(content), quote=False)
+        if is_minify_enabled():
+            content, _ = minify_html(content)
+        patch = (index, content, config_data.get("preheader"))
+    digest = metadata_digest(data, list_id)
+    if digest == previous_fingerprint.get("metadata"):
+        return {}
+
+    if patch is not None:
+        patched = apply_preheader(body, *patch)
+        if patched is None and data["preheader"] != config_data.get("preheader"):
+            return None
+        # Прехедер не изменился, но не найден в теле: тему и отправителя можно обновить и так.
+        body, patch = (body, None) if patched is None else (patched, patch)
+    body = apply_metadata(body, data)
+    uClient.update_email_message(
+        id=message_id,
+        sender_name=data["sender_name"],
+        sender_email=data["sender_email"],
+        subject=data["subject"],
+        body=body,
+        list_id=list_id,
+    )
+    _body_cache().set(f"{message_id}/{fingerprint}", body)
+
+    data["upload_fingerprint"] = {"metadata": digest}
+    # Архив называется так же, как в archive_email: по имени HTML письма.
+    zip_size = _patch_archive(Path(f"{html_path.stem}.zip"), data, patch)
+    if zip_size is not None:
+        data["zip_size"] = zip_size
+    return data
@@ -1,13 +1,72 @@
+const fs = require("fs");
 const path = require("path");
 const { execFileSync } = require("child_process");
 
+// Resolution cache shared with the Python adapters (gmu/utils/node_modules.py).
+// GMU_NODE_MODULE_CACHE is the JSON file, GMU_NODE_MODULE_CACHE_KEY identifies
+// the node binary and search roots of this call.
+const MAX_CACHED_KEYS = 200;
+
 function addUnique(values, value) {
   if (value && !values.includes(value)) {
     values.push(value);
   }
 }
 
+function readCache() {
+  const cacheFile = process.env.GMU_NODE_MODULE_CACHE;
+  if (!cacheFile) {
+    return {};
+  }
+
+  try {
+    return JSON.parse(fs.readFileSync(cacheFile, "utf8"));
+  } catch (_) {
+    return {};
+  }
+}
+
+function updateCache(update) {
+  const cacheFile = process.env.GMU_NODE_MODULE_CACHE;
+  if (!cacheFile) {
+    return;
+  }
+
+  try {
+    const cache = readCache();
+    update(cache);
+    fs.mkdirSync(path.dirname(cacheFile), { recursive: true });
+    const tmpFile = `${cacheFile}.${process.pid}.tmp`;
+    fs.writeFileSync(tmpFile, JSON.stringify(cache, null, 2));
+    fs.renameSync(tmpFile, cacheFile);
+  } catch (_) {
+    // The cache only saves time; resolution works without it.
+  }
+}
+
+function npmRootCacheKey() {
+  return [
+    process.execPath,
+    process.version,
+    process.env.NPM_CONFIG_PREFIX || process.env.npm_config_prefix || "",
+  ].join("|");
+}
+
+function isDirectory(dirPath) {
+  try {
+    return fs.statSync(dirPath).isDirectory();
+  } catch (_) {
+    return false;
+  }
+}
+
 function getGlobalNpmRoot() {
+  const cacheKey = npmRootCacheKey();
+  const cached = (readCache().npmRoots || {})[cacheKey];
+  if (cached && isDirectory(cached.root)) {
+    return cached.root;
+  }
+
   const commands = process.platform === "win32" ? ["npm.cmd", "npm"] : ["npm"];
 
   for (const command of commands) {
@@ -18,6 +77,10 @@ function getGlobalNpmRoot() {
       }).trim();
 
       if (root) {
+        updateCache((cache) => {
+          cache.npmRoots = cache.npmRoots || {};
+          cache.npmRoots[cacheKey] = { root, savedAt: Date.now() };
+        });
         return root;
       }
     } catch (_) {
@@ -66,32 +129,73 @@ function getGlobalModuleRoots() {
   return roots;
 }
 
-function getModuleSearchRoots() {
-  const roots = [
+function getLocalSearchRoots() {
+  return [
     process.cwd(),
     path.resolve(__dirname, "..", ".."),
     __dirname,
     ...((process.env.NODE_PATH || "").split(path.delimiter).filter(Boolean)),
-    ...getGlobalModuleRoots(),
-  ];
+  ].filter(Boolean);
+}
 
-  return roots.filter(Boolean);
+function getModuleSearchRoots() {
+  return [...getLocalSearchRoots(), ...getGlobalModuleRoots()];
 }
 
-function resolveNodeModule(moduleName, envVarName) {
-  if (process.env[envVarName]) {
-    return require(process.env[envVarName]);
+function rememberModule(moduleName, resolved) {
+  const cacheKey = process.env.GMU_NODE_MODULE_CACHE_KEY;
+  if (!cacheKey) {
+    return;
   }
 
-  const attemptedRoots = [];
-  for (const root of getModuleSearchRoots()) {
+  updateCache((cache) => {
+    const modules = (cache.modules = cache.modules || {});
+    const entry = (modules[cacheKey] = modules[cacheKey] || {});
+    entry[moduleName] = {
+      path: resolved,
+      mtimeMs: fs.statSync(resolved).mtimeMs,
+      node: process.version,
+      savedAt: Date.now(),
+    };
+
+    const keys = Object.keys(modules);
+    if (keys.length > MAX_CACHED_KEYS) {
+      const savedAt = (key) => Math.max(...Object.values(modules[key]).map((item) => item.savedAt || 0));
+      keys
+        .sort((left, right) => savedAt(left) - savedAt(right))
+        .slice(0, keys.length - MAX_CACHED_KEYS)
+        .forEach((key) => delete modules[key]);
+    }
+  });
+}
+
+function resolveFromRoots(moduleName, roots, attemptedRoots) {
+  for (const root of roots) {
     try {
-      const resolved = require.resolve(moduleName, { paths: [root] });
-      return require(resolved);
+      return require.resolve(moduleName, { paths: [root] });
     } catch (_) {
       attemptedRoots.push(root);
     }
   }
+  return null;
+}
+
+function resolveNodeModule(moduleName, envVarName) {
+  if (process.env[envVarName]) {
+    return require(process.env[envVarName]);
+  }
+
+  // Global roots need `npm root -g`, so they are only computed when the
+  // module is not installed locally.
+  const attemptedRoots = [];
+  const resolved =
+    resolveFromRoots(moduleName, getLocalSearchRoots(), attemptedRoots) ||
+    resolveFromRoots(moduleName, getGlobalModuleRoots(), attemptedRoots);
+
+  if (resolved) {
+    rememberModule(moduleName, resolved);
+    return require(resolved);
+  }
 
   throw new Error(
     `Cannot load npm package '${moduleName}'. Run \`npm install\` in the ` +
@@ -0,0 +1,93 @@
+"""
+Кеш путей к npm-модулям для Node.js-помощников.
+
+node_module_loader.js записывает каждый найденный модуль (и результат
+`npm root -g`) в ~/.cache/gmu/node-modules.json. Ключ записи - бинарник node
+(реальный путь, mtime и размер, которые меняются вместе с версией Node) и
+то, от чего зависят пути поиска: текущая папка, NODE_PATH и npm prefix.
+node_environment() передает еще действительный путь через GMU_JUICE_MODULE /
+GMU_RESVG_MODULE, поэтому node загружает модуль напрямую и не запускает npm.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Optional
+
+from gmu.utils.paths import user_cache_dir
+
+# npm-пакет -> переменная окружения, через которую скрипт node принимает его путь.
+NODE_MODULE_ENV_VARS = {
+    "juice": "GMU_JUICE_MODULE",
+    "@resvg/resvg-js": "GMU_RESVG_MODULE",
+}
+
+_loaded_cache = (None, {})
+
+
+def module_cache_path():
+    return user_cache_dir() / "node-modules.json"
+
+
+def _cache_key(node_binary: str) -> str:
+    binary_path = shutil.which(node_binary) or node_binary
+    try:
+        stat_result = os.stat(binary_path)
+        binary = [os.path.realpath(binary_path), stat_result.st_mtime_ns, stat_result.st_size]
+    except OSError:
+        binary = [binary_path]
+    parts = binary + [
+        os.getcwd(),
+        os.environ.get("NODE_PATH", ""),
+        os.environ.get("NPM_CONFIG_PREFIX") or os.environ.get("npm_config_prefix") or "",
+    ]
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _read_cache() -> dict:
+    global _loaded_cache
+    path = module_cache_path()
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    if _loaded_cache[0] == mtime_ns:
+        return _loaded_cache[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    _loaded_cache = (mtime_ns, cache)
+    return cache
+
+
+def _valid_path(entry: Optional[dict]) -> Optional[str]:
+    """Путь из записи кеша, если файл модуля не менялся с момента записи."""
+    if not isinstance(entry, dict) or not entry.get("path"):
+        return None
+    try:
+        mtime_ms = os.stat(entry["path"]).st_mtime_ns / 1e6
+    except OSError:
+        return None
+    if abs(mtime_ms - float(entry.get("mtimeMs") or 0)) > 1:
+        return None
+    return entry["path"]
+
+
+def node_environment(node_binary: str) -> dict:
+    """Окружение для процесса node с путями к уже найденным npm-пакетам."""
+    env = dict(os.environ)
+    cache_key = _cache_key(node_binary)
+    env["GMU_NODE_MODULE_CACHE"] = str(module_cache_path())
+    env["GMU_NODE_MODULE_CACHE_KEY"] = cache_key
+
+    missing = {name: var for name, var in NODE_MODULE_ENV_VARS.items() if not env.get(var)}
+    if missing:
+        entries = (_read_cache().get("modules") or {}).get(cache_key) or {}
+        for name, env_var in missing.items():
+            path = _valid_path(entries.get(name))
+            if path:
+                env[env_var] = path
+    return env
@@ -0,0 +1,45 @@
+// Persistent mode for the Node helpers (`node script.js --serve`).
+// Every request and response is two length-prefixed frames on stdin/stdout:
+// a UTF-8 JSON header and a binary body.
+
+function frame(buffer) {
+  const length = Buffer.alloc(4);
+  length.writeUInt32BE(buffer.length, 0);
+  return Buffer.concat([length, buffer]);
+}
+
+function respond(header, body) {
+  process.stdout.write(
+    Buffer.concat([frame(Buffer.from(JSON.stringify(header), "utf8")), frame(body)])
+  );
+}
+
+function serve(handler) {
+  let pending = Buffer.alloc(0);
+
+  process.stdin.on("data", (chunk) => {
+    pending = Buffer.concat([pending, chunk]);
+
+    for (;;) {
+      if (pending.length < 4) return;
+      const headerLength = pending.readUInt32BE(0);
+      if (pending.length < 8 + headerLength) return;
+      const bodyLength = pending.readUInt32BE(4 + headerLength);
+      const end = 8 + headerLength + bodyLength;
+      if (pending.length < end) return;
+
+      const header = JSON.parse(pending.subarray(4, 4 + headerLength).toString("utf8"));
+      const body = pending.subarray(8 + headerLength, end);
+      pending = pending.subarray(end);
+
+      try {
+        const result = handler(header, body);
+        respond({ ok: true }, Buffer.isBuffer(result) ? result : Buffer.from(result, "utf8"));
+      } catch (error) {
+        respond({ ok: false, error: error && error.stack ? error.stack : String(error) }, Buffer.alloc(0));
+      }
+    }
+  });
+}
+
+module.exports = { serve };
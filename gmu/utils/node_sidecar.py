@@ -0,0 +1,125 @@
+"""
+Долгоживущие процессы Node.js-помощников.
+
+`gmu serve` держит juice_inliner.js и svg_to_png.js запущенными в режиме
+`--serve`, а не запускает node для каждого письма. Запросы и ответы - кадры
+с длиной в начале (см. node_sidecar.js). При обычном запуске CLI такие
+процессы выключены, и адаптеры запускают node на один вызов.
+"""
+
+import atexit
+import json
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from gmu.utils.node_modules import node_environment
+
+_HEADER = struct.Struct(">I")
+
+_enabled = False
+_sidecars: Dict[str, "NodeSidecar"] = {}
+_sidecars_lock = threading.Lock()
+
+
+class NodeSidecarError(RuntimeError):
+    """Процесс-помощник упал или вернул ошибку."""
+
+
+class NodeSidecar:
+    def __init__(self, script_name: str):
+        self.script_path = Path(__file__).with_name(script_name)
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        node_binary = os.environ.get("GMU_NODE_BINARY", "node")
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            [node_binary, str(self.script_path), "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            env=node_environment(node_binary),
+        )
+        return self._process
+
+    def _stderr_tail(self) -> str:
+        if self._stderr is None:
+            return ""
+        self._stderr.seek(0)
+        lines = self._stderr.read().decode("utf-8", errors="replace").strip().splitlines()
+        return "\n".join(lines[-12:])
+
+    def _read_frame(self, stream) -> bytes:
+        header = stream.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise EOFError("Node.js process closed its output.")
+        (length,) = _HEADER.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise EOFError("Node.js process closed its output.")
+        return payload
+
+    def call(self, body: bytes, **options) -> bytes:
+        """Отправляет body и параметры запроса процессу node, возвращает тело ответа."""
+        header = json.dumps(options).encode("utf-8")
+        with self._lock:
+            process = self._process
+            if process is None or process.poll() is not None:
+                process = self._start()
+            try:
+                process.stdin.write(_HEADER.pack(len(header)) + header)
+                process.stdin.write(_HEADER.pack(len(body)) + body)
+                process.stdin.flush()
+                response = json.loads(self._read_frame(process.stdout))
+                result = self._read_frame(process.stdout)
+            except (OSError, EOFError, ValueError) as exc:
+                details = self._stderr_tail()
+                self.close()
+                raise NodeSidecarError(details or str(exc)) from exc
+
+        if not response.get("ok"):
+            raise NodeSidecarError(response.get("error") or "Unknown Node.js error.")
+        return result
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+
+
+def enable_sidecars():
+    """Включает постоянные процессы node для текущего процесса (используется `gmu serve`)."""
+    global _enabled
+    _enabled = True
+
+
+def get_sidecar(script_name: str) -> Optional[NodeSidecar]:
+    """Sidecar для скрипта или None, если sidecar-процессы не включены."""
+    if not _enabled:
+        return None
+    with _sidecars_lock:
+        if script_name not in _sidecars:
+            _sidecars[script_name] = NodeSidecar(script_name)
+        return _sidecars[script_name]
+
+
+@atexit.register
+def close_sidecars():
+    with _sidecars_lock:
+        for sidecar in _sidecars.values():
+            sidecar.close()
+        _sidecars.clear()
@@ -0,0 +1,63 @@
+import os
+import pathlib
+import platform
+from typing import Optional
+
+
+def find_html_file(html_filename: Optional[str] = None, directory: str = ".") -> pathlib.Path:
+    """
+    HTML письма: указанный файл или первый по имени .html в папке.
+    Один выбор для загрузки, публикации, архива и индекса, даже если .html в папке несколько.
+    """
+    if html_filename:
+        path = pathlib.Path(directory, html_filename)
+        if not path.exists():
+            raise FileNotFoundError(f"File {path} not found")
+        return path
+    html_files = sorted(pathlib.Path(directory).glob("*.html"))
+    if not html_files:
+        raise FileNotFoundError("HTML file not found in this directory")
+    return html_files[0]
+
+
+def user_config_dir() -> pathlib.Path:
+    """Пользовательская папка GMU: %APPDATA%\\gmu или ~/.config/gmu."""
+    if platform.system() == "Windows":
+        appdata = os.getenv("APPDATA")
+        if appdata:
+            return pathlib.Path(appdata) / "gmu"
+    return pathlib.Path.home() / ".config" / "gmu"
+
+
+def user_cache_dir() -> pathlib.Path:
+    """Папка кешей GMU: %LOCALAPPDATA%\\gmu\\cache или ~/.cache/gmu."""
+    if platform.system() == "Windows":
+        local_appdata = os.getenv("LOCALAPPDATA") or os.getenv("APPDATA")
+        if local_appdata:
+            return pathlib.Path(local_appdata) / "gmu" / "cache"
+    xdg_cache = os.getenv("XDG_CACHE_HOME")
+    if xdg_cache:
+        return pathlib.Path(xdg_cache) / "gmu"
+    return pathlib.Path.home() / ".cache" / "gmu"
+
+
+def user_data_dir() -> pathlib.Path:
+    """Данные GMU, которые нельзя просто удалить как кеш: %LOCALAPPDATA%\\gmu\\data или ~/.local/share/gmu."""
+    if platform.system() == "Windows":
+        local_appdata = os.getenv("LOCALAPPDATA") or os.getenv("APPDATA")
+        if local_appdata:
+            return pathlib.Path(local_appdata) / "gmu" / "data"
+    xdg_data = os.getenv("XDG_DATA_HOME")
+    if xdg_data:
+        return pathlib.Path(xdg_data) / "gmu"
+    return pathlib.Path.home() / ".local" / "share" / "gmu"
+
+
+def daemon_socket_path() -> pathlib.Path:
+    """Сокет `gmu serve`: GMU_SOCKET, $XDG_RUNTIME_DIR/gmu.sock или gmu.sock в папке кешей."""
+    if os.getenv("GMU_SOCKET"):
+        return pathlib.Path(os.environ["GMU_SOCKET"])
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return pathlib.Path(runtime_dir) / "gmu.sock"
+    return user_cache_dir() / "gmu.sock"
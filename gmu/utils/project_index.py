@@ -0,0 +1,271 @@
+"""
+SQLite-индекс проектов писем для `gmu index build` и `gmu ls`.
+
+Для каждой корневой папки индекс лежит в ~/.cache/gmu/index/<хеш папки>.sqlite.
+build_index() обходит папку (пропуская скрытые папки и node_modules) и
+перечитывает gmu.json, только если изменились его mtime или размер, mtime
+HTML письма или размер либо mtime какого-нибудь файла в папке картинок;
+записи удаленных проектов удаляются. Для перечитанных проектов проверяется,
+совпадают ли исходники с source_fingerprint последней загрузки, поэтому
+`gmu ls --stale` не открывает письма при запросе.
+
+Модуль импортирует `gmu ls`, поэтому тяжелые импорты находятся внутри функций.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from gmu.utils.fingerprint import images_signature
+from gmu.utils.paths import find_html_file, user_cache_dir
+
+_SKIPPED_DIRS = ("node_modules", "__pycache__")
+# Меняется вместе со схемой таблицы projects: старый индекс перестраивается с нуля.
+SCHEMA_VERSION = 2
+
+# Поля gmu.json, по которым строятся запросы; остальное лежит в data целиком.
+INDEXED_FIELDS = {
+    "message_id": "INTEGER",
+    "campaign_id": "INTEGER",
+    "campaign_status": "TEXT",
+    "campaign_start_time": "TEXT",
+    "webletter_id": "TEXT",
+    "subject": "TEXT",
+    "zip_size": "INTEGER",
+    "letter_version": "INTEGER",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    config_mtime_ns INTEGER,
+    config_size INTEGER,
+    html_file TEXT,
+    html_mtime_ns INTEGER,
+    images_signature TEXT,
+    {fields},
+    stale INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_message_id ON projects (message_id);
+CREATE INDEX IF NOT EXISTS projects_campaign_id ON projects (campaign_id);
+CREATE INDEX IF NOT EXISTS projects_webletter_id ON projects (webletter_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+""".format(fields=",\n    ".join(f"{name} {kind}" for name, kind in INDEXED_FIELDS.items()))
+
+
+@dataclass
+class BuildStats:
+    scanned: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+def index_path(root: str) -> Path:
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return user_cache_dir() / "index" / f"{digest}.sqlite"
+
+
+def find_index_root(start: str = ".") -> Optional[str]:
+    """Ближайшая к start папка (она сама или родительская), для которой построен индекс."""
+    current = os.path.abspath(start)
+    while True:
+        if index_path(current).exists():
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def connect(root: str) -> sqlite3.Connection:
+    path = index_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        connection.execute("DROP TABLE IF EXISTS projects")
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _mtime_ns(path: Optional[str]) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+
+def _images_digest(directory: str) -> str:
+    # Размер и mtime каждой картинки: mtime самой папки не меняется при перезаписи файла в ней.
+    signature = images_signature(os.path.join(directory, "images"))
+    return hashlib.sha1(json.dumps(signature).encode("utf-8")).hexdigest()
+
+
+def _html_file(directory: str) -> Optional[str]:
+    # Тот же файл, что берут загрузка и публикация без --html-filename.
+    try:
+        return str(find_html_file(directory=directory))
+    except FileNotFoundError:
+        return None
+
+
+def _is_stale(data: dict, html_file: Optional[str]) -> Optional[int]:
+    """1 - HTML или картинки изменились после загрузки, 0 - нет, None - неизвестно."""
+    if not data.get("source_fingerprint") or not html_file:
+        return None
+    from gmu.utils.metadata_update import source_fingerprint
+
+    try:
+        with open(html_file, "r", encoding="utf-8") as f:
+            html_text = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    images_folder = os.path.join(os.path.dirname(html_file), "images")
+    return int(source_fingerprint(html_text, images_folder) != data["source_fingerprint"])
+
+
+def _walk_projects(root: str):
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if not name.startswith(".") and name not in _SKIPPED_DIRS)
+        if "gmu.json" in files:
+            yield directory
+
+
+def build_index(root: str, full: bool = False) -> BuildStats:
+    """
+    Обновляет индекс root: перечитывает только измененные проекты.
+    full: перечитать все gmu.json.
+    """
+    root = os.path.abspath(root)
+    stats = BuildStats()
+    connection = connect(root)
+    try:
+        known = {row["path"]: row for row in connection.execute(
+            "SELECT path, config_mtime_ns, config_size, html_file, html_mtime_ns, images_signature FROM projects")}
+        seen = set()
+        with connection:
+            for directory in _walk_projects(root):
+                stats.scanned += 1
+                relative = os.path.relpath(directory, root)
+                seen.add(relative)
+                config_path = os.path.join(directory, "gmu.json")
+                try:
+                    config_stat = os.stat(config_path)
+                except OSError:
+                    continue
+                html_file = _html_file(directory)
+                signature = (config_stat.st_mtime_ns, config_stat.st_size,
+                             html_file and os.path.basename(html_file), _mtime_ns(html_file),
+                             _images_digest(directory))
+                row = known.get(relative)
+                if not full and row is not None and tuple(row)[1:] == signature:
+                    continue
+                if _index_project(connection, relative, config_path, html_file, signature):
+                    stats.updated += 1
+
+            removed = [path for path in known if path not in seen]
+            connection.executemany("DELETE FROM projects WHERE path = ?", [(path,) for path in removed])
+            stats.removed = len(removed)
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)",
+                (datetime.datetime.now().isoformat(timespec="seconds"),))
+    finally:
+        connection.close()
+    return stats
+
+
+def _index_project(connection: sqlite3.Connection, relative: str, config_path: str,
+                   html_file: Optional[str], signature: tuple) -> bool:
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(data, dict):
+        return False
+    values = [data.get(name) for name in INDEXED_FIELDS]
+    stale = _is_stale(data, html_file)
+    connection.execute(
+        f"INSERT OR REPLACE INTO projects (path, config_mtime_ns, config_size, html_file, html_mtime_ns, "
+        f"images_signature, {', '.join(INDEXED_FIELDS)}, stale, data) "
+        f"VALUES ({', '.join('?' for _ in range(6 + len(INDEXED_FIELDS) + 2))})",
+        (relative, *signature, *values, stale, json.dumps(data, ensure_ascii=False)))
+    return True
+
+
+@dataclass
+class Query:
+    message_id: Optional[int] = None
+    campaign_id: Optional[int] = None
+    webletter_id: Optional[str] = None
+    status: Optional[str] = None
+    start_from: Optional[str] = None
+    start_to: Optional[str] = None
+    stale: bool = False
+    not_uploaded: bool = False
+    sort: str = "path"
+    limit: Optional[int] = None
+
+
+# Размер и версия сортируются по убыванию: обычно нужны самые большие и свежие.
+SORT_ORDERS = {
+    "path": "path",
+    "size": "zip_size IS NULL, zip_size DESC",
+    "start": "campaign_start_time IS NULL, campaign_start_time",
+    "version": "letter_version DESC",
+}
+
+
+def query_projects(connection: sqlite3.Connection, query: Query) -> List[sqlite3.Row]:
+    conditions, params = [], []
+    for field in ("message_id", "campaign_id", "webletter_id"):
+        value = getattr(query, field)
+        if value is not None:
+            conditions.append(f"{field} = ?")
+            params.append(value)
+    if query.status:
+        conditions.append("campaign_status = ?")
+        params.append(query.status)
+    # campaign_start_time хранится как 'YYYY-MM-DD HH:MM', поэтому строки сравниваются как даты.
+    if query.start_from:
+        conditions.append("campaign_start_time >= ?")
+        params.append(query.start_from)
+    if query.start_to:
+        conditions.append("campaign_start_time < ?")
+        params.append(query.start_to)
+    if query.stale:
+        conditions.append("stale = 1")
+    if query.not_uploaded:
+        conditions.append("message_id IS NULL")
+
+    sql = "SELECT * FROM projects"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + SORT_ORDERS[query.sort]
+    if query.limit:
+        sql += " LIMIT ?"
+        params.append(query.limit)
+    return connection.execute(sql, params).fetchall()
+
+
+def period_bounds(period: str, today: Optional[datetime.date] = None) -> tuple:
+    """Границы [начало, конец) периода today / week / month в формате campaign_start_time."""
+    today = today or datetime.date.today()
+    if period == "today":
+        start, end = today, today + datetime.timedelta(days=1)
+    elif period == "week":
+        start = today - datetime.timedelta(days=today.weekday())
+        end = start + datetime.timedelta(days=7)
+    elif period == "month":
+        start = today.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Неизвестный период: {period}")
+    return start.isoformat(), end.isoformat()
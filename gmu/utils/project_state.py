@@ -53,6 +53,8 @@ def set_letter_version(version: int, path: str = "gmu.json") -> bool:
 
 
 def bump_letter_version(path: str = "gmu.json") -> int:
-    version = get_letter_version(path) + 1
-    set_letter_version(version, path)
-    return version
+    # Транзакция: параллельные процессы не получат одну и ту же версию.
+    cfg, _ = ensure_project_config(path)
+    with cfg.transaction() as data:
+        data["letter_version"] = int(data.get("letter_version") or 0) + 1
+    return data["letter_version"]
@@ -0,0 +1,163 @@
+"""
+Ограничение частоты запросов к Unisender API (token bucket).
+
+По умолчанию лимита нет. GMU_RATE_LIMIT и GMU_RATE_LIMITS задают общий лимит
+и лимиты по методам. Заданный лимит делится между всеми процессами gmu на
+машине: состояние корзин хранится в JSON-файле в папке кешей под файловой
+блокировкой, и каждый запрос читает и перезаписывает этот файл. Без лимита
+файл не открывается. GMU_RATE_LIMIT_SHARED=0 оставляет состояние в памяти
+процесса, тогда у каждого процесса свой лимит.
+"""
+
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from gmu.utils.file_lock import file_lock
+from gmu.utils.paths import user_cache_dir
+
+# Без настройки лимита нет: ответы Unisender о превышении лимита и так повторяются с паузой.
+DEFAULT_RATE = None
+GLOBAL_BUCKET = "*"
+
+
+def parse_method_rates(value: Optional[str]) -> Dict[str, float]:
+    """Разбирает строку вида 'sendTestEmail=0.5,createEmailMessage=2'."""
+    rates = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        method, rate = item.split("=", 1)
+        try:
+            rates[method.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        global_rate: Optional[float] = DEFAULT_RATE,
+        method_rates: Optional[Dict[str, float]] = None,
+        state_path: Optional[pathlib.Path] = None,
+        shared: bool = True,
+    ):
+        """
+        global_rate  : общий лимит запросов в секунду (None или 0 - без лимита).
+        method_rates : лимиты для отдельных методов API, запросов в секунду.
+        shared       : делить лимит между процессами gmu через файл state_path.
+        state_path   : файл с состоянием корзин (по умолчанию rate_limit.json в папке кешей).
+        """
+        self.global_rate = global_rate or None
+        self.method_rates = {
+            method: rate for method, rate in (method_rates or {}).items() if rate > 0}
+        self.state_path = state_path or user_cache_dir() / "rate_limit.json"
+        self.lock_path = self.state_path.with_name(self.state_path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        # Состояние процесса; используется и как запасное, если файл недоступен.
+        self._memory_state: Dict[str, dict] = {}
+        self._use_file = shared
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        GMU_RATE_LIMIT        : общий лимит запросов в секунду (по умолчанию без лимита).
+        GMU_RATE_LIMITS       : лимиты по методам, например 'sendTestEmail=0.5'.
+        GMU_RATE_LIMIT_SHARED : 0 - не делить лимит между процессами (по умолчанию делится).
+        """
+        global_rate = DEFAULT_RATE
+        if os.environ.get("GMU_RATE_LIMIT"):
+            try:
+                global_rate = float(os.environ["GMU_RATE_LIMIT"])
+            except ValueError:
+                pass
+        shared = os.environ.get("GMU_RATE_LIMIT_SHARED", "1").lower() not in ("0", "false", "no", "off")
+        return cls(global_rate, parse_method_rates(os.environ.get("GMU_RATE_LIMITS")), shared=shared)
+
+    def _buckets(self, method: str) -> List[Tuple[str, float]]:
+        buckets = []
+        if self.global_rate:
+            buckets.append((GLOBAL_BUCKET, self.global_rate))
+        if method in self.method_rates:
+            buckets.append((method, self.method_rates[method]))
+        return buckets
+
+    def _read_state(self) -> Dict[str, dict]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, state: Dict[str, dict]):
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _consume(self, state: Dict[str, dict], buckets: List[Tuple[str, float]]) -> float:
+        """Пополняет корзины и берет по токену из каждой. Возвращает время ожидания."""
+        now = time.time()
+        wait = 0.0
+        for key, rate in buckets:
+            capacity = max(rate, 1.0)
+            bucket = state.get(key) or {"tokens": capacity, "updated": now}
+            elapsed = max(0.0, now - float(bucket.get("updated", now)))
+            tokens = min(capacity, float(bucket.get("tokens", capacity)) + elapsed * rate)
+            state[key] = {"tokens": tokens, "updated": now}
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+
+        if wait == 0:
+            for key, _ in buckets:
+                state[key]["tokens"] -= 1
+        return wait
+
+    def _try_acquire(self, buckets: List[Tuple[str, float]]) -> float:
+        with self._thread_lock:
+            if self._use_file:
+                try:
+                    with file_lock(self.lock_path):
+                        state = self._read_state()
+                        wait = self._consume(state, buckets)
+                        self._write_state(state)
+                    return wait
+                except OSError:
+                    self._use_file = False
+            return self._consume(self._memory_state, buckets)
+
+    def acquire(self, method: str) -> float:
+        """Блокирует до появления свободного токена. Возвращает время ожидания."""
+        buckets = self._buckets(method)
+        if not buckets:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(buckets)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+_default_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Общий для процесса лимитер с настройками из переменных окружения."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = RateLimiter.from_env()
+    return _default_limiter
+
+
+def reset_rate_limiter():
+    """Следующий get_rate_limiter() заново прочитает настройки (в `gmu serve` - перед каждой командой)."""
+    global _default_limiter
+    _default_limiter = None
@@ -0,0 +1,94 @@
+"""
+Бюджет байтов собранного письма.
+
+Итоговый HTML делится на инлайн-атрибуты `style`, блоки `<style>`, условные
+блоки Outlook (MSO), видимый текст и остальную разметку; в сумме части дают
+размер тела в UTF-8. Для каждого вложения выводится размер и размер в base64
+внутри MIME-сообщения (строки по 76 символов с CRLF). Тело сравнивается с
+порогом обрезки Gmail: Gmail обрезает письма, HTML которых больше примерно
+102 КБ. Порог меняют GMU_CLIP_THRESHOLD или `gmu size --threshold`.
+"""
+
+import os
+import re
+from typing import Optional
+
+from gmu.utils.html_minifier import tokenize_html
+
+DEFAULT_CLIP_THRESHOLD = 102 * 1024
+# Доля порога, после которой отчет предупреждает заранее.
+WARNING_RATIO = 0.9
+
+_STYLE_ATTRIBUTE = re.compile(r"""\sstyle\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""", re.IGNORECASE)
+
+
+def clip_threshold() -> int:
+    try:
+        return int(os.environ.get("GMU_CLIP_THRESHOLD", DEFAULT_CLIP_THRESHOLD))
+    except ValueError:
+        return DEFAULT_CLIP_THRESHOLD
+
+
+def base64_size(size: int) -> int:
+    """Размер base64 в MIME: 4 символа на 3 байта, CRLF после каждых 76 символов."""
+    encoded = 4 * ((size + 2) // 3)
+    return encoded + 2 * ((encoded + 75) // 76)
+
+
+def _utf8_size(value: str) -> int:
+    return len(value.encode("utf-8"))
+
+
+def html_breakdown(html: str) -> dict:
+    """Байты HTML по категориям; сумма категорий равна размеру HTML."""
+    parts = {"inline_styles": 0, "style_blocks": 0, "mso": 0, "text": 0, "markup": 0}
+    for kind, value in tokenize_html(html):
+        size = _utf8_size(value)
+        if kind in ("conditional", "revealed_open", "revealed_close"):
+            parts["mso"] += size
+        elif kind == "style":
+            parts["style_blocks"] += size
+        elif kind == "text":
+            parts["text"] += size
+        elif kind == "tag":
+            inline = sum(_utf8_size(match.group(0)) for match in _STYLE_ATTRIBUTE.finditer(value))
+            parts["inline_styles"] += inline
+            parts["markup"] += size - inline
+        else:
+            parts["markup"] += size
+    return parts
+
+
+def build_size_report(html: str, attachments: dict, zip_size: Optional[int] = None,
+                      threshold: Optional[int] = None) -> dict:
+    """
+    Отчет о размере письма в виде словаря (его же выводит `gmu size --json`).
+    attachments: dict {имя файла: bytes}, как в результате HTMLProcessor.process().
+    """
+    threshold = clip_threshold() if threshold is None else threshold
+    html_size = _utf8_size(html)
+
+    attachment_rows = [
+        {"name": name, "bytes": len(data), "mime_bytes": base64_size(len(data))}
+        for name, data in sorted(attachments.items(), key=lambda item: len(item[1]), reverse=True)
+    ]
+    attachments_bytes = sum(row["bytes"] for row in attachment_rows)
+    attachments_mime_bytes = sum(row["mime_bytes"] for row in attachment_rows)
+
+    if html_size > threshold:
+        clipping = "clipped"
+    elif html_size > threshold * WARNING_RATIO:
+        clipping = "warning"
+    else:
+        clipping = "ok"
+
+    return {
+        "html": {"bytes": html_size, "mime_bytes": base64_size(html_size), "parts": html_breakdown(html)},
+        "attachments": attachment_rows,
+        "attachments_bytes": attachments_bytes,
+        "attachments_mime_bytes": attachments_mime_bytes,
+        "mime_bytes": base64_size(html_size) + attachments_mime_bytes,
+        "zip_bytes": zip_size,
+        "clip_threshold": threshold,
+        "clipping": clipping,
+    }
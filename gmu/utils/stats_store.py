@@ -0,0 +1,174 @@
+"""
+Локальная история статистики кампаний для `gmu c stats export`.
+
+Снимки getCampaignCommonStats добавляются в базу SQLite (GMU_STATS_DB или
+campaign_stats.sqlite в папке данных GMU), по строке на каждый запрос, в
+котором изменился счетчик или статус. Кампания считается завершенной и
+пропускается следующими запусками, когда ее статус финальный, а счетчики не
+менялись SETTLE_DAYS дней: открытия и клики приходят еще несколько дней
+после отправки. Статистика запрашивается параллельно через
+AsyncUnisenderClient; с базой работает только вызывающий поток.
+"""
+
+import asyncio
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from gmu.utils.AsyncUnisender import AsyncUnisenderClient
+from gmu.utils.campaign_watch import FINAL_STATUSES
+from gmu.utils.paths import user_data_dir
+
+STATS_FIELDS = ("total", "sent", "delivered", "read_unique", "read_all",
+                "clicked_unique", "clicked_all", "unsubscribed", "spam")
+SETTLE_DAYS = 14
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign_id INTEGER PRIMARY KEY,
+    project TEXT,
+    status TEXT,
+    last_fetched REAL,
+    last_changed REAL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    campaign_id INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    status TEXT,
+    {columns},
+    raw TEXT,
+    PRIMARY KEY (campaign_id, fetched_at)
+);
+""".format(columns=",\n    ".join(f"{name} INTEGER" for name in STATS_FIELDS))
+
+
+def default_db_path() -> Path:
+    return Path(os.environ.get("GMU_STATS_DB") or user_data_dir() / "campaign_stats.sqlite")
+
+
+def _counter(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class FetchResult:
+    campaign_id: int
+    status: Optional[str] = None
+    stats: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class StatsStore:
+    """SQLite с таблицами campaigns (последнее состояние) и snapshots (история счетчиков)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_db_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "StatsStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def tracked(self) -> Dict[int, sqlite3.Row]:
+        rows = self.connection.execute("SELECT * FROM campaigns ORDER BY campaign_id")
+        return {row["campaign_id"]: row for row in rows}
+
+    @staticmethod
+    def is_settled(row: Optional[sqlite3.Row], settle_days: float = SETTLE_DAYS, now: Optional[float] = None) -> bool:
+        """Финальный статус и счетчики не менялись settle_days дней."""
+        if row is None or row["status"] not in FINAL_STATUSES or not row["last_changed"]:
+            return False
+        return (now or time.time()) - row["last_changed"] >= settle_days * 24 * 60 * 60
+
+    def _last_snapshot(self, campaign_id: int) -> Optional[sqlite3.Row]:
+        return self.connection.execute(
+            "SELECT * FROM snapshots WHERE campaign_id = ? ORDER BY fetched_at DESC LIMIT 1",
+            (campaign_id,)).fetchone()
+
+    def record(self, result: FetchResult, project: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """Сохраняет результат запроса; возвращает True, если добавлен новый снимок."""
+        now = now or time.time()
+        values = {name: _counter(result.stats.get(name)) for name in STATS_FIELDS}
+        previous = self._last_snapshot(result.campaign_id)
+        changed = previous is None or previous["status"] != result.status or any(
+            previous[name] != values[name] for name in STATS_FIELDS)
+
+        with self.connection:
+            if changed:
+                self.connection.execute(
+                    f"INSERT INTO snapshots (campaign_id, fetched_at, status, {', '.join(STATS_FIELDS)}, raw) "
+                    f"VALUES (?, ?, ?, {', '.join('?' for _ in STATS_FIELDS)}, ?)",
+                    (result.campaign_id, now, result.status, *values.values(),
+                     json.dumps(result.stats, ensure_ascii=False)))
+            self.connection.execute(
+                """
+                INSERT INTO campaigns (campaign_id, project, status, last_fetched, last_changed)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (campaign_id) DO UPDATE SET
+                    project = COALESCE(excluded.project, campaigns.project),
+                    status = excluded.status,
+                    last_fetched = excluded.last_fetched,
+                    last_changed = CASE WHEN ? THEN excluded.last_changed ELSE campaigns.last_changed END
+                """,
+                (result.campaign_id, project, result.status, now, now, changed))
+        return changed
+
+    def snapshots(self, campaign_ids: Optional[Iterable[int]] = None) -> List[sqlite3.Row]:
+        query = ("SELECT snapshots.*, campaigns.project FROM snapshots "
+                 "LEFT JOIN campaigns USING (campaign_id)")
+        params = []
+        if campaign_ids:
+            params = list(campaign_ids)
+            query += f" WHERE campaign_id IN ({', '.join('?' for _ in params)})"
+        return self.connection.execute(query + " ORDER BY campaign_id, fetched_at", params).fetchall()
+
+    def export_csv(self, stream: TextIO, campaign_ids: Optional[Iterable[int]] = None) -> int:
+        """Записывает снимки в CSV; возвращает число строк."""
+        writer = csv.writer(stream)
+        writer.writerow(["campaign_id", "project", "fetched_at", "status", *STATS_FIELDS])
+        rows = self.snapshots(campaign_ids)
+        for row in rows:
+            fetched_at = datetime.datetime.fromtimestamp(row["fetched_at"]).isoformat(timespec="seconds")
+            writer.writerow([row["campaign_id"], row["project"] or "", fetched_at, row["status"] or "",
+                             *("" if row[name] is None else row[name] for name in STATS_FIELDS)])
+        return len(rows)
+
+
+async def _fetch_one(client: AsyncUnisenderClient, campaign_id: int, known_status: Optional[str]) -> FetchResult:
+    result = FetchResult(campaign_id, status=known_status)
+    try:
+        # Финальный статус уже не изменится, повторно его не запрашиваем.
+        if known_status not in FINAL_STATUSES:
+            result.status = (await client.get_campaign_status(campaign_id)).get("status")
+        result.stats = await client.get_campaign_common_stats(campaign_id)
+    except Exception as exc:
+        result.error = str(exc)
+    return result
+
+
+async def _fetch_all(campaigns: Dict[int, Optional[str]], concurrency: Optional[int]) -> List[FetchResult]:
+    async with AsyncUnisenderClient(max_concurrency=concurrency, use_cache=False) as client:
+        return await asyncio.gather(*(
+            _fetch_one(client, campaign_id, status) for campaign_id, status in campaigns.items()))
+
+
+def fetch_campaign_stats(campaigns: Dict[int, Optional[str]], concurrency: Optional[int] = None) -> List[FetchResult]:
+    """Статус и статистика кампаний {campaign_id: известный статус}; результаты в том же порядке."""
+    return asyncio.run(_fetch_all(campaigns, concurrency))
@@ -7,6 +7,9 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 
+from gmu.utils.node_modules import node_environment
+from gmu.utils.node_sidecar import NodeSidecarError, get_sidecar
+
 
 class SvgConversionError(RuntimeError):
     """Raised when SVG cannot be rendered to PNG."""
@@ -24,6 +27,17 @@ def _format_stderr(stderr: bytes) -> str:
 
 def svg_to_png(svg_bytes: bytes, output_width: Optional[int] = None) -> bytes:
     """Render SVG bytes to PNG bytes without requiring system Cairo/GTK."""
+    sidecar = get_sidecar("svg_to_png.js")
+    if sidecar is not None:
+        try:
+            return sidecar.call(svg_bytes, width=output_width)
+        except NodeSidecarError as exc:
+            raise SvgConversionError(
+                "SVG to PNG conversion failed. Install npm dependencies with "
+                "`npm install` in the project directory, then run GMU again.\n"
+                f"{_format_stderr(str(exc).encode('utf-8'))}"
+            ) from exc
+
     script_path = Path(__file__).with_name("svg_to_png.js")
     node_binary = os.environ.get("GMU_NODE_BINARY", "node")
     args = [node_binary, str(script_path)]
@@ -35,6 +49,7 @@ def svg_to_png(svg_bytes: bytes, output_width: Optional[int] = None) -> bytes:
         completed = subprocess.run(
             args,
             input=svg_bytes,
+            env=node_environment(node_binary),
             capture_output=True,
             check=False,
         )
@@ -1,5 +1,6 @@
 const fs = require("fs");
 const { resolveNodeModule } = require("./node_module_loader");
+const { serve } = require("./node_sidecar");
 
 function parseArgs(argv) {
   const options = {};
@@ -19,22 +20,35 @@ function parseArgs(argv) {
   return options;
 }
 
-try {
-  const { Resvg } = resolveNodeModule("@resvg/resvg-js", "GMU_RESVG_MODULE");
-  const args = parseArgs(process.argv.slice(2));
-  const svg = fs.readFileSync(0);
+function render(Resvg, svg, width) {
   const renderOptions = {};
 
-  if (args.width) {
+  if (width) {
     renderOptions.fitTo = {
       mode: "width",
-      value: args.width,
+      value: width,
     };
   }
 
   const resvg = new Resvg(svg, renderOptions);
-  const pngBuffer = resvg.render().asPng();
-  process.stdout.write(pngBuffer);
+  return resvg.render().asPng();
+}
+
+function main() {
+  const { Resvg } = resolveNodeModule("@resvg/resvg-js", "GMU_RESVG_MODULE");
+
+  if (process.argv.includes("--serve")) {
+    serve((header, body) => render(Resvg, body, header.width));
+    return;
+  }
+
+  const args = parseArgs(process.argv.slice(2));
+  const svg = fs.readFileSync(0);
+  process.stdout.write(render(Resvg, svg, args.width));
+}
+
+try {
+  main();
 } catch (error) {
   process.stderr.write(error && error.stack ? error.stack : String(error));
   process.exit(1);
@@ -1,11 +1,30 @@
-import typer
+"""
+Версия GMU. Модуль без зависимостей: его импортируют `gmu --version`
+(до загрузки Typer) и source_fingerprint. При выпуске версия меняется
+здесь и в pyproject.toml.
+"""
 
-VERSION_TEXT = "Unisender CLI v2.0.0"
+__version__ = "2.0.1"
+VERSION_TEXT = f"Unisender CLI v{__version__}"
 
-app = typer.Typer()
 
+def __getattr__(name):
+    # Typer-приложение команды `gmu version` создается только при ее вызове.
+    if name == "app":
+        global app
+        app = _build_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.command(name="v", hidden=True)
-@app.command()
-def version():
-    return print(VERSION_TEXT)
+
+def _build_app():
+    import typer
+
+    version_app = typer.Typer()
+
+    @version_app.command(name="v", hidden=True)
+    @version_app.command()
+    def version():
+        return print(VERSION_TEXT)
+
+    return version_app
@@ -1,7 +1,5 @@
-import glob
 import os
 
-import requests
 import typer
 from dotenv import load_dotenv
 from termcolor import colored
@@ -11,6 +9,8 @@ from gmu.utils.GmuConfig import GmuConfig
 from gmu.utils.git_sync import run_git_auto_sync
 from gmu.utils.helpers import table_print
 from gmu.utils.HTMLprocessor import HTMLProcessor
+from gmu.utils.paths import find_html_file
+from gmu.utils.WebLetter import WebLetterClient
 
 load_dotenv()
 app = typer.Typer()
@@ -20,7 +20,7 @@ gmu_cfg = GmuConfig("gmu.json")
 @app.command(name="u", hidden=True)
 @app.command(name="upsert")
 def deploy_to_wl():
-    html_filename = glob.glob("*.html")[0]
+    html_filename = find_html_file().name
     images_folder = "images"
 
     if not gmu_cfg.exists():
@@ -44,36 +44,22 @@ def deploy_to_wl():
         )
         return
     zipName = os.path.basename(arhchive_path)
-    headers = {"Authorization": os.environ.get("WL_AUTH_TOKEN")}
     cfg_data = gmu_cfg.load()
+    wlClient = WebLetterClient()
 
-    with open(arhchive_path, "rb") as file:
-        files = {"file": (zipName, file, "application/zip")}
-        if cfg_data.get("webletter_id"):
-            result = requests.put(
-                str(os.environ.get("WL_ENDPOINT") +
-                    cfg_data.get('webletter_id')),
-                headers=headers,
-                files=files
-            )
-        else:
-            result = requests.post(
-                str(os.environ.get("WL_ENDPOINT") + 'upload'),
-                headers=headers,
-                files=files
-            )
     try:
-        result_json = result.json()
+        with open(arhchive_path, "rb") as file:
+            result_json = wlClient.upload(zipName, file, cfg_data.get("webletter_id"))
         if 'data' in result_json:
             resData = result_json.get("data")
             process_result["data"]["webletter_id"] = resData.get("id", "")
             process_result["data"]["webletter_url"] = (
-                f"{os.environ.get('WL_URL')}{resData.get('id', '')}"
+                wlClient.build_url(resData.get('id', ''))
             )
             gmu_cfg.update(process_result.get("data", {}))
 
             table_print("SUCCESS",
-                        f"Файл успешно загружен на WL - {os.environ.get('WL_URL')}{resData.get('id')}")
+                        f"Файл успешно загружен на WL - {process_result['data']['webletter_url']}")
             run_git_auto_sync("загрузки письма в WebLetter")
         else:
             table_print(
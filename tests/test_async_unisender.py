@@ -0,0 +1,15 @@
+import inspect
+
+from gmu.utils.AsyncUnisender import AsyncUnisenderClient
+from gmu.utils.Unisender import UnisenderClient
+
+
+def test_async_client_mirrors_sync_methods():
+    # Докстринг AsyncUnisenderClient обещает те же методы, что у UnisenderClient.
+    sync_methods = {name for name, _ in inspect.getmembers(UnisenderClient, inspect.isfunction)
+                    if not name.startswith("_")}
+    for name in sync_methods:
+        method = getattr(AsyncUnisenderClient, name, None)
+        assert inspect.iscoroutinefunction(method), name
+        assert (list(inspect.signature(method).parameters)
+                == list(inspect.signature(getattr(UnisenderClient, name)).parameters)), name
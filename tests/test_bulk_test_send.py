@@ -0,0 +1,89 @@
+import asyncio
+
+import requests
+
+from gmu.utils import bulk_test_send
+from gmu.utils.bulk_test_send import _is_address_error, _is_transient, _parse_result, _send_chunk
+from gmu.utils.Unisender import UnisenderAPIError, UnisenderRateLimitError
+
+
+class FakeClient:
+    """sendTestEmail как у Unisender: один неверный адрес отменяет весь вызов."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def send_test_message(self, message_id, emails):
+        chunk = emails.split(",")
+        self.calls.append(chunk)
+        invalid = [email for email in chunk if "@" not in email]
+        if invalid:
+            raise UnisenderAPIError(f"Invalid email: {invalid[0]}", "invalid_arg")
+        return {email: {"success": True} for email in chunk}
+
+
+def test_missing_address_is_a_failure():
+    results = _parse_result(["a@x.ru", "b@x.ru"], {"a@x.ru": {"success": True}}, 1)
+
+    assert [item.ok for item in results] == [True, False]
+
+
+def test_address_error_is_detected_by_code():
+    assert _is_address_error(UnisenderAPIError("Invalid email: a", "invalid_arg"))
+    # Текст со словом email без кода ошибки аргументов не делит пачку.
+    assert not _is_address_error(UnisenderAPIError("Message with email not found", "object_not_found"))
+    assert not _is_address_error(Exception("Invalid email: a"))
+
+
+def test_transient_errors():
+    assert _is_transient(UnisenderAPIError("Failed to decode JSON: <html>", None, 502))
+    assert _is_transient(requests.Timeout("timed out"))
+    assert not _is_transient(UnisenderAPIError("Invalid email: a", "invalid_arg", 200))
+    assert not _is_transient(UnisenderAPIError("Message 1 not found", "object_not_found", 200))
+
+
+def test_bad_address_is_isolated_without_retries(monkeypatch):
+    monkeypatch.setattr(bulk_test_send, "RETRY_DELAY", 0)
+    client = FakeClient()
+    chunk = ["a@x.ru", "b@x.ru", "broken", "c@x.ru"]
+
+    results = asyncio.run(_send_chunk(client, 1, chunk, retries=2))
+
+    assert {item.email: item.ok for item in results} == {
+        "a@x.ru": True, "b@x.ru": True, "broken": False, "c@x.ru": True}
+    # Пачка делится сразу: ни один вызов с неверным адресом не повторяется.
+    assert len(client.calls) == len({tuple(call) for call in client.calls})
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(bulk_test_send, "RETRY_DELAY", 0)
+
+    class Flaky(FakeClient):
+        errors = [UnisenderRateLimitError("API call limit exceeded", "api_call_limit_exceeded_for_api_key"),
+                  requests.ConnectionError("Connection reset")]
+
+        async def send_test_message(self, message_id, emails):
+            if self.errors:
+                self.calls.append(emails.split(","))
+                raise self.errors.pop(0)
+            return await super().send_test_message(message_id, emails)
+
+    client = Flaky()
+    results = asyncio.run(_send_chunk(client, 1, ["a@x.ru"], retries=2))
+
+    assert results[0].ok and results[0].attempts == 3
+
+
+def test_other_errors_fail_whole_chunk(monkeypatch):
+    monkeypatch.setattr(bulk_test_send, "RETRY_DELAY", 0)
+
+    class MissingMessage(FakeClient):
+        async def send_test_message(self, message_id, emails):
+            self.calls.append(emails)
+            raise UnisenderAPIError(f"Message {message_id} not found", "object_not_found")
+
+    client = MissingMessage()
+    results = asyncio.run(_send_chunk(client, 1, ["a@x.ru", "b@x.ru"], retries=1))
+
+    assert len(client.calls) == 1
+    assert not any(item.ok for item in results)
@@ -0,0 +1,24 @@
+import gzip
+
+import pytest
+
+from gmu.utils.contact_export import count_csv_rows
+
+# Значения в кавычках с переводами строк: строк в файле больше, чем контактов.
+EXPORT = 'email,Name,notes\r\na@x.ru,"Ann","line 1\r\nline 2"\r\nb@x.ru,"Bob\nSmith",""\r\nc@x.ru,Cid,'
+
+
+@pytest.mark.parametrize("compress", [False, True], ids=["csv", "gzip"])
+def test_count_csv_rows_ignores_quoted_newlines(tmp_path, compress):
+    path = tmp_path / "export.csv"
+    data = ("﻿" + EXPORT).encode("utf-8")
+    path.write_bytes(gzip.compress(data) if compress else data)
+
+    assert count_csv_rows(str(path), compress) == 3
+
+
+def test_count_csv_rows_empty_export(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text("email,Name\r\n", encoding="utf-8")
+
+    assert count_csv_rows(str(path), False) == 0
@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+
+from gmu.utils import contact_import
+from gmu.utils.contact_import import ContactImport, iter_batches
+
+CSV = "email,Name\na@x.ru,Ann\n\nb@x.ru,Bob\n , \nc@x.ru,Cid\nbroken,Dan\ne@x.ru,Eve\n"
+
+
+class FakeAsyncClient:
+    """importContacts как у Unisender: адрес без @ попадает в log с номером строки пакета."""
+
+    calls = []
+    failing = set()
+
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency or 2
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def import_contacts(self, field_names, rows, **options):
+        emails = [row[0] for row in rows]
+        FakeAsyncClient.calls.append(emails)
+        if FakeAsyncClient.failing & set(emails):
+            raise RuntimeError("Injected error")
+        log = [{"index": index, "code": "invalid_email", "message": f"Invalid email: {email}"}
+               for index, email in enumerate(emails) if "@" not in email]
+        return {"total": len(rows), "inserted": len(rows) - len(log), "updated": 0, "deleted": 0,
+                "new_emails": len(rows) - len(log), "invalid": len(log), "log": log}
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeAsyncClient.calls, FakeAsyncClient.failing = [], set()
+    monkeypatch.setattr(contact_import, "AsyncUnisenderClient", FakeAsyncClient)
+    monkeypatch.setattr(contact_import, "RETRY_DELAY", 0)
+    return FakeAsyncClient
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_batches_skip_blank_lines_and_keep_line_numbers(csv_path):
+    batches = list(iter_batches(csv_path, 2, extra_values=["7"]))
+
+    assert [batch.index for batch in batches] == [0, 1, 2]
+    assert [batch.line_numbers for batch in batches] == [[2, 4], [6, 7], [8]]
+    assert batches[0].rows == [["a@x.ru", "Ann", "7"], ["b@x.ru", "Bob", "7"]]
+
+
+def test_invalid_rows_are_reported_with_file_lines(csv_path, fake_client):
+    report = ContactImport(csv_path, batch_size=2, retries=0).run()
+
+    assert report.rows_sent == 5
+    assert report.invalid_rows == [(7, "Invalid email: broken")]
+
+
+def test_failed_batch_keeps_checkpoint_and_resume_sends_only_the_rest(csv_path, fake_client):
+    fake_client.failing = {"c@x.ru"}
+    job = ContactImport(csv_path, batch_size=2, retries=1)
+    report = job.run()
+
+    assert [(index, line) for index, line, _ in report.failed_batches] == [(1, 6)]
+    assert job.checkpoint.path.exists()
+    saved = json.loads(job.checkpoint.path.read_text(encoding="utf-8"))
+    assert saved["done"] == [0, 2] and saved["rows_done"] == 3
+    assert saved["counters"]["inserted"] == 3
+
+    fake_client.calls, fake_client.failing = [], set()
+    resumed = ContactImport(csv_path, batch_size=2, retries=0)
+    assert resumed.checkpoint.load() is None
+    report = resumed.run()
+
+    assert fake_client.calls == [["c@x.ru", "broken"]]
+    assert report.rows_skipped == 3 and report.rows_sent == 2
+    # Счетчики прошлого запуска сохраняются и складываются с новыми.
+    assert resumed.checkpoint.counters["inserted"] == 4
+    assert resumed.checkpoint.counters["invalid"] == 1
+    assert not resumed.checkpoint.path.exists()
+
+
+def test_checkpoint_is_invalidated_when_file_or_options_change(csv_path, fake_client):
+    fake_client.failing = {"e@x.ru"}
+    ContactImport(csv_path, batch_size=2, retries=0).run()
+
+    other_options = ContactImport(csv_path, batch_size=3, retries=0)
+    assert other_options.checkpoint.load() == "файл или параметры импорта изменились"
+    assert not other_options.checkpoint.done
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("f@x.ru,Fay\n")
+    stat_result = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+    changed_file = ContactImport(csv_path, batch_size=2, retries=0)
+    assert changed_file.checkpoint.load() == "файл или параметры импорта изменились"
+
+    # list_id добавляет колонку email_list_ids: это тоже другие параметры.
+    with_list = ContactImport(csv_path, list_id=5, batch_size=2, retries=0)
+    assert with_list.checkpoint.load() is not None
@@ -0,0 +1,89 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from gmu.utils.css_pruner import DEFAULT_PRESERVE_FLAGS, CssPruner
+
+BODY = """
+<table class="wrapper" id="main"><tr><td class="content">
+  <a class="button" href="#" target="_blank">Кнопка</a>
+  <p lang="ru">Текст</p>
+</td></tr></table>
+<!--[if mso]><table class="ol-wrap" id="ol-table"><tr><td><v:roundrect class="ol-button"></v:roundrect>
+<!--[if gte mso 12]><div class="ol-nested"></div><![endif]--></td></tr></table><![endif]-->
+"""
+
+
+def prune(css, **flags):
+    soup = BeautifulSoup(f"<html><head><style>{css}</style></head><body>{BODY}</body></html>", "html.parser")
+    stats = CssPruner(soup, flags={**DEFAULT_PRESERVE_FLAGS, **flags}).prune()
+    return soup.style.string, stats
+
+
+def test_removes_unused_rules_and_selectors():
+    css, stats = prune(".wrapper{width:600px}.unused{color:red}.content,.missing{padding:0}")
+
+    assert css == ".wrapper{width:600px}.content{padding:0}"
+    assert stats.rules_removed == 1 and stats.selectors_removed == 1
+
+
+@pytest.mark.parametrize("selector", [
+    ".ol-wrap", "#ol-table td", "v\\:roundrect", ".ol-button", "table.ol-wrap td", ".ol-nested",
+])
+def test_keeps_rules_for_conditional_markup(selector):
+    css, _ = prune(f"{selector}{{width:600px}}")
+
+    assert css == f"{selector}{{width:600px}}"
+
+
+def test_common_tags_in_conditional_markup_do_not_keep_rules():
+    css, _ = prune(".unused td{color:red}")
+
+    assert css == ""
+
+
+def test_keeps_client_hacks():
+    css, _ = prune(".ExternalClass{width:100%}u + .body .x{color:red}")
+
+    assert css == ".ExternalClass{width:100%}u + .body .x{color:red}"
+
+
+def test_media_rules_are_pruned_inside():
+    css, _ = prune("@media (max-width:600px){.wrapper{width:100%!important}.unused{display:none}}"
+                   "@media print{.unused{display:none}}")
+
+    assert css == "@media (max-width:600px){.wrapper{width:100%!important}}"
+
+
+def test_media_rules_are_left_to_juice_when_not_preserved():
+    source = "@media print{.unused{display:none}}"
+    css, _ = prune(source, preserveMediaQueries=False)
+
+    assert css == source
+
+
+def test_pseudo_classes_follow_their_element():
+    css, _ = prune(".button:hover{color:red}.unused:hover{color:red}a::before{content:''}"
+                   ".content p:last-child{margin:0}.content a:last-child{margin:0}")
+
+    assert css == ".button:hover{color:red}a::before{content:''}.content p:last-child{margin:0}"
+
+
+def test_pseudo_classes_are_dropped_when_juice_removes_them():
+    css, _ = prune(".button:hover{color:red}.wrapper{width:600px}", preservePseudos=False)
+
+    assert css == ".wrapper{width:600px}"
+
+
+def test_attribute_selectors():
+    css, _ = prune('a[target="_blank"]{color:red}a[target="_self"]{color:blue}p[lang|=ru]{margin:0}'
+                   'td[data-missing]{padding:0}')
+
+    assert css == 'a[target="_blank"]{color:red}p[lang|=ru]{margin:0}'
+
+
+def test_unparsable_block_is_skipped():
+    source = ".wrapper{width:600px"
+    css, stats = prune(source)
+
+    assert css == source
+    assert stats.skipped_blocks
@@ -0,0 +1,31 @@
+import shutil
+
+import pytest
+
+from gmu.utils import node_sidecar
+from gmu.utils.custom_css_inliner import inline_css_custom
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is not installed")
+
+
+@pytest.fixture
+def sidecar_juice(tmp_path, monkeypatch):
+    # Вместо Juice - модуль, который дописывает к HTML значение из конфига.
+    module = tmp_path / "juice.js"
+    module.write_text("module.exports = (html, options) => html + options.marker;", encoding="utf-8")
+    config = tmp_path / "juice_config.js"
+    monkeypatch.setenv("GMU_JUICE_MODULE", str(module))
+    monkeypatch.setenv("GMU_JUICE_CONFIG", str(config))
+    monkeypatch.setattr(node_sidecar, "_enabled", True)
+    yield config
+    node_sidecar.close_sidecars()
+
+
+def test_sidecar_reloads_edited_config(sidecar_juice):
+    sidecar_juice.write_text('module.exports = { marker: "-old" };', encoding="utf-8")
+    assert inline_css_custom("<p>1</p>") == "<p>1</p>-old"
+
+    sidecar_juice.write_text('module.exports = { marker: "-new" };', encoding="utf-8")
+    assert inline_css_custom("<p>2</p>") == "<p>2</p>-new"
+    # Результат для старого конфига не попадает в кеш под ключом нового.
+    assert inline_css_custom("<p>1</p>") == "<p>1</p>-new"
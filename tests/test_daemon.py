@@ -0,0 +1,44 @@
+import io
+
+import pytest
+import rich
+
+from gmu.utils import helpers, rate_limiter
+from gmu.utils.daemon import _reset_client_state
+
+
+@pytest.fixture(autouse=True)
+def restore_client_state():
+    yield
+    # Окружение теста уже восстановлено: консоли и лимитер строятся заново для следующих тестов.
+    _reset_client_state()
+
+
+def test_reset_client_state_rereads_environment(monkeypatch):
+    # Демон один и тот же, а окружение у каждой команды свое.
+    monkeypatch.setenv("GMU_RATE_LIMIT", "5")
+    monkeypatch.setenv("COLUMNS", "80")
+    _reset_client_state()
+    assert rate_limiter.get_rate_limiter().global_rate == 5
+    assert helpers.console.width == 80
+
+    monkeypatch.delenv("GMU_RATE_LIMIT")
+    monkeypatch.setenv("COLUMNS", "132")
+    _reset_client_state()
+    assert rate_limiter.get_rate_limiter().global_rate is None
+    assert helpers.console.width == 132
+    assert rich.get_console().width == 132
+
+
+def test_reset_client_state_uses_client_stream(monkeypatch):
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+    monkeypatch.setattr("sys.stdout", Terminal())
+    monkeypatch.setenv("TERM", "xterm-256color")
+    monkeypatch.delenv("NO_COLOR", raising=False)
+    _reset_client_state()
+
+    assert helpers.console.is_terminal
+    assert helpers.console.color_system is not None
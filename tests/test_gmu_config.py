@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+
+import pytest
+
+from gmu.utils.GmuConfig import GmuConfig, ProjectState, _merge_changes, default_gmu_config, flush_project_states
+
+
+@pytest.fixture(autouse=True)
+def fresh_states():
+    flush_project_states(reset=True)
+    yield
+    ProjectState._states.clear()
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "gmu.json"
+    path.write_text(json.dumps(default_gmu_config()), encoding="utf-8")
+    return str(path)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_merge_keeps_their_changes_to_other_keys():
+    base = {"message_id": 1, "subject": "a"}
+    ours = {"message_id": 2, "subject": "a"}
+    theirs = {"message_id": 1, "subject": "b"}
+
+    assert _merge_changes(base, ours, theirs) == {"message_id": 2, "subject": "b"}
+
+
+def test_merge_does_not_revert_their_change_when_ours_is_unchanged():
+    base = {"campaign_status": "scheduled"}
+    ours = {"campaign_status": "scheduled"}
+    theirs = {"campaign_status": "completed"}
+
+    assert _merge_changes(base, ours, theirs) == {"campaign_status": "completed"}
+
+
+def test_merge_applies_our_deletion_and_addition():
+    base = {"size": 10, "subject": "a"}
+    ours = {"zip_size": 10, "subject": "a"}
+    theirs = {"size": 10, "subject": "b", "webletter_id": "wl1"}
+
+    assert _merge_changes(base, ours, theirs) == {"zip_size": 10, "subject": "b", "webletter_id": "wl1"}
+
+
+def test_merge_nested_dicts_key_by_key():
+    base = {"settings": {"git_auto_sync": False, "theme": "light"}}
+    ours = {"settings": {"git_auto_sync": True, "theme": "light"}}
+    theirs = {"settings": {"git_auto_sync": False, "theme": "dark"}}
+
+    assert _merge_changes(base, ours, theirs) == {"settings": {"git_auto_sync": True, "theme": "dark"}}
+
+
+def test_merge_replaces_value_that_became_a_dict():
+    base = {"campaign_stats": None}
+    ours = {"campaign_stats": {"sent": 10}}
+    theirs = {"campaign_stats": None, "subject": "b"}
+
+    assert _merge_changes(base, ours, theirs) == {"campaign_stats": {"sent": 10}, "subject": "b"}
+
+
+def test_merge_into_deleted_file():
+    assert _merge_changes({"a": 1}, {"a": 2, "b": 3}, None) == {"a": 2, "b": 3}
+
+
+def test_merge_does_not_share_objects_with_ours():
+    ours = {"campaign_stats": {"sent": 1}}
+    result = _merge_changes({}, ours, {})
+    ours["campaign_stats"]["sent"] = 2
+
+    assert result["campaign_stats"]["sent"] == 1
+
+
+def test_flush_merges_with_concurrent_write(config_path):
+    cfg = GmuConfig(config_path)
+    cfg.update({"subject": "ours"})
+    on_disk = _read(config_path)
+    on_disk["webletter_id"] = "wl1"
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(on_disk, f)
+
+    flush_project_states()
+
+    data = _read(config_path)
+    assert data["subject"] == "ours"
+    assert data["webletter_id"] == "wl1"
+
+
+def test_transaction_writes_on_success(config_path):
+    with GmuConfig(config_path).transaction() as data:
+        data["letter_version"] = 5
+
+    assert _read(config_path)["letter_version"] == 5
+
+
+def test_transaction_rolls_back_on_exception(config_path):
+    before = _read(config_path)
+    cfg = GmuConfig(config_path)
+
+    with pytest.raises(RuntimeError):
+        with cfg.transaction() as data:
+            data["letter_version"] = 5
+            data["subject"] = "half-done"
+            raise RuntimeError("boom")
+
+    assert _read(config_path) == before
+    assert cfg.load()["letter_version"] == 0
+    flush_project_states()
+    assert _read(config_path) == before
+
+
+def test_transaction_writes_pending_changes_first(config_path):
+    cfg = GmuConfig(config_path)
+    cfg.update({"subject": "pending"})
+
+    with cfg.transaction() as data:
+        assert data["subject"] == "pending"
+        data["letter_version"] = 1
+
+    data = _read(config_path)
+    assert (data["subject"], data["letter_version"]) == ("pending", 1)
+
+
+WRITERS = 4
+ITERATIONS = 25
+
+
+def _stress_writer(path: str, writer: int) -> int:
+    failures = 0
+    for iteration in range(1, ITERATIONS + 1):
+        try:
+            with GmuConfig(path).transaction() as data:
+                data["letter_version"] = int(data.get("letter_version") or 0) + 1
+            GmuConfig(path).update({f"writer_{writer}": iteration})
+            flush_project_states(reset=True)
+        except (OSError, ValueError):
+            failures += 1
+    return failures
+
+
+def _stress_reader(path: str, stop, result):
+    reads = errors = 0
+    while not stop.is_set():
+        try:
+            _read(path)
+        except (OSError, ValueError):
+            errors += 1
+        reads += 1
+    result.put((reads, errors))
+
+
+def test_concurrent_writers_lose_nothing(config_path):
+    """Уменьшенная версия benchmarks/gmu_json_stress.py."""
+    stop = multiprocessing.Event()
+    reader_result = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=_stress_reader, args=(config_path, stop, reader_result))
+    reader.start()
+    try:
+        with multiprocessing.Pool(WRITERS) as pool:
+            failures = sum(pool.starmap(_stress_writer, [(config_path, writer) for writer in range(WRITERS)]))
+    finally:
+        stop.set()
+        reads, read_errors = reader_result.get(timeout=30)
+        reader.join()
+
+    data = _read(config_path)
+    assert failures == 0
+    assert data["letter_version"] == WRITERS * ITERATIONS
+    assert all(data[f"writer_{writer}"] == ITERATIONS for writer in range(WRITERS))
+    assert reads > 0 and read_errors == 0
@@ -0,0 +1,104 @@
+import pytest
+
+from gmu.utils.html_minifier import minify_html, minify_style
+
+# Фрагмент письма в том виде, в каком его отдает Juice: стили уже в атрибутах style.
+JUICE_OUTPUT = """<!DOCTYPE html>
+<html lang="ru" xmlns:v="urn:schemas-microsoft-com:vml">
+  <head>
+    <meta charset="utf-8">
+    <!--[if mso]>
+    <xml><o:OfficeDocumentSettings><o:PixelsPerInch>96</o:PixelsPerInch></o:OfficeDocumentSettings></xml>
+    <![endif]-->
+    <style>
+      /* reset */
+      @media (max-width: 600px) { .wrapper { width: 100% !important; } }
+    </style>
+  </head>
+  <body style="margin: 0px; padding: 0px; background-color: #ffffff;">
+    <!-- preheader -->
+    <table width="600" cellpadding="0" cellspacing="0" style="width: 600px ; margin: 0px auto;">
+      <tr>
+        <td style="font-family: 'Helvetica Neue', Arial, sans-serif; font-size: 16px;">
+          Привет,   <b>мир</b>!
+          <!--[if mso]><v:roundrect style="width:200px;height:40px" arcsize="10%"><![endif]-->
+          <a href="https://example.com" style="color: #0000ff;">Кнопка</a>
+          <!--[if mso]></v:roundrect><![endif]-->
+        </td>
+      </tr>
+    </table>
+  </body>
+</html>
+"""
+
+PRESERVED = [
+    pytest.param("<!--[if mso]>\n  <table  width=\"600\"><tr><td>  MSO  </td></tr></table>\n<![endif]-->",
+                 id="mso-conditional"),
+    pytest.param("<!--[if gte mso 9]><xml>\n <o:OfficeDocumentSettings/>\n</xml><![endif]-->", id="gte-mso"),
+    pytest.param("<![if !mso]><p>Hi</p><![endif]>", id="downlevel-revealed"),
+    pytest.param("<!--[if !mso]><!--><p>Hi</p><!--<![endif]-->", id="downlevel-revealed-commented"),
+    pytest.param("<pre>  line 1\n    line 2  </pre>", id="pre"),
+    pytest.param("<textarea name=\"t\">  a\n\n  b  </textarea>", id="textarea"),
+    pytest.param("<script type=\"application/ld+json\">\n  {\"a\":  1}\n</script>", id="script"),
+    pytest.param(
+        "<!--[if mso]><table><tr><td><!--[if gte mso 12]>  inner  <![endif]-->  </td >\n</tr></table><![endif]-->",
+        id="nested-conditional"),
+]
+
+
+@pytest.mark.parametrize("html", PRESERVED)
+def test_protected_markup_is_unchanged(html):
+    result, stats = minify_html(html)
+
+    assert result == html
+    assert not stats.reverted
+
+
+@pytest.mark.parametrize("html", PRESERVED)
+def test_protected_markup_is_unchanged_inside_letter(html):
+    result, stats = minify_html(f"<div>\n  <!-- note -->\n  {html}\n</div>")
+
+    assert html in result
+    assert not stats.reverted
+
+
+def test_removes_comments_and_collapses_whitespace():
+    result, stats = minify_html("<div>\n  <!-- comment -->\n  <p>Hello,   \n world</p>\n</div>")
+
+    assert result == "<div><p>Hello, world</p></div>"
+    assert stats.bytes_saved > 0
+
+
+def test_keeps_space_between_inline_tags():
+    result, _ = minify_html("<p><b>one</b>   <i>two</i></p>")
+
+    assert result == "<p><b>one</b> <i>two</i></p>"
+
+
+def test_minify_style():
+    assert minify_style("color : red ; margin: 0px  auto;") == "color:red;margin:0 auto"
+    assert minify_style("font-family: 'Helvetica Neue', Arial") == "font-family:'Helvetica Neue', Arial"
+
+
+def test_juice_output_is_minified_without_fallback():
+    result, stats = minify_html(JUICE_OUTPUT)
+
+    assert not stats.reverted
+    assert stats.bytes_after < stats.bytes_before
+    assert "<!-- preheader -->" not in result
+    assert "/* reset */" not in result
+    assert '<body style="margin:0;padding:0;background-color:#ffffff">' in result
+    for conditional in ('<!--[if mso]><v:roundrect style="width:200px;height:40px" arcsize="10%"><![endif]-->',
+                        "<!--[if mso]></v:roundrect><![endif]-->"):
+        assert conditional in result
+    assert "Привет, <b>мир</b>!" in result
+
+
+def test_keeps_non_breaking_spaces():
+    # Неразрывный пробел - часть текста, а не пробельный символ HTML.
+    preheader = "\xa0\u200c" * 3
+    result, stats = minify_html(f"<td>Цена: 100\xa0₽</td>\n<div style=\"display:none\">{preheader}</div>")
+
+    assert result == f"<td>Цена: 100\xa0₽</td><div style=\"display:none\">{preheader}</div>"
+    assert not stats.reverted
+    assert minify_style("font-family:\xa0Arial") == "font-family:\xa0Arial"
@@ -0,0 +1,60 @@
+import pytest
+
+from gmu.utils import message_pipeline
+from gmu.utils.message_pipeline import upload_message
+
+
+class FakeClient:
+    def __init__(self):
+        self.deleted = []
+
+    def create_email_message(self, **kwargs):
+        return {"message_id": 200}
+
+    def delete_message(self, message_id):
+        self.deleted.append(message_id)
+        return True
+
+
+def process_result():
+    return {"data": {"subject": "Тема"}, "inlined_html": "<html></html>", "attachments": {}}
+
+
+def test_old_message_is_deleted_after_archive(tmp_path, monkeypatch):
+    archive = tmp_path / "letter.zip"
+    archive.write_bytes(b"zip")
+    monkeypatch.setattr(message_pipeline, "archive_email", lambda *args: str(archive))
+    client, result = FakeClient(), process_result()
+
+    assert upload_message(client, result, 1, old_message_id=100) == 200
+
+    assert client.deleted == [100]
+    assert result["data"]["message_id"] == 200 and result["data"]["zip_size"] == 3
+
+
+def test_archive_failure_keeps_old_message_and_new_id(monkeypatch):
+    def broken_archive(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(message_pipeline, "archive_email", broken_archive)
+    client, result = FakeClient(), process_result()
+
+    assert upload_message(client, result, 1, old_message_id=100) == 200
+
+    assert client.deleted == []
+    assert result["data"]["message_id"] == 200
+    assert result["data"]["message_url"]
+    assert "zip_size" not in result["data"]
+
+
+def test_create_failure_keeps_old_message(monkeypatch):
+    monkeypatch.setattr(message_pipeline, "archive_email", lambda *args: "letter.zip")
+
+    class Failing(FakeClient):
+        def create_email_message(self, **kwargs):
+            raise RuntimeError("API error")
+
+    client = Failing()
+    with pytest.raises(RuntimeError):
+        upload_message(client, process_result(), 1, old_message_id=100)
+    assert client.deleted == []
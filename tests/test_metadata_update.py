@@ -0,0 +1,62 @@
+from gmu.utils.metadata_update import (apply_metadata, apply_preheader, find_preheader, preheader_text,
+                                       read_head_metadata, source_fingerprint)
+
+HTML = """<html><head>
+<title>Старая тема</title>
+<meta name="sender-name" content="Отдел продаж">
+<meta name="sender-email" content="sales@example.com">
+</head><body><title>Не тема</title></body></html>"""
+
+
+def test_read_head_metadata_stops_at_head():
+    assert read_head_metadata(HTML) == {
+        "subject": "Старая тема", "sender_name": "Отдел продаж", "sender_email": "sales@example.com"}
+
+
+def test_read_head_metadata_defaults():
+    assert read_head_metadata("<html><body></body></html>")["subject"] == "No Subject"
+
+
+def test_apply_metadata_replaces_title_and_sender():
+    body = apply_metadata(HTML, {"subject": "Новая <тема>", "sender_name": None, "sender_email": "news@example.com"})
+
+    assert "<title>Новая &lt;тема&gt;</title>" in body
+    assert 'content="Отдел продаж"' in body
+    assert 'content="news@example.com"' in body
+
+
+LETTER = """<html><head><title>Тема</title></head><body>
+<!-- <div style="display: none">комментарий</div> -->
+<div class="wrapper"><div style="display: none">Старый &amp; прехедер</div>
+<table><tr><td>Текст</td></tr></table></div>
+</body></html>"""
+
+
+def test_preheader_is_not_part_of_source_fingerprint(tmp_path):
+    edited = LETTER.replace("Старый &amp; прехедер", "Новый прехедер")
+
+    assert source_fingerprint(LETTER, str(tmp_path)) == source_fingerprint(edited, str(tmp_path))
+    assert source_fingerprint(LETTER, str(tmp_path)) != source_fingerprint(
+        LETTER.replace("Текст", "Другой текст"), str(tmp_path))
+
+
+def test_preheader_with_tags_stays_in_fingerprint(tmp_path):
+    letter = LETTER.replace("Старый &amp; прехедер", "<b>Старый</b>")
+
+    assert find_preheader(letter) is None
+    assert source_fingerprint(letter, str(tmp_path)) != source_fingerprint(
+        letter.replace("<b>Старый</b>", "<b>Новый</b>"), str(tmp_path))
+
+
+def test_apply_preheader_replaces_hidden_div_text():
+    index, start, end = find_preheader(LETTER)
+    # Готовое тело: стили инлайнены и сжаты, комментарии удалены.
+    body = ('<html><head><title>Тема</title></head><body><div class="wrapper" style="width:100%">'
+            '<div style="display:none">Старый &amp; прехедер</div><table></table></div></body></html>')
+
+    assert preheader_text(LETTER[start:end]) == "Старый & прехедер"
+    assert apply_preheader(body, index, "Новый", "Старый & прехедер") == body.replace(
+        "Старый &amp; прехедер", "Новый")
+    # Текст в теле не совпал с gmu.json: быстрый путь неприменим.
+    assert apply_preheader(body, index, "Новый", "Другой прехедер") is None
+    assert apply_preheader(body, 0, "Новый", "Старый & прехедер") is None
@@ -0,0 +1,18 @@
+import pytest
+
+from gmu.utils.paths import find_html_file
+
+
+def test_find_html_file_picks_first_by_name(tmp_path):
+    for name in ("zeta.html", "alpha.html", "notes.txt"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+
+    assert find_html_file(directory=str(tmp_path)).name == "alpha.html"
+    assert find_html_file("zeta.html", directory=str(tmp_path)).name == "zeta.html"
+
+
+def test_find_html_file_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        find_html_file(directory=str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        find_html_file("letter.html", directory=str(tmp_path))
@@ -0,0 +1,45 @@
+import json
+import os
+
+from gmu.utils.metadata_update import source_fingerprint
+from gmu.utils.project_index import Query, build_index, connect, query_projects
+
+
+def _make_project(directory):
+    images = directory / "images"
+    images.mkdir(parents=True)
+    (images / "hero.png").write_bytes(b"old image")
+    html = "<html><head><title>Тема</title></head><body><img src=\"images/hero.png\"></body></html>"
+    (directory / "index.html").write_text(html, encoding="utf-8")
+    fingerprint = source_fingerprint(html, str(images))
+    (directory / "gmu.json").write_text(
+        json.dumps({"message_id": 1, "source_fingerprint": fingerprint}), encoding="utf-8")
+
+
+def _stale_paths(root):
+    connection = connect(str(root))
+    try:
+        return [row["path"] for row in query_projects(connection, Query(stale=True))]
+    finally:
+        connection.close()
+
+
+def test_image_overwritten_in_place_marks_project_stale(tmp_path):
+    project = tmp_path / "letter"
+    _make_project(project)
+    assert build_index(str(tmp_path)).updated == 1
+    assert _stale_paths(tmp_path) == []
+
+    images_mtime = os.stat(project / "images").st_mtime_ns
+    (project / "images" / "hero.png").write_bytes(b"new, larger image")
+    assert os.stat(project / "images").st_mtime_ns == images_mtime
+
+    assert build_index(str(tmp_path)).updated == 1
+    assert _stale_paths(tmp_path) == ["letter"]
+
+
+def test_unchanged_project_is_not_reread(tmp_path):
+    _make_project(tmp_path / "letter")
+    build_index(str(tmp_path))
+
+    assert build_index(str(tmp_path)).updated == 0
@@ -0,0 +1,47 @@
+from gmu.utils.rate_limiter import RateLimiter
+
+
+def test_no_limit_by_default(monkeypatch):
+    monkeypatch.delenv("GMU_RATE_LIMIT", raising=False)
+    monkeypatch.delenv("GMU_RATE_LIMITS", raising=False)
+    limiter = RateLimiter.from_env()
+
+    assert all(limiter.acquire("getMessage") == 0 for _ in range(50))
+    assert not limiter.state_path.exists()
+
+
+def test_configured_limit_is_shared_by_default(monkeypatch):
+    monkeypatch.setenv("GMU_RATE_LIMIT", "1000")
+    monkeypatch.delenv("GMU_RATE_LIMIT_SHARED", raising=False)
+    limiter = RateLimiter.from_env()
+    limiter.acquire("getMessage")
+
+    assert limiter.state_path.exists()
+
+
+def test_sharing_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("GMU_RATE_LIMIT", "1000")
+    monkeypatch.setenv("GMU_RATE_LIMIT_SHARED", "0")
+    limiter = RateLimiter.from_env()
+    limiter.acquire("getMessage")
+
+    assert limiter._memory_state
+    assert not limiter.state_path.exists()
+
+
+def test_processes_share_one_budget(tmp_path):
+    # Два экземпляра с одним файлом состояния - как два процесса gmu.
+    first, second = (RateLimiter(method_rates={"sendTestEmail": 2}, state_path=tmp_path / "rate_limit.json")
+                     for _ in range(2))
+
+    assert first.acquire("sendTestEmail") == 0
+    assert second.acquire("sendTestEmail") == 0
+    assert second._try_acquire(second._buckets("sendTestEmail")) > 0
+
+
+def test_waits_when_bucket_is_empty():
+    limiter = RateLimiter(method_rates={"sendTestEmail": 50})
+    waits = [limiter.acquire("sendTestEmail") for _ in range(52)]
+
+    assert waits[0] == 0 and sum(waits) > 0
+    assert limiter.acquire("getMessage") == 0
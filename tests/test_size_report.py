@@ -0,0 +1,41 @@
+import base64
+
+import pytest
+
+from gmu.utils.size_report import base64_size, build_size_report, html_breakdown
+
+STYLE_BLOCK = "<style>.a{color:red}</style>"
+MSO = "<!--[if mso]><table><tr><td><![endif]-->"
+LETTER = ('<html><head>' + STYLE_BLOCK + '</head><body><p style="margin:0">Привет</p>'
+          + MSO + '<td class="a">OK</td></body></html>')
+
+
+def test_html_breakdown_by_part():
+    parts = html_breakdown(LETTER)
+
+    assert parts == {
+        "inline_styles": len(' style="margin:0"'),
+        "style_blocks": len(STYLE_BLOCK),
+        "mso": len(MSO),
+        # Кириллица - по два байта в UTF-8.
+        "text": len("Привет".encode("utf-8")) + len("OK"),
+        "markup": len("<html><head></head><body><p></p><td class=\"a\"></td></body></html>"),
+    }
+    assert sum(parts.values()) == len(LETTER.encode("utf-8"))
+
+
+@pytest.mark.parametrize("size", [0, 1, 56, 57, 58, 1000])
+def test_base64_size_matches_mime_encoding(size):
+    encoded = base64.encodebytes(b"x" * size)  # строки по 76 символов
+    assert base64_size(size) == len(encoded.replace(b"\n", b"\r\n"))
+
+
+def test_build_size_report():
+    report = build_size_report(LETTER, {"small.png": b"1" * 10, "big.png": b"2" * 100}, zip_size=42, threshold=100)
+
+    assert [row["name"] for row in report["attachments"]] == ["big.png", "small.png"]
+    assert report["attachments_bytes"] == 110
+    assert report["mime_bytes"] == base64_size(len(LETTER.encode("utf-8"))) + base64_size(100) + base64_size(10)
+    assert report["zip_bytes"] == 42
+    assert report["clipping"] == "clipped"
+    assert build_size_report(LETTER, {}, threshold=10 ** 6)["clipping"] == "ok"
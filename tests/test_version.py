@@ -0,0 +1,12 @@
+import pathlib
+import tomllib
+
+from gmu.version import VERSION_TEXT, __version__
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def test_version_matches_pyproject():
+    with open(ROOT / "pyproject.toml", "rb") as f:
+        assert tomllib.load(f)["project"]["version"] == __version__
+    assert VERSION_TEXT.endswith(f"v{__version__}")